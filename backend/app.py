@@ -3,15 +3,43 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 import cloudinary
 from config import Config
-from routes import auth_routes, user_routes, meme_routes
+from routes import (auth_routes, user_routes, meme_routes, notification_routes, analytics_routes,
+                    admin_routes, health_routes)
 from services.mongodb_service import init_db
+from services.like_buffer_service import init_like_buffer
+from services.graph_service import init_follow_graph
+from services.suggestion_service import init_suggestions
+from services.cleanup_service import init_cleanup
+from services.archive_service import init_archive
+from services.job_service import init_jobs
+from services.analytics_service import init_analytics
+from services.ranking_service import init_ranking
+from utils.response_utils import init_compression
+from services.admission_service import init_admission
+from services.profiling_service import init_profiling
+from services.resilience_service import init_resilience
+from commands.data_commands import data_cli
+from commands.job_commands import jobs_cli
+from commands.budget_commands import budgets_cli
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
     
-    # Initialize CORS
-    CORS(app)
+    # Initialize CORS (expose the last-write stamp used for read routing)
+    CORS(app, expose_headers=['X-Last-Write'])
+    
+    # Initialize admission control (runs before every request)
+    init_admission(app)
+    
+    # Initialize slow-request capture and profiling (before any Mongo client exists)
+    init_profiling(app)
+    
+    # Initialize request deadlines, circuit breakers and fault injection (before any Mongo client exists)
+    init_resilience(app)
+    
+    # Initialize response compression
+    init_compression(app)
     
     # Initialize JWT
     jwt = JWTManager(app)
@@ -19,6 +47,26 @@ def create_app():
     # Initialize MongoDB
     init_db(app)
     
+    # Initialize the like write buffer (optional)
+    init_like_buffer(app)
+    
+    # Initialize the in-memory follow graph (optional)
+    init_follow_graph(app)
+    
+    # Initialize background "people you may know" refresh
+    init_suggestions(app)
+    
+    # Initialize background cleanup of deleted memes and accounts
+    init_cleanup(app)
+    init_archive(app)
+    init_jobs(app)
+    
+    # Initialize the creator analytics rollup recorder
+    init_analytics(app)
+    
+    # Check the optional ranking dependency
+    init_ranking(app)
+    
     # Initialize Cloudinary
     cloudinary.config(
         cloud_name=app.config['CLOUDINARY_CLOUD_NAME'],
@@ -30,9 +78,21 @@ def create_app():
     app.register_blueprint(auth_routes.bp)
     app.register_blueprint(user_routes.bp)
     app.register_blueprint(meme_routes.bp)
+    app.register_blueprint(notification_routes.bp)
+    app.register_blueprint(analytics_routes.bp)
+    app.register_blueprint(admin_routes.bp)
+    app.register_blueprint(health_routes.bp)
+    
+    # Register CLI commands (flask --app manage data ...)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(budgets_cli)
     
     return app
 
 if __name__ == '__main__':
+    # Development server only; use wsgi.py with gunicorn in production
+    from services.lifecycle_service import warm_up
     app = create_app()
+    warm_up(app)
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,305 @@
+import datetime
+import hashlib
+import shutil
+import sys
+import tempfile
+import click
+from bson import ObjectId
+from flask.cli import AppGroup
+from pymongo import monitoring
+from config import CliConfig
+from services.archive_service import ARCHIVE_COLLECTION
+from services.author_service import author_snapshot
+from services.mongodb_service import get_shared_db, ensure_indexes
+from services.query_budget_service import BudgetCommandListener, start_capture, stop_capture, measure
+from utils.auth_utils import hash_password, generate_token
+
+budgets_cli = AppGroup('budgets', help='Check per-endpoint Mongo query budgets against seeded data.')
+
+# The harness only ever touches a database with this suffix, and drops it afterwards
+BUDGET_DB_SUFFIX = '_query_budget'
+
+# Blueprints whose every endpoint must declare a budget
+BUDGETED_BLUEPRINTS = ('auth', 'users', 'memes')
+
+# Endpoints left out of the check, with the reason
+UNBUDGETED = {
+    'memes.create_meme': 'uploads the image to Cloudinary',
+    'memes.finish_upload': 'uploads the assembled file to Cloudinary',
+}
+
+# Applied unless a scenario declares its own: no collection scans, at most
+# two documents examined per document returned, and 32 KiB on the wire
+DEFAULT_BUDGET = {'examined_ratio': 2.0, 'bytes': 32 * 1024}
+
+SEED_PASSWORD = 'budget-password'
+SEED_AUTHORS = 20
+SEED_MEMES_PER_AUTHOR = 5
+SEED_ARCHIVED_MEMES = 3
+SEED_POPULAR_LIKES = 2000  # makes a projection that ships the likes array stand out in bytes
+
+UPLOAD_BODY = b'query-budget-upload'
+
+# Each scenario is one request, run in order against the seeded data. Paths
+# and bodies are filled from the seed context ({meme_id} etc.), 'save' copies
+# response fields into it, and 'as' picks whose token is sent ('viewer' by
+# default). 'commands' is the number of Mongo round trips the endpoint makes
+# today: one more is a regression.
+SCENARIOS = [
+    {'endpoint': 'auth.register', 'method': 'POST', 'path': '/api/auth/register', 'as': None,
+     'json': {'username': 'budget_newcomer', 'email': 'budget_newcomer@example.com', 'password': SEED_PASSWORD},
+     'save': {'newcomer_token': 'token'}, 'budget': {'commands': 3}},
+    {'endpoint': 'auth.login', 'method': 'POST', 'path': '/api/auth/login', 'as': None,
+     'json': {'email': 'budget_viewer@example.com', 'password': SEED_PASSWORD}, 'budget': {'commands': 1}},
+    {'endpoint': 'auth.get_current_user', 'method': 'GET', 'path': '/api/auth/me', 'budget': {'commands': 1}},
+    {'endpoint': 'auth.update_current_user', 'method': 'PUT', 'path': '/api/auth/me',
+     'json': {'bio': 'Measured, not guessed'}, 'budget': {'commands': 2}},
+
+    {'endpoint': 'users.search_users', 'method': 'GET', 'path': '/api/users/search?q=budget_author',
+     'budget': {'commands': 2, 'examined_ratio': 4.0}},  # username/email $or overlaps before the limit applies
+    {'endpoint': 'users.get_suggestions', 'method': 'GET', 'path': '/api/users/suggestions', 'warm': True,
+     'budget': {'commands': 1}},
+    {'endpoint': 'users.get_user', 'method': 'GET', 'path': '/api/users/{author_id}', 'budget': {'commands': 4}},
+    {'endpoint': 'users.get_user_profile', 'method': 'GET', 'path': '/api/users/{author_id}/profile',
+     'budget': {'commands': 3, 'examined_ratio': 10.0}},  # one $facet document summarises many
+    {'endpoint': 'users.get_user_memes', 'method': 'GET', 'path': '/api/users/{author_id}/memes',
+     'budget': {'commands': 3}},
+    {'endpoint': 'users.get_followers', 'method': 'GET', 'path': '/api/users/{viewer_id}/followers',
+     'budget': {'commands': 2}},
+    {'endpoint': 'users.get_following', 'method': 'GET', 'path': '/api/users/{viewer_id}/following',
+     'budget': {'commands': 2}},
+    {'endpoint': 'users.follow_user', 'method': 'POST', 'path': '/api/users/{stranger_id}/follow',
+     'budget': {'commands': 4}},
+    {'endpoint': 'users.unfollow_user', 'method': 'POST', 'path': '/api/users/{stranger_id}/unfollow',
+     'budget': {'commands': 1}},
+    {'endpoint': 'users.follow_users', 'method': 'POST', 'path': '/api/users/follow/bulk',
+     'json': {'user_ids': ['{other_stranger_id}', '{other_author_id}', 'not-an-id']}, 'budget': {'commands': 4}},
+    {'endpoint': 'users.unfollow_users', 'method': 'POST', 'path': '/api/users/unfollow/bulk',
+     'json': {'user_ids': ['{other_stranger_id}']}, 'budget': {'commands': 3}},
+
+    {'endpoint': 'memes.get_feed', 'method': 'GET', 'path': '/api/memes/feed', 'budget': {'commands': 3}},
+    {'endpoint': 'memes.get_meme', 'method': 'GET', 'path': '/api/memes/{meme_id}', 'budget': {'commands': 1}},
+    {'endpoint': 'memes.get_meme', 'label': 'archived', 'method': 'GET', 'path': '/api/memes/{archived_meme_id}',
+     'budget': {'commands': 3}},
+    {'endpoint': 'memes.get_comments', 'method': 'GET', 'path': '/api/memes/{meme_id}/comments',
+     'budget': {'commands': 2}},
+    {'endpoint': 'memes.like_meme', 'method': 'POST', 'path': '/api/memes/{liked_meme_id}/like',
+     'budget': {'commands': 7}},
+    {'endpoint': 'memes.unlike_meme', 'method': 'POST', 'path': '/api/memes/{liked_meme_id}/unlike',
+     'budget': {'commands': 3}},
+    {'endpoint': 'memes.like_meme', 'label': 'archived', 'method': 'POST',
+     'path': '/api/memes/{archived_meme_id}/like', 'budget': {'commands': 8}},
+    {'endpoint': 'memes.add_comment', 'method': 'POST', 'path': '/api/memes/{meme_id}/comments',
+     'json': {'text': 'Within budget'}, 'budget': {'commands': 6}},
+    {'endpoint': 'memes.update_meme', 'method': 'PUT', 'path': '/api/memes/{meme_id}', 'as': 'author',
+     'json': {'caption': 'Edited caption'}, 'budget': {'commands': 1}},
+    {'endpoint': 'memes.start_upload', 'method': 'POST', 'path': '/api/memes/uploads',
+     'json': {'filename': 'budget.png', 'size': len(UPLOAD_BODY), 'checksum': hashlib.sha256(UPLOAD_BODY).hexdigest()},
+     'save': {'upload_id': 'upload_id'}, 'budget': {'commands': 1}},
+    {'endpoint': 'memes.get_upload_status', 'method': 'GET', 'path': '/api/memes/uploads/{upload_id}',
+     'budget': {'commands': 1}},
+    {'endpoint': 'memes.upload_chunk', 'method': 'PUT', 'path': '/api/memes/uploads/{upload_id}',
+     'data': UPLOAD_BODY, 'headers': {'Content-Range': f'bytes 0-{len(UPLOAD_BODY) - 1}/{len(UPLOAD_BODY)}',
+                                      'X-Chunk-Checksum': hashlib.sha256(UPLOAD_BODY).hexdigest()},
+     'budget': {'commands': 2}},
+    {'endpoint': 'memes.delete_comment', 'method': 'DELETE', 'path': '/api/memes/comments/{comment_id}',
+     'budget': {'commands': 1}},
+    {'endpoint': 'memes.delete_meme', 'method': 'DELETE', 'path': '/api/memes/{deleted_meme_id}', 'as': 'author',
+     'budget': {'commands': 1}},
+
+    {'endpoint': 'auth.delete_current_user', 'method': 'DELETE', 'path': '/api/auth/me', 'as': 'newcomer',
+     'budget': {'commands': 1}},  # the cleanup worker hides and purges the account's memes
+]
+
+class BudgetConfig(CliConfig):
+    """Config for the harness app: a throwaway database and no background writers."""
+    DB_NAME = CliConfig.DB_NAME + BUDGET_DB_SUFFIX
+    ADMISSION_ENABLED = False
+    PROFILING_ENABLED = False
+    HEDGED_READS_ENABLED = False
+    COMPRESSION_ENABLED = False
+    FAULT_INJECTION = {}
+
+def _with_app_name(uri, app_name):
+    # A distinct URI gets its own pooled client, created after the budget listener is registered
+    base, _, options = uri.partition('?')
+    if base.count('/') < 3:
+        base += '/'
+    return f"{base}?{options + '&' if options else ''}appName={app_name}"
+
+def _fill(value, context):
+    if isinstance(value, str):
+        return value.format(**context)
+    if isinstance(value, list):
+        return [_fill(item, context) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, context) for key, item in value.items()}
+    return value
+
+def _seed(db, now):
+    """Insert the users, follows, memes and likes the scenarios run against."""
+    password = hash_password(SEED_PASSWORD)
+
+    def user(username):
+        return {'_id': ObjectId(), 'username': username, 'email': f'{username}@example.com', 'password': password,
+                'profile_pic': None, 'bio': '', 'created_at': now, 'updated_at': now}
+
+    viewer = user('budget_viewer')
+    authors = [user(f'budget_author{i}') for i in range(SEED_AUTHORS)]
+    strangers = [user('budget_stranger1'), user('budget_stranger2')]
+    db.users.insert_many([viewer] + authors + strangers)
+
+    # The viewer follows every author and half of them follow back
+    follows = [{'follower_id': viewer['_id'], 'following_id': author['_id'], 'created_at': now} for author in authors]
+    follows += [{'follower_id': author['_id'], 'following_id': viewer['_id'], 'created_at': now}
+                for author in authors[:SEED_AUTHORS // 2]]
+    db.follows.insert_many(follows)
+
+    def comment(meme_id, commenter, created_at):
+        return {'_id': ObjectId(), 'meme_id': meme_id, 'user_id': commenter['_id'],
+                'author': author_snapshot(commenter), 'text': 'Seeded comment', 'created_at': created_at}
+
+    # Newest first: the first author's memes, then the second's, and so on
+    memes = []
+    for i, author in enumerate(authors):
+        for j in range(SEED_MEMES_PER_AUTHOR):
+            created_at = now - datetime.timedelta(minutes=i * SEED_MEMES_PER_AUTHOR + j)
+            meme_id = ObjectId()
+            memes.append({
+                '_id': meme_id, 'user_id': author['_id'], 'author': author_snapshot(author),
+                'image_url': f'https://example.com/{meme_id}.png', 'caption': 'Seeded meme', 'tags': [],
+                'cloudinary_public_id': None, 'likes': [],
+                'comments': [comment(meme_id, viewer, created_at),
+                             comment(meme_id, authors[(i + 1) % SEED_AUTHORS], created_at)],
+                'created_at': created_at, 'updated_at': created_at
+            })
+    memes[0]['likes'] = [ObjectId() for _ in range(SEED_POPULAR_LIKES)]
+    db.memes.insert_many(memes)
+
+    # Cold tier: older memes of the first author, one of them liked by the viewer
+    archived = []
+    for j in range(SEED_ARCHIVED_MEMES):
+        created_at = now - datetime.timedelta(days=60 + j)
+        meme_id = ObjectId()
+        archived.append({
+            '_id': meme_id, 'user_id': authors[0]['_id'], 'author': author_snapshot(authors[0]),
+            'image_url': f'https://example.com/{meme_id}.png', 'caption': 'Archived meme', 'tags': [],
+            'cloudinary_public_id': None, 'comments': [], 'likes_count': 1 if j == 0 else 0,
+            'comments_count': 0, 'created_at': created_at, 'updated_at': created_at, 'archived_at': now
+        })
+    db[ARCHIVE_COLLECTION].insert_many(archived)
+    db.likes.insert_one({'meme_id': archived[0]['_id'], 'user_id': viewer['_id'], 'created_at': now})
+
+    return {
+        'viewer_id': str(viewer['_id']),
+        'author_id': str(authors[0]['_id']),
+        'other_author_id': str(authors[1]['_id']),
+        'stranger_id': str(strangers[0]['_id']),
+        'other_stranger_id': str(strangers[1]['_id']),
+        'meme_id': str(memes[0]['_id']),
+        'liked_meme_id': str(memes[1]['_id']),
+        'deleted_meme_id': str(memes[SEED_MEMES_PER_AUTHOR - 1]['_id']),
+        'comment_id': str(memes[0]['comments'][0]['_id']),
+        'archived_meme_id': str(archived[0]['_id']),
+        'viewer_token': generate_token(str(viewer['_id'])),
+        'author_token': generate_token(str(authors[0]['_id']))
+    }
+
+def _request(client, scenario, context):
+    headers = dict(_fill(scenario.get('headers', {}), context))
+    as_user = scenario.get('as', 'viewer')
+    if as_user is not None:
+        headers['Authorization'] = f"Bearer {context[as_user + '_token']}"
+    response = client.open(_fill(scenario['path'], context), method=scenario['method'], headers=headers,
+                           json=_fill(scenario.get('json'), context), data=scenario.get('data'))
+    response.get_data()  # Streamed bodies run their queries while being read
+    return response
+
+def _violations(measured, budget):
+    problems = []
+    if measured['commands'] > budget['commands']:
+        problems.append(f"{measured['commands']} round trips, budget {budget['commands']}")
+    if measured['collscans']:
+        problems.append(f"{measured['collscans']} collection scan(s)")
+    ratio = measured['examined'] / max(measured['returned'], 1)
+    if ratio > budget['examined_ratio']:
+        problems.append(f"examined {measured['examined']} docs for {measured['returned']} returned")
+    if measured['bytes'] > budget['bytes']:
+        problems.append(f"{measured['bytes']} bytes on the wire, budget {budget['bytes']}")
+    return problems
+
+def _uncovered_endpoints(app):
+    covered = {scenario['endpoint'] for scenario in SCENARIOS} | set(UNBUDGETED)
+    return sorted({rule.endpoint for rule in app.url_map.iter_rules()
+                   if rule.endpoint.split('.')[0] in BUDGETED_BLUEPRINTS and rule.endpoint not in covered})
+
+@budgets_cli.command('check')
+@click.option('--record', is_flag=True, help='Print the measured values of every scenario, not just violations.')
+@click.option('--keep', is_flag=True, help='Keep the seeded database for inspection.')
+def check_command(record, keep):
+    """Run every budgeted endpoint against seeded data and fail on regressions."""
+    from app import create_app  # The harness builds its own app on a throwaway database
+
+    # Registered before the harness app creates its client, so only that client reports here
+    monitoring.register(BudgetCommandListener())
+    upload_dir = tempfile.mkdtemp(prefix='query-budget-')
+    harness_config = type('HarnessConfig', (BudgetConfig,), {
+        'MONGO_URI': _with_app_name(CliConfig.MONGO_URI, 'query-budget'),
+        'UPLOAD_TMP_DIR': upload_dir
+    })
+    if not harness_config.DB_NAME.endswith(BUDGET_DB_SUFFIX):
+        raise click.ClickException('Refusing to seed a database that is not a query-budget database')
+
+    app = create_app(harness_config)
+    db = get_shared_db(app)
+    failures = 0
+    try:
+        with app.app_context():
+            # Start from an empty database even if an earlier --keep run left one behind
+            db.client.drop_database(db.name)
+            ensure_indexes(db)
+            context = _seed(db, datetime.datetime.utcnow())
+
+        uncovered = _uncovered_endpoints(app)
+        for endpoint in uncovered:
+            click.echo(f"FAIL {endpoint}: no budget declared (add a scenario or an UNBUDGETED reason)")
+        failures += len(uncovered)
+
+        client = app.test_client()
+        for scenario in SCENARIOS:
+            name = scenario['endpoint'] + (f" [{scenario['label']}]" if scenario.get('label') else '')
+            if scenario.get('warm'):
+                _request(client, scenario, context)
+
+            start_capture()
+            try:
+                response = _request(client, scenario, context)
+            finally:
+                capture = stop_capture()
+
+            if response.status_code >= 400:
+                click.echo(f"FAIL {name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+                failures += 1
+                continue
+            for key, field in scenario.get('save', {}).items():
+                context[key] = response.get_json()[field]
+
+            budget = dict(DEFAULT_BUDGET, **scenario['budget'])
+            measured = measure(db.client, capture)
+            problems = _violations(measured, budget)
+            if problems:
+                failures += 1
+                click.echo(f"FAIL {name}: {'; '.join(problems)}")
+                click.echo(f"     {', '.join(measured['breakdown'])}")
+            elif record:
+                click.echo(f"ok   {name}: {measured['commands']} round trips, examined {measured['examined']}"
+                           f" / returned {measured['returned']}, {measured['bytes']} bytes")
+    finally:
+        if not keep:
+            db.client.drop_database(db.name)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    if failures:
+        click.echo(f"{failures} budget violation(s)")
+        sys.exit(1)
+    click.echo(f"All {len(SCENARIOS)} scenarios within budget; unbudgeted: {', '.join(sorted(UNBUDGETED))}")
@@ -0,0 +1,224 @@
+import json
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import click
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from flask.cli import AppGroup
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from services.archive_service import ARCHIVE_COLLECTION
+from services.mongodb_service import get_db, ensure_indexes
+
+data_cli = AppGroup('data', help='Bulk export, import and reconciliation of platform data.')
+
+# Collections that make up the platform's data set
+COLLECTIONS = ['users', 'memes', 'memes_archive', 'follows', 'likes', 'comments']
+
+DUPLICATE_KEY_ERROR = 11000
+
+RECONCILE_BATCH_SIZE = 1000
+
+def rebuild_archive_counters(db):
+    """
+    Recount likes_count and comments_count of archived memes.
+
+    Archived likes live in the likes collection and archived comments stay
+    embedded, so both counts are rebuilt from them, one batch of memes at a time.
+
+    Args:
+        db (Database): The MongoDB database handle
+    """
+    archive = db[ARCHIVE_COLLECTION]
+    last_id = None
+    while True:
+        query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+        ids = [doc['_id'] for doc in archive.find(query, {'_id': 1}).sort('_id', 1).limit(RECONCILE_BATCH_SIZE)]
+        if not ids:
+            return
+        likes = {
+            group['_id']: group['count']
+            for group in db.likes.aggregate([
+                {'$match': {'meme_id': {'$in': ids}}},
+                {'$group': {'_id': '$meme_id', 'count': {'$sum': 1}}}
+            ])
+        }
+        archive.bulk_write([
+            UpdateOne({'_id': _id}, [{'$set': {
+                'likes_count': likes.get(_id, 0),
+                'comments_count': {'$size': {'$ifNull': ['$comments', []]}}
+            }}])
+            for _id in ids
+        ], ordered=False)
+        last_id = ids[-1]
+
+def rebuild_notification_counts(db):
+    """
+    Reset every user's unread counter to their number of unread notification groups.
+
+    Args:
+        db (Database): The MongoDB database handle
+    """
+    unread = {
+        group['_id']: group['unread']
+        for group in db.notifications.aggregate([
+            {'$match': {'read': False}},
+            {'$group': {'_id': '$recipient_id', 'unread': {'$sum': 1}}}
+        ])
+    }
+    operations = [UpdateOne({'_id': user_id}, {'$set': {'unread': count}}, upsert=True)
+                  for user_id, count in unread.items()]
+    operations += [UpdateOne({'_id': doc['_id']}, {'$set': {'unread': 0}})
+                   for doc in db.notification_counts.find({'unread': {'$ne': 0}}, {'_id': 1})
+                   if doc['_id'] not in unread]
+    for start in range(0, len(operations), RECONCILE_BATCH_SIZE):
+        db.notification_counts.bulk_write(operations[start:start + RECONCILE_BATCH_SIZE], ordered=False)
+
+# Steps run after a bulk load (and nightly by the data.reconcile job) to rebuild derived state
+RECONCILERS = [ensure_indexes, rebuild_archive_counters, rebuild_notification_counts]
+
+def _export_path(out_dir, collection, fmt):
+    return os.path.join(out_dir, f"{collection}.{fmt}")
+
+@data_cli.command('export')
+@click.argument('collections', nargs=-1)
+@click.option('--out', 'out_dir', default='export', show_default=True, help='Output directory.')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'bson']), default='ndjson', show_default=True)
+@click.option('--batch-size', default=1000, show_default=True, help='Documents fetched per cursor batch.')
+def export_command(collections, out_dir, fmt, batch_size):
+    """Stream collections to NDJSON or BSON files with bounded memory."""
+    db = get_db()
+    os.makedirs(out_dir, exist_ok=True)
+
+    for collection in collections or COLLECTIONS:
+        path = _export_path(out_dir, collection, fmt)
+        count = 0
+        if fmt == 'bson':
+            # Raw documents are written back out without being decoded
+            source = db.get_collection(collection, codec_options=CodecOptions(document_class=RawBSONDocument))
+            with open(path, 'wb') as f:
+                for doc in source.find({}, batch_size=batch_size):
+                    f.write(doc.raw)
+                    count += 1
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                for doc in db[collection].find({}, batch_size=batch_size):
+                    f.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS))
+                    f.write('\n')
+                    count += 1
+        click.echo(f"Exported {count} documents from {collection} to {path}")
+
+def _read_documents(f, fmt):
+    """
+    Yield (end_offset, document) pairs from an export file.
+
+    Args:
+        f (file): The export file opened in binary mode
+        fmt (str): 'ndjson' or 'bson'
+    """
+    if fmt == 'bson':
+        while True:
+            header = f.read(4)
+            if not header:
+                return
+            size = struct.unpack('<i', header)[0]
+            yield f.tell() + size - 4, RawBSONDocument(header + f.read(size - 4))
+    else:
+        for line in iter(f.readline, b''):
+            if line.strip():
+                yield f.tell(), json_util.loads(line)
+
+def _batches(documents, batch_size):
+    batch = []
+    end_offset = 0
+    for end_offset, doc in documents:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield end_offset, batch
+            batch = []
+    if batch:
+        yield end_offset, batch
+
+def _insert_batch(collection, docs):
+    """Insert a batch, treating documents that already exist as imported."""
+    try:
+        collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(error['code'] != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+    return len(docs)
+
+def _load_checkpoint(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'offset': 0, 'imported': 0}
+
+def _save_checkpoint(path, checkpoint):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+@data_cli.command('import')
+@click.argument('collection')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'bson']), default=None,
+              help='Input format (defaults to the file extension).')
+@click.option('--batch-size', default=1000, show_default=True, help='Documents per insert_many.')
+@click.option('--workers', default=1, show_default=True, help='Parallel insert workers.')
+@click.option('--resume/--no-resume', default=True, show_default=True, help='Continue from the last checkpoint.')
+@click.option('--reconcile/--no-reconcile', default=True, show_default=True, help='Run reconciliation afterwards.')
+def import_command(collection, path, fmt, batch_size, workers, resume, reconcile):
+    """Load an exported file with unordered batched inserts and resumable checkpoints."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.')
+    if fmt not in ('ndjson', 'bson'):
+        raise click.BadParameter(f"Unknown format: {fmt}", param_hint='--format')
+
+    target = get_db()[collection]
+    checkpoint_path = f"{path}.checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path) if resume else {'offset': 0, 'imported': 0}
+
+    # Batches complete out of order; the checkpoint only advances over a finished prefix
+    in_flight = deque()
+
+    def drain(block):
+        while in_flight and (block or in_flight[0][1].done()):
+            end_offset, future = in_flight.popleft()
+            checkpoint['imported'] += future.result()
+            checkpoint['offset'] = end_offset
+            _save_checkpoint(checkpoint_path, checkpoint)
+            block = False
+
+    with open(path, 'rb') as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        f.seek(checkpoint['offset'])
+        for end_offset, docs in _batches(_read_documents(f, fmt), batch_size):
+            # Bound memory to a couple of batches per worker
+            while len(in_flight) >= 2 * workers:
+                drain(block=True)
+            in_flight.append((end_offset, pool.submit(_insert_batch, target, docs)))
+            drain(block=False)
+        while in_flight:
+            drain(block=True)
+
+    click.echo(f"Imported {checkpoint['imported']} documents into {collection}")
+    if reconcile:
+        _reconcile()
+    # An empty input never writes a checkpoint
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+def _reconcile():
+    db = get_db()
+    for step in RECONCILERS:
+        click.echo(f"Reconciling: {step.__name__}")
+        step(db)
+
+@data_cli.command('reconcile')
+def reconcile_command():
+    """Rebuild indexes, archived like/comment counts and unread notification counts."""
+    _reconcile()
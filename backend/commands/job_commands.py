@@ -0,0 +1,71 @@
+import datetime
+import json
+import multiprocessing
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from services.job_service import JOB_TYPES, JobWorker, get_job_queue
+
+jobs_cli = AppGroup('jobs', help='Run and inspect background jobs.')
+
+def _run_worker(app, threads, job_types):
+    worker = JobWorker(app, threads=threads, poll_interval=app.config['JOBS_POLL_INTERVAL'],
+                       job_types=job_types or None)
+    worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        worker.stop()
+
+def _run_worker_process(threads, job_types):
+    from app import create_app  # Each process builds its own app and Mongo client
+    _run_worker(create_app(), threads, job_types)
+
+@jobs_cli.command('worker')
+@click.option('--threads', type=int, default=None, help='Worker threads per process.')
+@click.option('--processes', type=int, default=1, help='Worker processes to start.')
+@click.option('--type', 'job_types', multiple=True, help='Only run these job types (repeatable).')
+def worker_command(threads, processes, job_types):
+    """Claim and run jobs until interrupted."""
+    threads = threads or current_app.config['JOBS_WORKER_THREADS']
+    job_types = list(job_types)
+    unknown = [job_type for job_type in job_types if job_type not in JOB_TYPES]
+    if unknown:
+        raise click.BadParameter(f"Unknown job types: {', '.join(unknown)}")
+    
+    if processes <= 1:
+        click.echo(f"Job worker running with {threads} threads")
+        _run_worker(current_app._get_current_object(), threads, job_types)
+        return
+    
+    # Spawn rather than fork so no process inherits another's Mongo client
+    context = multiprocessing.get_context('spawn')
+    children = [context.Process(target=_run_worker_process, args=(threads, job_types), name=f'job-worker-{i}')
+                for i in range(processes)]
+    for child in children:
+        child.start()
+    click.echo(f"Started {processes} job worker processes with {threads} threads each")
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.join()
+
+@jobs_cli.command('enqueue')
+@click.argument('job_type')
+@click.option('--payload', default='{}', help='JSON payload for the handler.')
+@click.option('--delay', type=int, default=0, help='Seconds before the job may run.')
+def enqueue_command(job_type, payload, delay):
+    """Add a job to the queue."""
+    run_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay) if delay else None
+    job_id = get_job_queue().enqueue(job_type, json.loads(payload), run_at)
+    click.echo(f"Enqueued {job_type} job {job_id}")
+
+@jobs_cli.command('stats')
+def stats_command():
+    """Show queue depth, lag and throughput per job type."""
+    for job_type, stats in sorted(get_job_queue().stats().items()):
+        click.echo(f"{job_type}: " + ', '.join(f"{key}={value}" for key, value in stats.items()))
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -8,12 +9,177 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-for-development')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours
+    ADMIN_USER_IDS = [user_id for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id]
 
     # MongoDB settings
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/MemePlatform')
     DB_NAME = 'MemePlatform'
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '2'))  # opened during worker warm-up
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '2000'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '3000'))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '30000'))  # longest wait for one reply
+    
+    # Read routing: endpoints that tolerate slightly stale data read from secondaries.
+    # Clients that wrote within READ_MAX_STALENESS_SECONDS are kept on the primary.
+    READ_MAX_STALENESS_SECONDS = int(os.getenv('READ_MAX_STALENESS_SECONDS', '90'))  # MongoDB minimum is 90
+    READ_ROUTING = {
+        'memes.get_feed': 'secondaryPreferred',
+        'memes.get_comments': 'secondaryPreferred',
+        'users.search_users': 'secondaryPreferred',
+        'users.get_followers': 'secondaryPreferred',
+        'users.get_following': 'secondaryPreferred',
+        'users.get_suggestions': 'secondaryPreferred',
+    }
 
     # Cloudinary settings
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
-    CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
\ No newline at end of file
+    CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
+
+    # Like write buffer settings
+    LIKE_BUFFER_ENABLED = os.getenv('LIKE_BUFFER_ENABLED', 'false').lower() == 'true'
+    LIKE_BUFFER_FLUSH_INTERVAL = float(os.getenv('LIKE_BUFFER_FLUSH_INTERVAL', '0.05'))  # seconds
+    LIKE_BUFFER_MAX_PENDING = int(os.getenv('LIKE_BUFFER_MAX_PENDING', '10000'))
+    LIKE_BUFFER_DURABILITY = os.getenv('LIKE_BUFFER_DURABILITY', 'acknowledged')  # acknowledged, journaled or majority
+
+    # In-memory follow graph settings
+    GRAPH_SERVICE_ENABLED = os.getenv('GRAPH_SERVICE_ENABLED', 'false').lower() == 'true'
+    GRAPH_SNAPSHOT_PATH = os.getenv('GRAPH_SNAPSHOT_PATH')
+    GRAPH_COMPACT_THRESHOLD = int(os.getenv('GRAPH_COMPACT_THRESHOLD', '10000'))
+    # Seconds between reloads from the follows collection, which bounds how stale a
+    # worker's graph can be; 0 disables reloads and is refused with a snapshot
+    GRAPH_RELOAD_INTERVAL = int(os.getenv('GRAPH_RELOAD_INTERVAL', '300'))
+
+    # "People you may know" suggestion settings
+    SUGGESTIONS_BACKGROUND_REFRESH = os.getenv('SUGGESTIONS_BACKGROUND_REFRESH', 'true').lower() == 'true'
+    SUGGESTIONS_LIMIT = int(os.getenv('SUGGESTIONS_LIMIT', '20'))
+    SUGGESTIONS_FANOUT_LIMIT = int(os.getenv('SUGGESTIONS_FANOUT_LIMIT', '100'))  # followers refreshed per follow event
+
+    # Bulk follow settings
+    FOLLOW_BULK_LIMIT = int(os.getenv('FOLLOW_BULK_LIMIT', '100'))  # targets per bulk follow/unfollow request
+
+    # Feed settings
+    FEED_MERGE_THRESHOLD = int(os.getenv('FEED_MERGE_THRESHOLD', '200'))  # authors before switching to the k-way merge
+    FEED_MERGE_BUCKET_SIZE = int(os.getenv('FEED_MERGE_BUCKET_SIZE', '100'))
+
+    # Ranked feed settings (mode=ranked on /api/memes/feed, requires numpy)
+    FEED_DEFAULT_MODE = os.getenv('FEED_DEFAULT_MODE', 'latest')  # 'latest' or 'ranked'
+    RANKED_FEED_WINDOW = int(os.getenv('RANKED_FEED_WINDOW', '300'))  # newest candidates scored per request
+    RANKING_AFFINITY_DAYS = int(os.getenv('RANKING_AFFINITY_DAYS', '30'))  # engagement history used for affinity
+    RANKING_AFFINITY_MAX_AGE = int(os.getenv('RANKING_AFFINITY_MAX_AGE', '3600'))  # seconds before a background refresh
+    RANKING_HALF_LIFE_HOURS = float(os.getenv('RANKING_HALF_LIFE_HOURS', '12'))
+    RANKING_DIVERSITY_DECAY = float(os.getenv('RANKING_DIVERSITY_DECAY', '0.7'))  # per extra meme by the same author
+    RANKING_WEIGHTS = {'affinity': 1.0, 'recency': 1.0, 'velocity': 0.5}
+
+    # Background deletion cleanup settings
+    CLEANUP_ENABLED = os.getenv('CLEANUP_ENABLED', 'true').lower() == 'true'
+    CLEANUP_BATCH_SIZE = int(os.getenv('CLEANUP_BATCH_SIZE', '500'))
+    CLEANUP_BATCH_PAUSE = float(os.getenv('CLEANUP_BATCH_PAUSE', '0.05'))  # seconds between batches
+    CLEANUP_INTERVAL = int(os.getenv('CLEANUP_INTERVAL', '60'))  # seconds between sweeps
+
+    # Hot/cold meme archive settings
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'false').lower() == 'true'
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))  # meme age before moving to the cold tier
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE', '0.05'))  # seconds between batches
+    ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', '3600'))  # seconds between passes
+
+    # Author snapshot propagation settings (username/avatar embedded in memes and comments)
+    AUTHOR_SNAPSHOT_DELAY = int(os.getenv('AUTHOR_SNAPSHOT_DELAY', '30'))  # seconds; coalesces rapid profile edits
+    AUTHOR_SNAPSHOT_BATCH_SIZE = int(os.getenv('AUTHOR_SNAPSHOT_BATCH_SIZE', '500'))
+    AUTHOR_SNAPSHOT_BATCH_PAUSE = float(os.getenv('AUTHOR_SNAPSHOT_BATCH_PAUSE', '0.1'))  # seconds between batches
+
+    # Notification inbox settings
+    NOTIFICATION_MAX_ACTORS = int(os.getenv('NOTIFICATION_MAX_ACTORS', '10'))  # recent actors kept per group
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))  # read groups expire after this
+
+    # Creator analytics rollup settings
+    ANALYTICS_ENABLED = os.getenv('ANALYTICS_ENABLED', 'true').lower() == 'true'
+    ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', '5.0'))  # seconds between rollup writes
+    ANALYTICS_HOURLY_RETENTION_DAYS = int(os.getenv('ANALYTICS_HOURLY_RETENTION_DAYS', '14'))  # daily rollups are kept
+    ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', '365'))  # longest range a dashboard can request
+
+    # Background job settings
+    JOBS_EMBEDDED_WORKER = os.getenv('JOBS_EMBEDDED_WORKER', 'false').lower() == 'true'  # run a worker inside the web app
+    JOBS_WORKER_THREADS = int(os.getenv('JOBS_WORKER_THREADS', '4'))
+    JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', '1.0'))  # seconds between claims when idle
+    JOBS_LEASE_SECONDS = int(os.getenv('JOBS_LEASE_SECONDS', '60'))  # renewed while a job runs
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+    JOBS_BACKOFF_BASE = float(os.getenv('JOBS_BACKOFF_BASE', '5'))  # seconds, doubled per attempt
+    JOBS_BACKOFF_MAX = float(os.getenv('JOBS_BACKOFF_MAX', '3600'))
+    JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', '7'))  # completed jobs expire after this
+    JOB_SCHEDULES = {
+        # name: (job type, interval in seconds)
+        'nightly-reconcile': ('data.reconcile', 86400),
+    }
+
+    # Response compression and streaming settings
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))  # gzip, 1-9
+    BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))  # brotli, 0-11 (needs the brotli package)
+    STREAM_JSON_RESPONSES = os.getenv('STREAM_JSON_RESPONSES', 'true').lower() == 'true'  # cursor-backed lists only (followers, following)
+
+    # Admission control settings
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    # A gthread worker never has more than WORKER_THREADS requests in flight (gunicorn.conf.py reads the
+    # same variable), so there the global limit defaults to the thread count and each class gets a share
+    # of it; a burst of one class queues instead of taking every thread. gevent workers default to 64.
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', '8'))
+    ADMISSION_GLOBAL_LIMIT = int(os.getenv(
+        'ADMISSION_GLOBAL_LIMIT',
+        WORKER_THREADS if os.getenv('WORKER_CLASS', 'gthread') == 'gthread' else 64
+    ))  # requests in flight per process
+    ADMISSION_LOW_PRIORITY_SHARE = float(os.getenv('ADMISSION_LOW_PRIORITY_SHARE', '0.5'))  # for search and upload
+    ADMISSION_LIMITS = {
+        # concurrency: slots, queue: max waiting requests, max_wait: seconds before shedding
+        'read': {'concurrency': max(1, ADMISSION_GLOBAL_LIMIT * 3 // 4), 'queue': 128, 'max_wait': 2.0},
+        'write': {'concurrency': max(1, ADMISSION_GLOBAL_LIMIT * 3 // 8), 'queue': 64, 'max_wait': 2.0},
+        'search': {'concurrency': max(1, ADMISSION_GLOBAL_LIMIT // 8), 'queue': 16, 'max_wait': 1.0},
+        'upload': {'concurrency': max(1, ADMISSION_GLOBAL_LIMIT // 16), 'queue': 8, 'max_wait': 1.0},
+    }
+
+    # Resilience settings (deadlines, circuit breakers, hedged reads, fault injection)
+    REQUEST_BUDGETS = {
+        # seconds per admission class; Mongo calls in the request share the budget via maxTimeMS
+        'read': float(os.getenv('REQUEST_BUDGET_READ', '2.0')),
+        'write': float(os.getenv('REQUEST_BUDGET_WRITE', '3.0')),
+        'search': float(os.getenv('REQUEST_BUDGET_SEARCH', '2.0')),
+        'upload': float(os.getenv('REQUEST_BUDGET_UPLOAD', '120.0')),
+    }
+    CLOUDINARY_TIMEOUT = float(os.getenv('CLOUDINARY_TIMEOUT', '60'))  # seconds, ceiling for one Cloudinary call
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))  # consecutive failures
+    BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '10.0'))  # seconds before a trial call
+    HEDGED_READS_ENABLED = os.getenv('HEDGED_READS_ENABLED', 'false').lower() == 'true'
+    HEDGE_DELAY_MS = int(os.getenv('HEDGE_DELAY_MS', '50'))  # start a second read after this
+    HEDGE_POOL_SIZE = int(os.getenv('HEDGE_POOL_SIZE', '16'))
+    # e.g. {"mongo": {"delay_ms": 200, "delay_rate": 0.1}, "cloudinary": {"error_rate": 0.5}}
+    FAULT_INJECTION = json.loads(os.getenv('FAULT_INJECTION', '{}'))
+
+    # Health check settings
+    HEALTH_CHECK_TIMEOUT_MS = int(os.getenv('HEALTH_CHECK_TIMEOUT_MS', '500'))
+
+    # Slow-request capture and on-demand profiling settings (off by default: captured
+    # commands carry user-supplied filter values such as login emails)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '1000'))
+    SLOW_COMMAND_MS = int(os.getenv('SLOW_COMMAND_MS', '100'))  # commands in slow requests that get an explain()
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # fraction of requests profiled at random
+    PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))  # seconds between stack samples
+
+    # Resumable chunked upload settings
+    UPLOAD_TMP_DIR = os.getenv('UPLOAD_TMP_DIR', '/tmp/meme_uploads')  # must be shared by all workers
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(5 * 1024 * 1024)))  # bytes
+    UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', str(100 * 1024 * 1024)))  # bytes
+    UPLOAD_STALE_AFTER = int(os.getenv('UPLOAD_STALE_AFTER', '86400'))  # seconds without a chunk
+
+class CliConfig(Config):
+    """Config for maintenance commands (`flask --app manage ...`): no background threads next to bulk work."""
+    GRAPH_SERVICE_ENABLED = False
+    LIKE_BUFFER_ENABLED = False
+    SUGGESTIONS_BACKGROUND_REFRESH = False
+    CLEANUP_ENABLED = False
+    ARCHIVE_ENABLED = False
+    ANALYTICS_ENABLED = False
+    JOBS_EMBEDDED_WORKER = False
@@ -0,0 +1,35 @@
+# Gunicorn settings for the production server: `gunicorn -c gunicorn.conf.py wsgi:app`
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# 'gthread' (default) or 'gevent' (requires the gevent package)
+worker_class = os.getenv('WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Also sizes the admission limits in config.py; keep ADMISSION_GLOBAL_LIMIT at or below it for gthread
+threads = int(os.getenv('WORKER_THREADS', '8'))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))  # gevent only
+
+# Each worker builds its own app so background threads and Mongo pools are not shared across fork
+preload_app = False
+
+timeout = int(os.getenv('WORKER_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))  # time to drain in-flight requests
+keepalive = int(os.getenv('KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', '1000'))
+
+def post_worker_init(worker):
+    from services.lifecycle_service import warm_up
+    warm_up(worker.wsgi)
+
+def worker_int(worker):
+    from services.lifecycle_service import shutdown
+    shutdown(worker.wsgi)
+
+def worker_exit(server, worker):
+    from services.lifecycle_service import shutdown
+    shutdown(worker.wsgi)
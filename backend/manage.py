@@ -0,0 +1,5 @@
+# Maintenance entry point, e.g. `flask --app manage data import memes dump/memes.bson`
+from app import create_app
+from config import CliConfig
+
+app = create_app(CliConfig)
@@ -2,6 +2,67 @@ from datetime import datetime
 from bson import ObjectId
 from flask import current_app, g
 from services.mongodb_service import get_db
+from services.like_buffer_service import get_like_buffer
+from services.feed_service import merge_feed
+from services.cleanup_service import get_cleanup_worker
+from services.archive_service import ARCHIVE_COLLECTION
+from services.ranking_service import get_affinity, rank_candidates
+from services.analytics_service import record_event
+from services.author_service import author_snapshot, author_view
+from services.loader_service import get_loader, clear_loaders
+from models.records import MemeRecord, CommentRecord, raw_collection
+from models.notification import Notification
+from pymongo import ReturnDocument
+
+# Number of embedded comments returned with the detail view
+DETAIL_COMMENTS_LIMIT = 3
+
+# Analytics rollup metric counted for each notification type
+ANALYTICS_METRICS = {'like': 'likes', 'comment': 'comments'}
+
+def meme_projection(profile, viewer_id=None, archived=False):
+    """
+    Build the find() projection for a meme read profile.
+    
+    Args:
+        profile (str): One of 'exists', 'owner', 'card' or 'detail'
+        viewer_id (ObjectId, optional): The user viewing the meme, used for is_liked
+        archived (bool): Build it for the cold tier, where the counts are stored
+            fields and is_liked has to come from the likes collection instead
+        
+    Returns:
+        dict: The projection document
+    """
+    if profile == 'exists':
+        # Covered by the _id index, no document fetch needed
+        return {'_id': 1}
+    if profile == 'owner':
+        # Just the author, e.g. to address a notification
+        return {'user_id': 1}
+    
+    projection = {
+        'user_id': 1,
+        'author': 1,
+        'image_url': 1,
+        'caption': 1,
+        'tags': 1,
+        'created_at': 1,
+        'likes_count': {'$size': {'$ifNull': ['$likes', []]}},
+        'comments_count': {'$size': {'$ifNull': ['$comments', []]}}
+    }
+    if archived:
+        projection['likes_count'] = 1
+        projection['comments_count'] = 1
+    elif viewer_id is not None:
+        projection['is_liked'] = {'$in': [viewer_id, {'$ifNull': ['$likes', []]}]}
+    
+    if profile == 'card':
+        return projection
+    if profile == 'detail':
+        projection['updated_at'] = 1
+        projection['comments'] = {'$slice': -DETAIL_COMMENTS_LIMIT}
+        return projection
+    raise ValueError(f"Unknown meme projection profile: {profile}")
 
 class Meme:
     def __init__(self, user_id, image_url, caption="", tags=None, cloudinary_public_id=None):
@@ -29,10 +90,27 @@ class Meme:
         }
     
     @staticmethod
-    def get_feed_for_user(user_id, limit=10, skip=0):
+    def get_feed_for_user(user_id, limit=10, skip=0, before=None, ranked=False):
         """
         Get a personalized feed of memes for a user.
         This includes memes from users they follow and possibly popular memes.
+        
+        Users following many accounts are served by a bucketed k-way merge
+        (see services.feed_service) instead of one large $in query. Pages
+        that run past the hot tier continue from the archived memes.
+        
+        In ranked mode the newest RANKED_FEED_WINDOW memes are scored by
+        services.ranking_service and paged with skip; before is ignored.
+        
+        Args:
+            user_id (str): The ID of the viewing user
+            limit (int): Maximum number of memes to return
+            skip (int): Number of memes to skip
+            before (datetime, optional): Only return memes created before this time
+            ranked (bool): Rank by affinity, recency and engagement instead of time
+            
+        Returns:
+            list: Memes sorted newest first
         """
         from models.user import User  # Import here to avoid circular imports
         
@@ -40,69 +118,177 @@ class Meme:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        # Get list of users that the current user follows
+        # Get list of users that the current user follows, plus the user's own memes
         following_ids = User.get_following_ids(user_id)
+        author_ids = following_ids + [user_id]
         
         # Log for debugging
-        print(f"Found {len(following_ids)} following IDs: {following_ids}")
+        print(f"Found {len(following_ids)} following IDs")
         
-        # Get MongoDB connection
+        # Get MongoDB connection; memes are read as raw BSON and decoded once, on output
         db = get_db()
+        if ranked:
+            candidates = Meme._read_feed_page(raw_collection(db, 'memes'), author_ids,
+                                              current_app.config['RANKED_FEED_WINDOW'], 0, None,
+                                              meme_projection('card', user_id))
+            order = rank_candidates(candidates, get_affinity(db, user_id))
+            memes, archived_liked = [candidates[i] for i in order[skip:skip + limit]], {}
+        else:
+            memes, archived_liked = Meme._read_tiered_page(db, author_ids, user_id, limit, skip, before)
+        memes = [MemeRecord(meme) for meme in memes]
         
-        # Query for memes from followed users and the user's own memes
-        query = {
-            "$or": [
-                {"user_id": {"$in": following_ids}},  # Memes from followed users
-                {"user_id": user_id}                 # User's own memes
-            ]
+        # Log for debugging
+        print(f"Found {len(memes)} memes for feed")
+        
+        # Fetch the recent comments for every meme on the page in one query;
+        # $topN keeps only three per meme in memory however many a meme has
+        recent_by_meme = {
+            group['_id']: group['comments']
+            for group in db.comments.aggregate([
+                {'$match': {'meme_id': {'$in': [meme['_id'] for meme in memes]}}},
+                {'$group': {'_id': '$meme_id', 'comments': {
+                    '$topN': {'n': 3, 'sortBy': {'created_at': -1}, 'output': '$$ROOT'}
+                }}}
+            ])
         }
         
-        # Log for debugging
-        print(f"Executing meme query: {query}")
+        # Enrich memes with user info and comment info
+        # (is_liked, likes_count and comments_count come from the card projection)
+        feed = []
+        for record in memes:
+            meme = record.to_dict()
+            if meme['_id'] in archived_liked:
+                meme['is_liked'] = archived_liked[meme['_id']]
+            feed.append(meme)
+        
+        # Authors come from the embedded snapshots; only older documents need a users query
+        recent_comments = [comment for comments in recent_by_meme.values() for comment in comments]
+        Meme.attach_authors(feed + recent_comments)
+        
+        for meme in feed:
+            meme['recent_comments'] = recent_by_meme.get(meme['_id'], [])
+        
+        return feed
+    
+    @staticmethod
+    def attach_authors(docs):
+        """
+        Set 'user' on memes or comments from their embedded author snapshots.
         
-        # Get memes, sort by creation date (newest first)
-        memes = list(db.memes.find(query)
-                    .sort("created_at", -1)
-                    .skip(skip)
-                    .limit(limit))
+        Documents written before snapshots existed fall back to the users
+        loader, batched into one query.
         
-        # Log for debugging
-        print(f"Found {len(memes)} memes for feed")
+        Args:
+            docs (list): Meme or comment dicts with user_id (and usually author)
+        """
+        from models.user import User  # Import here to avoid circular imports
         
-        # Enrich memes with user info and comment info
-        for meme in memes:
-            # Add user info
-            meme_user = User.find_by_id(str(meme['user_id']))
-            if meme_user:
-                meme['user'] = {
-                    '_id': meme_user['_id'],
-                    'username': meme_user['username'],
-                    'profile_pic': meme_user.get('profile_pic')
-                }
-            
-            # Add if the current user has liked this meme
-            meme['is_liked'] = user_id in [ObjectId(like_id) if isinstance(like_id, str) else like_id for like_id in meme.get('likes', [])]
-            
-            # Get recent comments
-            recent_comments = list(db.comments.find({'meme_id': meme['_id']})
-                                .sort('created_at', -1)
-                                .limit(3))
+        missing = [doc for doc in docs if doc.get('author') is None]
+        User.prime([doc['user_id'] for doc in missing])
+        for doc in docs:
+            user = author_view(doc)
+            if user is None:
+                user = User.find_by_id(str(doc['user_id']), profile='card')
+                if user is not None:
+                    user = {'_id': user['_id'], 'username': user['username'], 'profile_pic': user.get('profile_pic')}
+            doc.pop('author', None)
+            if user is not None:
+                doc['user'] = user
+    
+    @staticmethod
+    def _read_tiered_page(db, author_ids, viewer_id, limit, skip=0, before=None, hot_page=None):
+        """
+        Read a page of the authors' memes, continuing from the hot into the cold tier.
+        
+        Args:
+            db (Database): The MongoDB database handle
+            author_ids (list): ObjectIds of the authors
+            viewer_id (ObjectId): The viewing user, for is_liked
+            limit (int): Maximum number of memes
+            skip (int): Number of memes to skip
+            before (datetime, optional): Only memes created before this time
+            hot_page (list, optional): The hot part of the page, when already fetched
             
-            # Add user info to comments
-            for comment in recent_comments:
-                comment_user = User.find_by_id(str(comment['user_id']))
-                if comment_user:
-                    comment['user'] = {
-                        '_id': comment_user['_id'],
-                        'username': comment_user['username'],
-                        'profile_pic': comment_user.get('profile_pic')
-                    }
+        Returns:
+            tuple: (memes newest first, {archived meme _id: is_liked})
+        """
+        memes = hot_page
+        if memes is None:
+            memes = Meme._read_feed_page(raw_collection(db, 'memes'), author_ids, limit, skip, before,
+                                         meme_projection('card', viewer_id))
+        if len(memes) >= limit:
+            return memes, {}
+        
+        # The hot tier ran out; continue the page from the cold tier
+        if memes:
+            cold_skip, cold_before = 0, memes[-1]['created_at']
+        else:
+            cold_skip, cold_before = skip, before
+            if skip:
+                query = {"user_id": {"$in": author_ids}, "deleted_at": None}
+                if before is not None:
+                    query["created_at"] = {"$lt": before}
+                cold_skip = max(0, skip - db.memes.count_documents(query))
+        
+        hot_ids = {meme['_id'] for meme in memes}
+        archived = [meme for meme in Meme._read_feed_page(
+            raw_collection(db, ARCHIVE_COLLECTION), author_ids, limit - len(memes), cold_skip,
+            cold_before, meme_projection('card', archived=True)) if meme['_id'] not in hot_ids]
+        
+        # is_liked for archived memes comes from the likes collection, in one query
+        archived_liked = {meme['_id']: False for meme in archived}
+        if archived_liked and viewer_id is not None:
+            for like in db.likes.find({'meme_id': {'$in': list(archived_liked)}, 'user_id': viewer_id},
+                                      {'_id': 0, 'meme_id': 1}):
+                archived_liked[like['meme_id']] = True
+        return memes + archived, archived_liked
+    
+    @staticmethod
+    def get_user_memes(user_id, limit=10, skip=0, before=None, viewer_id=None, hot_page=None):
+        """
+        Get the memes posted by a user, newest first.
+        
+        Args:
+            user_id (str): The author's user ID
+            limit (int): Maximum number of memes to return
+            skip (int): Number of memes to skip
+            before (datetime, optional): Cursor; only memes created before this time
+            viewer_id (str, optional): The viewing user, adds is_liked
+            hot_page (list, optional): The hot part of the page, when already fetched
             
-            meme['recent_comments'] = recent_comments
-            meme['comments_count'] = db.comments.count_documents({'meme_id': meme['_id']})
-            meme['likes_count'] = len(meme.get('likes', []))
+        Returns:
+            list: Meme cards (counts, is_liked) without comments
+        """
+        user_id = ObjectId(user_id)
+        viewer_id = ObjectId(viewer_id) if viewer_id is not None else None
         
-        return memes
+        db = get_db()
+        memes, archived_liked = Meme._read_tiered_page(db, [user_id], viewer_id, limit, skip, before, hot_page)
+        
+        page = []
+        for meme in memes:
+            meme = MemeRecord(meme).to_dict() if not isinstance(meme, dict) else meme
+            if meme['_id'] in archived_liked and viewer_id is not None:
+                meme['is_liked'] = archived_liked[meme['_id']]
+            page.append(meme)
+        return page
+    
+    @staticmethod
+    def _read_feed_page(collection, author_ids, limit, skip, before, projection):
+        """Read one page of the authors' memes, newest first, from a hot or cold collection."""
+        if len(author_ids) > current_app.config['FEED_MERGE_THRESHOLD']:
+            return merge_feed(collection, author_ids, limit, skip, before, projection,
+                              bucket_size=current_app.config['FEED_MERGE_BUCKET_SIZE'])
+        
+        query = {"user_id": {"$in": author_ids}, "deleted_at": None}
+        if before is not None:
+            query["created_at"] = {"$lt": before}
+        
+        # Get memes, sort by creation date (newest first)
+        return list(collection.find(query, projection)
+                    .sort([("created_at", -1), ("_id", -1)])
+                    .skip(skip)
+                    .limit(limit))
         
     @staticmethod
     def create(user_id, image_url, caption="", tags=None, cloudinary_public_id=None):
@@ -110,9 +296,14 @@ class Meme:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
+        # Embed the author's snapshot so reads need no user lookup
+        from models.user import User
+        author = User.find_by_id(user_id, profile='card')
+        
         # Create meme document
         meme_data = {
             "user_id": user_id,
+            "author": author_snapshot(author) if author else None,
             "image_url": image_url,
             "caption": caption,
             "tags": tags or [],
@@ -135,22 +326,129 @@ class Meme:
         return meme_data
     
     @staticmethod
-    def find_by_id(meme_id):
+    def find_by_id(meme_id, profile=None, viewer_id=None):
         """
         Find a meme by its ID.
         
         Args:
             meme_id (str): The ID of the meme to find
+            profile (str, optional): Projection profile ('exists', 'owner', 'card' or 'detail');
+                the full document is returned when omitted
+            viewer_id (str, optional): The viewing user, adds is_liked to card/detail views
             
         Returns:
             dict: The meme document or None if not found
         """
         if isinstance(meme_id, str):
             meme_id = ObjectId(meme_id)
+        if isinstance(viewer_id, str):
+            viewer_id = ObjectId(viewer_id)
+        
+        projection = meme_projection(profile, viewer_id) if profile else None
+        
+        # Memoized per request, so repeated lookups of a meme hit the database once
+        loader = get_loader('memes', (profile, viewer_id), projection, {"deleted_at": None})
+        meme = loader.load(meme_id)
+        if meme is None:
+            meme = Meme._find_archived(meme_id, profile, viewer_id)
+        return meme
+    
+    @staticmethod
+    def _find_archived(meme_id, profile=None, viewer_id=None):
+        """Look a meme up in the cold tier, the fallback for find_by_id."""
+        projection = meme_projection(profile, archived=True) if profile else None
+        loader = get_loader(ARCHIVE_COLLECTION, profile, projection, {"deleted_at": None})
+        meme = loader.load(meme_id)
+        if meme is not None and viewer_id is not None and profile in ('card', 'detail'):
+            db = get_db()
+            meme['is_liked'] = db.likes.find_one({'meme_id': meme_id, 'user_id': viewer_id}, {'_id': 1}) is not None
+        return meme
+    
+    @staticmethod
+    def _is_archived(meme_id):
+        """Check whether a meme lives in the cold tier (memoized alongside exists())."""
+        hot = get_loader('memes', ('exists', None), meme_projection('exists'), {"deleted_at": None})
+        return hot.load(meme_id) is None and Meme._find_archived(meme_id, 'exists') is not None
+    
+    @staticmethod
+    def exists(meme_id):
+        """
+        Check whether a meme exists using a covered _id index lookup.
+        
+        Args:
+            meme_id (str): The ID of the meme
             
-        db = get_db()
-        return db.memes.find_one({"_id": meme_id})
+        Returns:
+            bool: True if the meme exists
+        """
+        return Meme.find_by_id(meme_id, profile='exists') is not None
 
+    @staticmethod
+    def update(meme_id, user_id, updates):
+        """
+        Update a meme owned by the given user.
+        
+        Args:
+            meme_id (str): The ID of the meme to update
+            user_id (str): The ID of the user making the change
+            updates (dict): The updates to apply
+            
+        Returns:
+            dict: The updated meme, or None if not found or not owned by the user
+        """
+        allowed_fields = ['caption', 'tags']
+        update_data = {k: v for k, v in (updates or {}).items() if k in allowed_fields}
+        update_data['updated_at'] = datetime.utcnow()
+        
+        db = get_db()
+        query = {"_id": ObjectId(meme_id), "user_id": ObjectId(user_id), "deleted_at": None}
+        clear_loaders('memes', ObjectId(meme_id))
+        meme = db.memes.find_one_and_update(
+            query,
+            {"$set": update_data},
+            projection=meme_projection('card'),
+            return_document=ReturnDocument.AFTER
+        )
+        if meme is None:
+            clear_loaders(ARCHIVE_COLLECTION, ObjectId(meme_id))
+            meme = db[ARCHIVE_COLLECTION].find_one_and_update(
+                query,
+                {"$set": update_data},
+                projection=meme_projection('card', archived=True),
+                return_document=ReturnDocument.AFTER
+            )
+        return meme
+    
+    @staticmethod
+    def delete(meme_id, user_id):
+        """
+        Delete a meme owned by the given user.
+        
+        The meme is soft-deleted so it disappears immediately; its likes,
+        comments and image are removed by the background cleanup worker.
+        
+        Args:
+            meme_id (str): The ID of the meme to delete
+            user_id (str): The ID of the user attempting to delete
+            
+        Returns:
+            bool: True if the meme was found and deleted
+        """
+        db = get_db()
+        query = {"_id": ObjectId(meme_id), "user_id": ObjectId(user_id), "deleted_at": None}
+        result = db.memes.update_one(query, {"$currentDate": {"deleted_at": True}})
+        if result.modified_count == 0:
+            result = db[ARCHIVE_COLLECTION].update_one(query, {"$currentDate": {"deleted_at": True}})
+            if result.modified_count == 0:
+                return False
+            clear_loaders(ARCHIVE_COLLECTION, ObjectId(meme_id))
+        clear_loaders('memes', ObjectId(meme_id))
+        
+        worker = get_cleanup_worker()
+        if worker is not None:
+            worker.wake()
+        return True
+    
     @staticmethod
     def like(meme_id, user_id):
         """
@@ -168,18 +466,37 @@ class Meme:
             meme_id = ObjectId(meme_id)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
+        
+        if Meme._is_archived(meme_id):
+            liked = Meme._set_archived_like(meme_id, user_id, True)
+        else:
+            liked = Meme._add_like(meme_id, user_id)
+        
+        if liked:
+            Meme._notify_owner(meme_id, user_id, 'like')
+        return liked
+    
+    @staticmethod
+    def _add_like(meme_id, user_id):
+        """Add a like to a hot meme, through the write buffer when it is enabled."""
+        clear_loaders('memes', meme_id)
+        
+        # Coalesce with concurrent likes when the write buffer is enabled
+        buffer = get_like_buffer()
+        if buffer is not None:
+            return buffer.like(meme_id, user_id)
             
         db = get_db()
         print(f"Database connected: {db is not None}")
 
-        meme_exists = db.memes.find_one({"_id": meme_id})
+        meme_exists = db.memes.find_one({"_id": meme_id}, meme_projection('exists'))
         print(f"Meme exists: {meme_exists is not None}")
         
         # Check if already liked
         meme = db.memes.find_one({
             "_id": meme_id,
             "likes": user_id
-        })
+        }, meme_projection('exists'))
         
         if meme:
             return False  # Already liked
@@ -208,6 +525,26 @@ class Meme:
             meme_id = ObjectId(meme_id)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
+        
+        if Meme._is_archived(meme_id):
+            unliked = Meme._set_archived_like(meme_id, user_id, False)
+        else:
+            unliked = Meme._remove_like(meme_id, user_id)
+        
+        if unliked:
+            meme = Meme.find_by_id(meme_id, profile='owner')
+            if meme:
+                record_event(meme['user_id'], 'likes', meme_id, -1)
+        return unliked
+    
+    @staticmethod
+    def _remove_like(meme_id, user_id):
+        """Remove a like from a hot meme, through the write buffer when it is enabled."""
+        clear_loaders('memes', meme_id)
+        
+        buffer = get_like_buffer()
+        if buffer is not None:
+            return buffer.unlike(meme_id, user_id)
             
         db = get_db()
         
@@ -218,6 +555,35 @@ class Meme:
         )
         
         return result.modified_count > 0
+    
+    @staticmethod
+    def _set_archived_like(meme_id, user_id, liked):
+        """
+        Like or unlike an archived meme, whose likes live in the likes collection.
+        
+        Returns:
+            bool: True if the like state changed
+        """
+        db = get_db()
+        clear_loaders(ARCHIVE_COLLECTION, meme_id)
+        like = {'meme_id': meme_id, 'user_id': user_id}
+        if liked:
+            result = db.likes.update_one(like, {'$setOnInsert': {'created_at': datetime.utcnow()}}, upsert=True)
+            changed = result.upserted_id is not None
+        else:
+            changed = db.likes.delete_one(like).deleted_count > 0
+        
+        if changed:
+            db[ARCHIVE_COLLECTION].update_one({'_id': meme_id}, {'$inc': {'likes_count': 1 if liked else -1}})
+        return changed
+    
+    @staticmethod
+    def _notify_owner(meme_id, actor_id, notification_type, preview=None):
+        """Add an event to the inbox and the analytics rollups of the meme's author."""
+        meme = Meme.find_by_id(meme_id, profile='owner')
+        if meme:
+            Notification.record(meme['user_id'], notification_type, actor_id, meme_id, preview)
+            record_event(meme['user_id'], ANALYTICS_METRICS[notification_type], meme_id)
         
     @staticmethod
     def add_comment(meme_id, user_id, text):
@@ -240,31 +606,36 @@ class Meme:
         if not isinstance(user_id, ObjectId):
             user_id = ObjectId(user_id)
         
+        # Embed the author's snapshot so reads need no user lookup
+        from models.user import User
+        author = User.get_by_id(user_id, profile='card')
+        
         # Create comment object
         comment = {
             "_id": ObjectId(),
             "meme_id": meme_id,
             "user_id": user_id,
+            "author": author_snapshot(author) if author else None,
             "text": text,
             "created_at": datetime.utcnow()
         }
         
         # Add comment to meme
-        db.memes.update_one(
+        clear_loaders('memes', meme_id)
+        result = db.memes.update_one(
             {"_id": meme_id},
             {"$push": {"comments": comment}}
         )
+        if result.matched_count == 0:
+            clear_loaders(ARCHIVE_COLLECTION, meme_id)
+            db[ARCHIVE_COLLECTION].update_one(
+                {"_id": meme_id},
+                {"$push": {"comments": comment}, "$inc": {"comments_count": 1}}
+            )
+        Meme._notify_owner(meme_id, user_id, 'comment', text)
         
-        # Get user info for the comment
-        from models.user import User
-        user = User.get_by_id(user_id)
-        if user:
-            # Add user info to the returned comment
-            comment["user"] = {
-                "_id": user["_id"],
-                "username": user["username"],
-                "profile_picture": user.get("profile_picture")
-            }
+        # Add user info to the returned comment
+        Meme.attach_authors([comment])
         
         # Convert ObjectIds to strings for JSON serialization
         comment["_id"] = str(comment["_id"])
@@ -297,32 +668,25 @@ class Meme:
         if not isinstance(meme_id, ObjectId):
             meme_id = ObjectId(meme_id)
         
-        # Find the meme
-        meme = db.memes.find_one({"_id": meme_id})
+        # Find the meme; embedded comments stay raw BSON until they are on the page
+        meme = raw_collection(db, 'memes').find_one({"_id": meme_id, "deleted_at": None}, {"comments": 1})
+        if meme is None:
+            meme = raw_collection(db, ARCHIVE_COLLECTION).find_one({"_id": meme_id, "deleted_at": None}, {"comments": 1})
         
         if not meme or "comments" not in meme:
             return []
         
         # Sort comments by creation date (newest first) and apply pagination
         comments = sorted(
-            meme["comments"], 
+            (CommentRecord(comment) for comment in meme["comments"]),
             key=lambda x: x.get("created_at", datetime.min), 
             reverse=True
         )[skip:skip+limit]
+        comments = [comment.to_dict() for comment in comments]
         
-        # Get user information for each comment
-        from models.user import User
+        # Get user information for each comment from its author snapshot
+        Meme.attach_authors([comment for comment in comments if comment.get("user_id")])
         for comment in comments:
-            user_id = comment.get("user_id")
-            if user_id:
-                user = User.get_by_id(user_id)
-                if user:
-                    comment["user"] = {
-                        "_id": user["_id"],
-                        "username": user["username"],
-                        "profile_picture": user.get("profile_picture")
-                    }
-            
             # Convert ObjectIds to strings for JSON serialization
             comment["_id"] = str(comment["_id"])
             comment["meme_id"] = str(comment["meme_id"])
@@ -354,24 +718,38 @@ class Meme:
         if not isinstance(user_id, ObjectId):
             user_id = ObjectId(user_id)
         
-        # Find and remove the comment
-        result = db.memes.update_one(
-            {
-                "comments": {
-                    "$elemMatch": {
-                        "_id": comment_id,
-                        "user_id": user_id  # Ensure the user owns this comment
-                    }
+        # Find and remove the comment (the owning meme is unknown, so drop all cached memes)
+        clear_loaders('memes')
+        query = {
+            "comments": {
+                "$elemMatch": {
+                    "_id": comment_id,
+                    "user_id": user_id  # Ensure the user owns this comment
                 }
-            },
+            }
+        }
+        # The query only matches while the comment is there, so a returned meme means it was removed
+        meme = db.memes.find_one_and_update(
+            query,
             {
                 "$pull": {
                     "comments": {
                         "_id": comment_id
                     }
                 }
-            }
+            },
+            projection={"user_id": 1}
         )
-        
-        # Return True if the comment was found and deleted
-        return result.modified_count > 0
\ No newline at end of file
+        if meme is None:
+            clear_loaders(ARCHIVE_COLLECTION)
+            meme = db[ARCHIVE_COLLECTION].find_one_and_update(
+                query,
+                {"$pull": {"comments": {"_id": comment_id}}, "$inc": {"comments_count": -1}},
+                projection={"user_id": 1}
+            )
+        if meme is None:
+            return False
+        
+        # Take the comment back out of the author's analytics rollups
+        record_event(meme["user_id"], 'comments', meme["_id"], -1)
+        return True
\ No newline at end of file
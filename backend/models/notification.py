@@ -0,0 +1,176 @@
+import datetime
+from collections import Counter
+from bson import ObjectId
+from flask import current_app
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from services.mongodb_service import get_db
+
+# Notification types; likes and comments are grouped per meme, follows per recipient
+NOTIFICATION_TYPES = ('like', 'comment', 'follow')
+
+class Notification:
+    """
+    Per-user notification inbox, coalesced at write time.
+
+    Every event joins the recipient's open (unread) group for the same type
+    and meme, so a viral meme produces one "X and 41 others liked your meme"
+    entry instead of thousands. Groups keep only the most recent actors plus
+    a count of distinct actors, and the unread count is a counter maintained
+    as groups are opened and read, so reading the inbox never scans events.
+    An actor who acts again becomes the most recent actor instead of being
+    counted twice (only once they have dropped out of the kept actors can
+    they be counted again).
+    """
+
+    @staticmethod
+    def record(recipient_id, notification_type, actor_id, meme_id=None, preview=None):
+        """
+        Record one event in the recipient's inbox.
+
+        Args:
+            recipient_id (str or ObjectId): The user being notified
+            notification_type (str): One of NOTIFICATION_TYPES
+            actor_id (str or ObjectId): The user who acted
+            meme_id (str or ObjectId, optional): The meme acted on
+            preview (str, optional): Short text shown with the group (e.g. a comment)
+        """
+        Notification.record_many([(recipient_id, notification_type, actor_id, meme_id, preview)])
+
+    @staticmethod
+    def record_many(events):
+        """
+        Record several events with one bulk write.
+
+        Args:
+            events (list): (recipient_id, notification_type, actor_id, meme_id, preview) tuples
+        """
+        now = datetime.datetime.utcnow()
+        max_actors = current_app.config['NOTIFICATION_MAX_ACTORS']
+        operations = []
+        recipients = []
+        for recipient_id, notification_type, actor_id, meme_id, preview in events:
+            recipient_id, actor_id = ObjectId(recipient_id), ObjectId(actor_id)
+            if recipient_id == actor_id:
+                continue  # No notifications for acting on your own content
+            meme_id = ObjectId(meme_id) if meme_id is not None else None
+
+            # A pipeline update, so the new-actor check sees the actors before this event
+            actors = {'$ifNull': ['$actors', []]}
+            fields = {
+                'actor_count': {'$add': [
+                    {'$ifNull': ['$actor_count', 0]},
+                    {'$cond': [{'$in': [actor_id, actors]}, 0, 1]}
+                ]},
+                'actors': {'$slice': [{'$concatArrays': [
+                    {'$filter': {'input': actors, 'cond': {'$ne': ['$$this', actor_id]}}},
+                    [actor_id]
+                ]}, -max_actors]},
+                'updated_at': now,
+                'created_at': {'$ifNull': ['$created_at', now]}
+            }
+            if preview is not None:
+                fields['preview'] = {'$literal': preview[:140]}
+            update = [{'$set': fields}]
+            operations.append(UpdateOne(
+                {'recipient_id': recipient_id, 'type': notification_type, 'meme_id': meme_id, 'read': False},
+                update,
+                upsert=True
+            ))
+            recipients.append(recipient_id)
+        if not operations:
+            return
+
+        db = get_db()
+        opened = Counter()
+        # Concurrent upserts of the same new group race on the unique open-group
+        # index; the loser is retried once and then joins the winner's group
+        for attempt in range(2):
+            try:
+                result = db.notifications.bulk_write(operations, ordered=False)
+                upserted = result.upserted_ids
+                retry = []
+            except BulkWriteError as e:
+                upserted = {item['index']: item['_id'] for item in e.details.get('upserted', [])}
+                retry = [error['index'] for error in e.details['writeErrors'] if error['code'] == 11000]
+                if len(retry) != len(e.details['writeErrors']) or attempt == 1:
+                    raise
+            opened.update(recipients[index] for index in upserted)
+            if not retry:
+                break
+            operations = [operations[index] for index in retry]
+            recipients = [recipients[index] for index in retry]
+
+        if opened:
+            db.notification_counts.bulk_write([
+                UpdateOne({'_id': recipient_id}, {'$inc': {'unread': count}}, upsert=True)
+                for recipient_id, count in opened.items()
+            ], ordered=False)
+
+    @staticmethod
+    def get_inbox(user_id, limit=20, before=None):
+        """
+        Get a page of a user's notifications, newest group first.
+
+        Pages are keyed on the group's _id, which never changes, so a group
+        that gains events while the user pages is neither skipped nor repeated.
+
+        Args:
+            user_id (str): The user ID
+            limit (int): Maximum number of notifications
+            before (str or ObjectId, optional): Cursor; only groups opened before this one
+
+        Returns:
+            list: Notification group documents
+        """
+        query = {'recipient_id': ObjectId(user_id)}
+        if before is not None:
+            query['_id'] = {'$lt': ObjectId(before)}
+
+        db = get_db()
+        return list(db.notifications.find(query, {'recipient_id': 0})
+                    .sort('_id', -1)
+                    .limit(limit))
+
+    @staticmethod
+    def unread_count(user_id):
+        """
+        Get the number of unread notification groups.
+
+        Args:
+            user_id (str): The user ID
+
+        Returns:
+            int: Unread groups
+        """
+        db = get_db()
+        counts = db.notification_counts.find_one({'_id': ObjectId(user_id)})
+        return max(0, counts['unread']) if counts else 0
+
+    @staticmethod
+    def mark_read(user_id, notification_ids=None):
+        """
+        Mark notifications as read; later events then open a fresh group.
+
+        Args:
+            user_id (str): The user ID
+            notification_ids (list, optional): The groups to mark; all when omitted
+
+        Returns:
+            int: Number of groups that changed from unread to read
+        """
+        query = {'recipient_id': ObjectId(user_id), 'read': False}
+        if notification_ids is not None:
+            query['_id'] = {'$in': [ObjectId(_id) for _id in notification_ids]}
+
+        db = get_db()
+        result = db.notifications.update_many(
+            query,
+            {'$set': {'read': True, 'read_at': datetime.datetime.utcnow()}}
+        )
+        if result.modified_count:
+            db.notification_counts.update_one(
+                {'_id': ObjectId(user_id)},
+                {'$inc': {'unread': -result.modified_count}}
+            )
+        return result.modified_count
@@ -0,0 +1,89 @@
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+# Codec that leaves documents as undecoded BSON bytes until a field is read
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument, tz_aware=False)
+
+def raw_collection(db, name):
+    """
+    Return a collection whose reads produce RawBSONDocument instances.
+
+    Args:
+        db (Database): The MongoDB database handle
+        name (str): The collection name
+
+    Returns:
+        Collection: The collection with the raw codec applied
+    """
+    return db.get_collection(name, codec_options=RAW_CODEC_OPTIONS)
+
+def _plain(value):
+    """Recursively turn raw embedded documents into plain dicts and lists."""
+    if isinstance(value, RawBSONDocument):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+class Record:
+    """
+    Read-only view over a document fetched with the raw codec.
+
+    Records hold nothing but the raw BSON, so building one is just a
+    pointer copy; the document is only decoded when a field is read, and
+    embedded documents (e.g. comments) stay raw until they are touched.
+    """
+    __slots__ = ('_doc',)
+
+    # Field names exposed as attributes; subclasses list their own
+    FIELDS = ('_id',)
+
+    def __init__(self, doc):
+        self._doc = doc
+
+    def __getattr__(self, name):
+        if name in type(self).FIELDS:
+            return self._doc.get(name)
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        return self._doc[key]
+
+    def __contains__(self, key):
+        return key in self._doc
+
+    def get(self, key, default=None):
+        return self._doc.get(key, default)
+
+    def to_dict(self):
+        """
+        Decode the record into a plain, mutable dict.
+
+        Returns:
+            dict: Every field present in the fetched document
+        """
+        return {key: _plain(value) for key, value in self._doc.items()}
+
+    @classmethod
+    def wrap_all(cls, cursor):
+        """Wrap every document from a raw cursor without decoding it."""
+        return [cls(doc) for doc in cursor]
+
+    @classmethod
+    def wrap_iter(cls, cursor):
+        """Wrap documents from a raw cursor lazily, as the caller reads them."""
+        return (cls(doc) for doc in cursor)
+
+class MemeRecord(Record):
+    __slots__ = ()
+    FIELDS = ('_id', 'user_id', 'author', 'image_url', 'caption', 'tags', 'cloudinary_public_id',
+              'likes', 'comments', 'likes_count', 'comments_count', 'is_liked',
+              'created_at', 'updated_at', 'deleted_at')
+
+class UserRecord(Record):
+    __slots__ = ()
+    FIELDS = ('_id', 'username', 'email', 'profile_pic', 'bio', 'created_at', 'updated_at')
+
+class CommentRecord(Record):
+    __slots__ = ()
+    FIELDS = ('_id', 'meme_id', 'user_id', 'author', 'text', 'created_at')
@@ -1,8 +1,29 @@
 import datetime
 from bson import ObjectId
+from flask import current_app
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from services.mongodb_service import get_db
+from services.graph_service import get_follow_graph
+from services.suggestion_service import compute_suggestions, get_suggestion_refresher
+from services.cleanup_service import get_cleanup_worker
+from services.archive_service import ARCHIVE_COLLECTION
+from services.loader_service import get_loader, clear_loaders
+from services.analytics_service import record_event
+from services.author_service import SNAPSHOT_FIELDS, schedule_propagation
+from models.records import UserRecord, raw_collection
+from models.notification import Notification
 from utils.auth_utils import hash_password
 
+# Projection profiles for the different read paths
+USER_PROJECTIONS = {
+    'exists': {'_id': 1},                                   # existence checks
+    'card': {'username': 1, 'profile_pic': 1},              # author info on memes and comments
+    'profile': {'password': 0},                             # public profile, never the hash
+    'auth': {'username': 1, 'email': 1, 'password': 1,      # login, includes the hash
+             'profile_pic': 1, 'bio': 1, 'deleted_at': 1},
+}
+
 class User:
     @staticmethod
     def create(username, email, password):
@@ -35,52 +56,78 @@ class User:
         return user
     
     @staticmethod
-    def find_by_id(user_id):
+    def find_by_id(user_id, profile='profile'):
         """
         Find a user by ID.
         
         Args:
             user_id (str): The user ID
+            profile (str): Projection profile from USER_PROJECTIONS
             
         Returns:
             dict: The user document (without password)
         """
-        db = get_db()
-        user = db.users.find_one({'_id': ObjectId(user_id)})
-        if user:
-            del user['password']
-        return user
+        return User._loader(profile).load(ObjectId(user_id))
+    
+    @staticmethod
+    def _loader(profile):
+        """Return the request-scoped batching loader for a projection profile."""
+        return get_loader('users', profile, USER_PROJECTIONS[profile], {'deleted_at': None})
+    
+    @staticmethod
+    def prime(user_ids, profile='card'):
+        """
+        Queue users to be fetched together with the next lookup in this request.
+        
+        Args:
+            user_ids (list): The user IDs that will be looked up
+            profile (str): Projection profile from USER_PROJECTIONS
+        """
+        User._loader(profile).prime(ObjectId(user_id) for user_id in user_ids)
+    
+    @staticmethod
+    def find_many(user_ids, profile='card'):
+        """
+        Find several users with at most one query.
+        
+        Args:
+            user_ids (list): The user IDs
+            profile (str): Projection profile from USER_PROJECTIONS
+            
+        Returns:
+            list: User documents (None where not found), aligned with user_ids
+        """
+        return User._loader(profile).load_many([ObjectId(user_id) for user_id in user_ids])
     
     @staticmethod
-    def find_by_email(email):
+    def find_by_email(email, profile='auth'):
         """
         Find a user by email.
         
         Args:
             email (str): The email address
+            profile (str): Projection profile from USER_PROJECTIONS
             
         Returns:
             dict: The user document (with password for auth)
         """
         db = get_db()
-        return db.users.find_one({'email': email})
+        return db.users.find_one({'email': email}, USER_PROJECTIONS[profile])
     
     @staticmethod
-    def find_by_username(username):
+    def find_by_username(username, profile='profile'):
         """
         Find a user by username.
         
         Args:
             username (str): The username
+            profile (str): Projection profile from USER_PROJECTIONS
             
         Returns:
             dict: The user document (without password)
         """
         db = get_db()
-        user = db.users.find_one({'username': username})
-        if user:
-            del user['password']
-        return user
+        return db.users.find_one({'username': username}, USER_PROJECTIONS[profile])
     
     @staticmethod
     def search(query, limit=10, skip=0):
@@ -97,11 +144,12 @@ class User:
         """
         db = get_db()
         users = list(db.users.find({
+            'deleted_at': None,
             '$or': [
                 {'username': {'$regex': query, '$options': 'i'}},
                 {'email': {'$regex': query, '$options': 'i'}}
             ]
-        }, {'password': 0}).skip(skip).limit(limit))
+        }, USER_PROJECTIONS['profile']).skip(skip).limit(limit))
         
         return users
     
@@ -124,9 +172,16 @@ class User:
                 'following_id': ObjectId(following_id),
                 'created_at': datetime.datetime.utcnow()
             })
-            return True
-        except:
+        except DuplicateKeyError:
             return False
+        
+        graph = get_follow_graph()
+        if graph is not None:
+            graph.add_edge(follower_id, following_id)
+        User._follows_changed(follower_id, graph)
+        Notification.record(following_id, 'follow', follower_id)
+        record_event(following_id, 'new_followers')
+        return True
     
     @staticmethod
     def unfollow(follower_id, following_id):
@@ -145,7 +200,145 @@ class User:
             'follower_id': ObjectId(follower_id),
             'following_id': ObjectId(following_id)
         })
-        return result.deleted_count > 0
+        if result.deleted_count == 0:
+            return False
+        
+        graph = get_follow_graph()
+        if graph is not None:
+            graph.remove_edge(follower_id, following_id)
+        User._follows_changed(follower_id, graph)
+        record_event(following_id, 'lost_followers')
+        return True
+    
+    @staticmethod
+    def follow_many(follower_id, user_ids):
+        """
+        Follow several users with one validation query and one bulk write.
+        
+        Args:
+            follower_id (str): The ID of the follower
+            user_ids (list): The IDs of the users to follow
+            
+        Returns:
+            list: One {'user_id', 'status'} entry per distinct ID, where status is
+                followed, already_following, not_found, invalid, self or failed
+        """
+        results, targets = User._bulk_targets(follower_id, user_ids)
+        if not targets:
+            return list(results.values())
+        
+        db = get_db()
+        now = datetime.datetime.utcnow()
+        requests = [InsertOne({
+            'follower_id': ObjectId(follower_id),
+            'following_id': target,
+            'created_at': now
+        }) for target in targets]
+        
+        failed = {}
+        try:
+            db.follows.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: every insert was attempted, errors point back by index
+            for error in e.details['writeErrors']:
+                failed[targets[error['index']]] = \
+                    'already_following' if error['code'] == 11000 else 'failed'
+        
+        followed = []
+        for target in targets:
+            status = failed.get(target, 'followed')
+            results[str(target)]['status'] = status
+            if status == 'followed':
+                followed.append(target)
+        
+        if followed:
+            graph = get_follow_graph()
+            if graph is not None:
+                graph.add_edges(follower_id, followed)
+            User._follows_changed(follower_id, graph)
+            Notification.record_many([(target, 'follow', follower_id, None, None) for target in followed])
+            for target in followed:
+                record_event(target, 'new_followers')
+        return list(results.values())
+    
+    @staticmethod
+    def unfollow_many(follower_id, user_ids):
+        """
+        Unfollow several users with one lookup and one delete.
+        
+        Args:
+            follower_id (str): The ID of the follower
+            user_ids (list): The IDs of the users to unfollow
+            
+        Returns:
+            list: One {'user_id', 'status'} entry per distinct ID, where status is
+                unfollowed, not_following, not_found, invalid or self
+        """
+        results, targets = User._bulk_targets(follower_id, user_ids)
+        if not targets:
+            return list(results.values())
+        
+        db = get_db()
+        query = {'follower_id': ObjectId(follower_id), 'following_id': {'$in': targets}}
+        existing = [follow['following_id'] for follow in db.follows.find(query, {'_id': 0, 'following_id': 1})]
+        if existing:
+            db.follows.delete_many({'follower_id': ObjectId(follower_id), 'following_id': {'$in': existing}})
+        
+        existing_set = set(existing)
+        for target in targets:
+            results[str(target)]['status'] = 'unfollowed' if target in existing_set else 'not_following'
+        
+        if existing:
+            graph = get_follow_graph()
+            if graph is not None:
+                graph.remove_edges(follower_id, existing)
+            User._follows_changed(follower_id, graph)
+            for target in existing:
+                record_event(target, 'lost_followers')
+        return list(results.values())
+    
+    @staticmethod
+    def _bulk_targets(follower_id, user_ids):
+        """
+        Validate the targets of a bulk follow or unfollow with a single $in query.
+        
+        Returns:
+            tuple: (results keyed by ID in request order, ObjectIds of existing users)
+        """
+        results = {}
+        candidates = []
+        for user_id in user_ids:
+            user_id = str(user_id)
+            if user_id in results:
+                continue
+            results[user_id] = {'user_id': user_id, 'status': None}
+            if user_id == str(follower_id):
+                results[user_id]['status'] = 'self'
+            elif not ObjectId.is_valid(user_id):
+                results[user_id]['status'] = 'invalid'
+            else:
+                candidates.append(ObjectId(user_id))
+        
+        found = set()
+        if candidates:
+            db = get_db()
+            found = {user['_id'] for user in db.users.find(
+                {'_id': {'$in': candidates}, 'deleted_at': None}, USER_PROJECTIONS['exists'])}
+        
+        targets = []
+        for candidate in candidates:
+            if candidate in found:
+                targets.append(candidate)
+            else:
+                results[str(candidate)]['status'] = 'not_found'
+        return results, targets
+    
+    @staticmethod
+    def _follows_changed(follower_id, graph=None):
+        """Queue suggestion refreshes after a follow or unfollow."""
+        refresher = get_suggestion_refresher()
+        if refresher is not None:
+            refresher.on_follow_changed(follower_id, graph)
     
     @staticmethod
     def is_following(follower_id, following_id):
@@ -159,6 +352,10 @@ class User:
         Returns:
             bool: True if following
         """
+        graph = get_follow_graph()
+        if graph is not None:
+            return graph.is_following(follower_id, following_id)
+        
         db = get_db()
         follow = db.follows.find_one({
             'follower_id': ObjectId(follower_id),
@@ -166,6 +363,66 @@ class User:
         })
         return follow is not None
     
+    @staticmethod
+    def get_following_status(follower_id, user_ids):
+        """
+        Check which of several users a user is following, in one query.
+        
+        Args:
+            follower_id (str): The ID of the follower
+            user_ids (list): The IDs of the users to check
+            
+        Returns:
+            set: The ObjectIds from user_ids that follower_id follows
+        """
+        user_ids = [ObjectId(user_id) for user_id in user_ids]
+        graph = get_follow_graph()
+        if graph is not None:
+            return {user_id for user_id in user_ids if graph.is_following(follower_id, user_id)}
+        
+        db = get_db()
+        follows = db.follows.find({
+            'follower_id': ObjectId(follower_id),
+            'following_id': {'$in': user_ids}
+        }, {'_id': 0, 'following_id': 1})
+        return {follow['following_id'] for follow in follows}
+    
+    @staticmethod
+    def count_followers(user_id):
+        """
+        Count the followers of a user.
+        
+        Args:
+            user_id (str): The user ID
+            
+        Returns:
+            int: Number of followers
+        """
+        graph = get_follow_graph()
+        if graph is not None:
+            return graph.follower_count(user_id)
+        
+        db = get_db()
+        return db.follows.count_documents({'following_id': ObjectId(user_id)})
+    
+    @staticmethod
+    def count_following(user_id):
+        """
+        Count the users a user is following.
+        
+        Args:
+            user_id (str): The user ID
+            
+        Returns:
+            int: Number of followed users
+        """
+        graph = get_follow_graph()
+        if graph is not None:
+            return graph.following_count(user_id)
+        
+        db = get_db()
+        return db.follows.count_documents({'follower_id': ObjectId(user_id)})
+    
     @staticmethod
     def get_followers(user_id, limit=10, skip=0):
         """
@@ -177,17 +434,19 @@ class User:
             skip (int): Number of results to skip
             
         Returns:
-            list: List of follower user documents
+            iterator: Follower UserRecords, read from the cursor as they are consumed
         """
         db = get_db()
         follows = list(db.follows.find({
             'following_id': ObjectId(user_id)
-        }).skip(skip).limit(limit))
+        }, {'_id': 0, 'follower_id': 1}).skip(skip).limit(limit))
         
+        # Records stay undecoded, and the cursor unread, until the response streams them out
         follower_ids = [follow['follower_id'] for follow in follows]
-        followers = list(db.users.find({
-            '_id': {'$in': follower_ids}
-        }, {'password': 0}))
+        followers = UserRecord.wrap_iter(raw_collection(db, 'users').find({
+            '_id': {'$in': follower_ids},
+            'deleted_at': None
+        }, USER_PROJECTIONS['profile']))
         
         return followers
     
@@ -202,20 +461,114 @@ class User:
             skip (int): Number of results to skip
             
         Returns:
-            list: List of followed user documents
+            iterator: Followed UserRecords, read from the cursor as they are consumed
         """
         db = get_db()
         follows = list(db.follows.find({
             'follower_id': ObjectId(user_id)
-        }).skip(skip).limit(limit))
+        }, {'_id': 0, 'following_id': 1}).skip(skip).limit(limit))
         
+        # Records stay undecoded, and the cursor unread, until the response streams them out
         following_ids = [follow['following_id'] for follow in follows]
-        following = list(db.users.find({
-            '_id': {'$in': following_ids}
-        }, {'password': 0}))
+        following = UserRecord.wrap_iter(raw_collection(db, 'users').find({
+            '_id': {'$in': following_ids},
+            'deleted_at': None
+        }, USER_PROJECTIONS['profile']))
         
         return following
     
+    @staticmethod
+    def get_profile_summary(user_id, viewer_id, limit=12):
+        """
+        Get everything a profile page shows in one aggregation round trip.
+        
+        A $facet over the user document gathers the card, the first page of
+        memes and, unless the in-memory follow graph can answer them, the
+        follow counts and the viewer's relationship flags; each facet is an
+        indexed $lookup.
+        
+        Args:
+            user_id (str): The profile's user ID
+            viewer_id (str): The viewing user
+            limit (int): Size of the first page of memes
+            
+        Returns:
+            dict: {'user': profile with counts and flags, 'memes': first page},
+                or None if the user does not exist
+        """
+        from models.meme import Meme, meme_projection  # Import here to avoid circular imports
+        
+        user_id, viewer_id = ObjectId(user_id), ObjectId(viewer_id)
+        
+        def lookup(collection, pipeline):
+            return [
+                {'$lookup': {'from': collection, 'pipeline': pipeline, 'as': 'result'}},
+                {'$project': {'_id': 0, 'result': 1}}
+            ]
+        
+        def count(collection, match):
+            return lookup(collection, [{'$match': match}, {'$count': 'n'}])
+        
+        def edge(follower_id, following_id):
+            return lookup('follows', [
+                {'$match': {'follower_id': follower_id, 'following_id': following_id}},
+                {'$limit': 1},
+                {'$project': {'_id': 1}}
+            ])
+        
+        facets = {
+            'user': [{'$project': USER_PROJECTIONS['profile']}],
+            'memes': lookup('memes', [
+                {'$match': {'user_id': user_id, 'deleted_at': None}},
+                {'$sort': {'created_at': -1, '_id': -1}},
+                {'$limit': limit},
+                {'$project': meme_projection('card', viewer_id)}
+            ]),
+            'memes_count': count('memes', {'user_id': user_id, 'deleted_at': None}),
+            'archived_memes_count': count(ARCHIVE_COLLECTION, {'user_id': user_id, 'deleted_at': None})
+        }
+        graph = get_follow_graph()
+        if graph is None:
+            facets.update({
+                'followers_count': count('follows', {'following_id': user_id}),
+                'following_count': count('follows', {'follower_id': user_id}),
+                'is_following': edge(viewer_id, user_id),
+                'follows_you': edge(user_id, viewer_id)
+            })
+        
+        db = get_db()
+        result = next(db.users.aggregate([
+            {'$match': {'_id': user_id, 'deleted_at': None}},
+            {'$facet': facets}
+        ]), None)
+        if result is None or not result['user']:
+            return None
+        
+        def facet(name):
+            return result[name][0]['result'] if result[name] else []
+        
+        def facet_count(name):
+            counted = facet(name)
+            return counted[0]['n'] if counted else 0
+        
+        user = result['user'][0]
+        if graph is not None:
+            user['followers_count'] = graph.follower_count(user_id)
+            user['following_count'] = graph.following_count(user_id)
+            user['is_following'] = graph.is_following(viewer_id, user_id)
+            user['follows_you'] = graph.is_following(user_id, viewer_id)
+        else:
+            user['followers_count'] = facet_count('followers_count')
+            user['following_count'] = facet_count('following_count')
+            user['is_following'] = bool(facet('is_following'))
+            user['follows_you'] = bool(facet('follows_you'))
+        user['memes_count'] = facet_count('memes_count') + facet_count('archived_memes_count')
+        user['is_self'] = user_id == viewer_id
+        
+        # A short hot page continues into the archived memes
+        memes = Meme.get_user_memes(user_id, limit, viewer_id=viewer_id, hot_page=facet('memes'))
+        return {'user': user, 'memes': memes}
+    
     @staticmethod
     def update_profile(user_id, updates):
         """
@@ -233,13 +586,50 @@ class User:
         update_data['updated_at'] = datetime.datetime.utcnow()
         
         db = get_db()
-        db.users.update_one(
+        previous = db.users.find_one_and_update(
             {'_id': ObjectId(user_id)},
-            {'$set': update_data}
+            {'$set': update_data},
+            projection={field: 1 for field in SNAPSHOT_FIELDS}
         )
         
+        # Memes and comments embed the username and avatar; rewrite them in the background
+        if previous and any(field in update_data and update_data[field] != previous.get(field)
+                            for field in SNAPSHOT_FIELDS):
+            schedule_propagation(user_id)
+        
+        clear_loaders('users', ObjectId(user_id))
         return User.find_by_id(user_id)
     
+    @staticmethod
+    def delete(user_id):
+        """
+        Delete a user account.
+        
+        Only the account is flagged here, so deleting a prolific account
+        costs one write. The background cleanup worker, woken right away,
+        hides the account's memes in batches and then removes its memes,
+        follows, likes, comments and images.
+        
+        Args:
+            user_id (str): The user ID
+            
+        Returns:
+            bool: True if the account was found and deleted
+        """
+        db = get_db()
+        result = db.users.update_one(
+            {'_id': ObjectId(user_id), 'deleted_at': None},
+            {'$currentDate': {'deleted_at': True}}
+        )
+        if result.modified_count == 0:
+            return False
+        clear_loaders('users', ObjectId(user_id))
+        
+        worker = get_cleanup_worker()
+        if worker is not None:
+            worker.wake()
+        return True
+    
     @staticmethod
     def get_following_ids(user_id):
         """
@@ -247,6 +637,10 @@ class User:
         """
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
+        
+        graph = get_follow_graph()
+        if graph is not None:
+            return graph.following(user_id)
             
         db = get_db()
         
@@ -262,20 +656,46 @@ class User:
         return following_ids
     
     @staticmethod
-    def get_by_id(user_id):
+    def get_by_id(user_id, profile='profile'):
         """
         Get a user by ID
         
         Args:
             user_id (str or ObjectId): The ID of the user to get
+            profile (str): Projection profile from USER_PROJECTIONS
             
         Returns:
             dict: The user object or None if not found
         """
-        db = get_db()
-        
         # Convert to ObjectId if string
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
             
-        return db.users.find_one({"_id": user_id})
\ No newline at end of file
+        return User._loader(profile).load(user_id)
+    
+    @staticmethod
+    def get_suggestions(user_id, limit=10):
+        """
+        Get "people you may know" suggestions for a user.
+        
+        Suggestions are precomputed in the background, so this is a single
+        read by _id; they are computed inline only the first time.
+        
+        Args:
+            user_id (str): The user ID
+            limit (int): Maximum number of suggestions
+            
+        Returns:
+            list: Candidate entries with user card, mutual_count and score
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        db = get_db()
+        doc = db.suggestions.find_one({'_id': user_id}, {'candidates': {'$slice': limit}})
+        if doc is not None:
+            return doc['candidates']
+        
+        # Store the same number of candidates as the background refresh does
+        return compute_suggestions(db, user_id, current_app.config['SUGGESTIONS_LIMIT'],
+                                   get_follow_graph())[:limit]
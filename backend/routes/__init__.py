@@ -1,3 +1,3 @@
-from routes import auth_routes, user_routes, meme_routes
+from routes import auth_routes, user_routes, meme_routes, admin_routes, health_routes
 
-__all__ = ['auth_routes', 'user_routes', 'meme_routes']
\ No newline at end of file
+__all__ = ['auth_routes', 'user_routes', 'meme_routes', 'admin_routes', 'health_routes']
\ No newline at end of file
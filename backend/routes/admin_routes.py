@@ -0,0 +1,79 @@
+from flask import Blueprint, Response, jsonify, request
+from bson import ObjectId
+from bson.errors import InvalidId
+from utils.auth_utils import admin_required
+from services.admission_service import get_admission_controller
+from services.job_service import get_job_queue
+from services.resilience_service import breaker_stats
+from services.mongodb_service import get_db
+from routes.meme_routes import convert_objectids_to_str
+
+bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+@bp.route('/admission', methods=['GET'])
+@admin_required
+def get_admission_stats():
+    controller = get_admission_controller()
+    if controller is None:
+        return jsonify({'enabled': False}), 200
+    
+    return jsonify(dict(controller.stats(), enabled=True)), 200
+
+@bp.route('/jobs', methods=['GET'])
+@admin_required
+def get_job_stats():
+    # Queue depth, lag of the oldest due job and recent throughput, per job type
+    return jsonify(get_job_queue().stats()), 200
+
+@bp.route('/breakers', methods=['GET'])
+@admin_required
+def get_breaker_stats():
+    # closed, open (failing fast) or half_open (letting one trial call through)
+    return jsonify(breaker_stats()), 200
+
+@bp.route('/slow-requests', methods=['GET'])
+@admin_required
+def list_slow_requests():
+    limit = int(request.args.get('limit', 20))
+    skip = int(request.args.get('skip', 0))
+    
+    records = get_db().slow_requests.find({}, {'commands': 0}).sort('created_at', -1).skip(skip).limit(limit)
+    
+    return jsonify([convert_objectids_to_str(record) for record in records]), 200
+
+@bp.route('/slow-requests/<record_id>', methods=['GET'])
+@admin_required
+def get_slow_request(record_id):
+    try:
+        record = get_db().slow_requests.find_one({'_id': ObjectId(record_id)})
+    except InvalidId:
+        record = None
+    
+    if not record:
+        return jsonify({'error': 'Slow request not found'}), 404
+    
+    return jsonify(convert_objectids_to_str(record)), 200
+
+@bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    limit = int(request.args.get('limit', 20))
+    skip = int(request.args.get('skip', 0))
+    
+    profiles = get_db().profiles.find({}, {'collapsed': 0}).sort('created_at', -1).skip(skip).limit(limit)
+    
+    return jsonify([convert_objectids_to_str(profile) for profile in profiles]), 200
+
+@bp.route('/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def get_profile(profile_id):
+    try:
+        profile = get_db().profiles.find_one({'_id': ObjectId(profile_id)}, {'collapsed': 1})
+    except InvalidId:
+        profile = None
+    
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    # Collapsed stacks, ready for flamegraph.pl or speedscope
+    return Response(profile['collapsed'], mimetype='text/plain'), 200
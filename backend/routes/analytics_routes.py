@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson import ObjectId
+from services.mongodb_service import get_db
+from services.analytics_service import get_creator_summary, get_hourly_series, get_meme_series
+from routes.meme_routes import convert_objectids_to_str
+
+# Creator dashboards read only the rollup collections, never likes/comments/follows
+bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+
+def _days():
+    return max(1, min(int(request.args.get('days', 30)), current_app.config['ANALYTICS_MAX_DAYS']))
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+def get_summary():
+    creator_id = ObjectId(get_jwt_identity())
+    top_limit = max(1, min(int(request.args.get('top', 10)), 50))
+
+    summary = get_creator_summary(get_db(), creator_id, _days(), top_limit)
+
+    return jsonify(convert_objectids_to_str(summary)), 200
+
+@bp.route('/hourly', methods=['GET'])
+@jwt_required()
+def get_hourly():
+    creator_id = ObjectId(get_jwt_identity())
+    max_hours = current_app.config['ANALYTICS_HOURLY_RETENTION_DAYS'] * 24
+    hours = max(1, min(int(request.args.get('hours', 48)), max_hours))
+
+    return jsonify({'hourly': convert_objectids_to_str(get_hourly_series(get_db(), creator_id, hours))}), 200
+
+@bp.route('/memes/<meme_id>', methods=['GET'])
+@jwt_required()
+def get_meme_stats(meme_id):
+    if not ObjectId.is_valid(meme_id):
+        return jsonify({'error': 'Invalid meme ID'}), 400
+
+    # Rollups are keyed by creator, so other users' memes simply have no rows
+    creator_id = ObjectId(get_jwt_identity())
+    daily = get_meme_series(get_db(), creator_id, ObjectId(meme_id), _days())
+
+    return jsonify({'meme_id': meme_id, 'daily': convert_objectids_to_str(daily)}), 200
@@ -21,11 +21,11 @@ def register():
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    existing_user = User.find_by_email(data['email'])
+    existing_user = User.find_by_email(data['email'], profile='exists')
     if existing_user:
         return jsonify({'error': 'User with this email already exists'}), 409
         
-    existing_username = User.find_by_username(data['username'])
+    existing_username = User.find_by_username(data['username'], profile='exists')
     if existing_username:
         return jsonify({'error': 'Username already taken'}), 409
     
@@ -50,7 +50,7 @@ def login():
         return jsonify({'error': 'Email and password are required'}), 400
     
     user = User.find_by_email(data['email'])
-    if not user or not check_password(data['password'], user['password']):
+    if not user or user.get('deleted_at') or not check_password(data['password'], user['password']):
         return jsonify({'error': 'Invalid email or password'}), 401
     
     token = generate_token(user['_id'])
@@ -81,3 +81,15 @@ def update_current_user():
     updated_user = User.update_profile(user_id, data)
     
     return jsonify(serialize_user(updated_user)), 200
+
+@bp.route('/me', methods=['DELETE'])
+@jwt_required()
+def delete_current_user():
+    user_id = get_jwt_identity()
+    
+    success = User.delete(user_id)
+    
+    if success:
+        return jsonify({'message': 'Account deleted successfully'}), 200
+    else:
+        return jsonify({'error': 'User not found'}), 404
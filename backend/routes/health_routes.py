@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify, current_app
+from services.mongodb_service import get_db
+from services.lifecycle_service import is_ready
+
+bp = Blueprint('health', __name__, url_prefix='/health')
+
+@bp.route('/live', methods=['GET'])
+def liveness():
+    return jsonify({'status': 'ok'}), 200
+
+@bp.route('/ready', methods=['GET'])
+def readiness():
+    if not is_ready():
+        return jsonify({'status': 'unavailable', 'reason': 'not ready'}), 503
+    
+    try:
+        get_db().command('ping', maxTimeMS=current_app.config['HEALTH_CHECK_TIMEOUT_MS'])
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'reason': f'mongo: {str(e)}'}), 503
+    
+    return jsonify({'status': 'ok'}), 200
@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.meme import Meme
-from models.user import User
 from services.cloudinary_service import upload_image
+from services.upload_service import (UploadError, initiate_upload, get_upload, write_chunk,
+                                     complete_upload, release_upload, discard_upload)
+from services.ranking_service import ranking_available
+from services.resilience_service import CircuitOpenError, unavailable_response
 from werkzeug.utils import secure_filename
+from datetime import datetime
 import os
+import re
 from bson import ObjectId  # Add this import at the top of your file
 
 bp = Blueprint('memes', __name__, url_prefix='/api/memes')
@@ -42,9 +47,114 @@ def create_meme():
         meme['user_id'] = str(meme['user_id'])
         
         return jsonify(meme), 201
+    except CircuitOpenError as e:
+        return unavailable_response(e.retry_after, 'Image storage is temporarily unavailable, please retry')
     except Exception as e:
         current_app.logger.error(f"Error creating meme: {str(e)}")
         return jsonify({'error': 'Failed to upload image'}), 500
+
+# Resumable uploads: initiate, PUT byte ranges in order, then complete
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+@bp.route('/uploads', methods=['POST'])
+@jwt_required()
+def start_upload():
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    required_fields = ['filename', 'size', 'checksum']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    
+    try:
+        upload = initiate_upload(
+            user_id,
+            secure_filename(data['filename']),
+            int(data['size']),
+            data['checksum'],
+            data.get('caption', '')
+        )
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status_code
+    
+    return jsonify(upload), 201
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload_status(upload_id):
+    upload = get_upload(upload_id, get_jwt_identity())
+    
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    return jsonify({
+        'upload_id': str(upload['_id']),
+        'size': upload['size'],
+        'received': upload['received']
+    }), 200
+
+@bp.route('/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def upload_chunk(upload_id):
+    match = CONTENT_RANGE_PATTERN.match(request.headers.get('Content-Range', ''))
+    if not match:
+        return jsonify({'error': 'Content-Range header is required'}), 400
+    if 'X-Chunk-Checksum' not in request.headers:
+        return jsonify({'error': 'X-Chunk-Checksum header is required'}), 400
+    
+    start, end = int(match.group(1)), int(match.group(2))
+    
+    try:
+        received = write_chunk(
+            upload_id,
+            get_jwt_identity(),
+            start,
+            end - start + 1,
+            request.stream,
+            request.headers['X-Chunk-Checksum']
+        )
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status_code
+    
+    return jsonify({'upload_id': upload_id, 'received': received}), 200
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def finish_upload(upload_id):
+    user_id = get_jwt_identity()
+    
+    try:
+        path, upload = complete_upload(upload_id, user_id)
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status_code
+    
+    try:
+        # Hand the assembled file to Cloudinary by path, without loading it into memory
+        upload_result = upload_image(path, user_id)
+        
+        meme = Meme.create(
+            user_id=user_id,
+            image_url=upload_result['url'],
+            caption=upload['caption'],
+            cloudinary_public_id=upload_result['public_id']
+        )
+    except CircuitOpenError as e:
+        release_upload(upload_id)
+        return unavailable_response(e.retry_after, 'Image storage is temporarily unavailable, please retry')
+    except Exception as e:
+        current_app.logger.error(f"Error completing upload: {str(e)}")
+        release_upload(upload_id)
+        return jsonify({'error': 'Failed to upload image'}), 500
+    
+    discard_upload(upload_id)
+    
+    # Convert ObjectId to string
+    meme['_id'] = str(meme['_id'])
+    meme['user_id'] = str(meme['user_id'])
+    
+    return jsonify(meme), 201
+
 def convert_objectids_to_str(obj):
     """
     Recursively convert all ObjectId values to strings in a dict, list, or other object.
@@ -67,50 +177,45 @@ def get_feed():
     limit = int(request.args.get('limit', 10))
     skip = int(request.args.get('skip', 0))
     
-    print(f"Getting feed for user {user_id}")
-    from models.user import User
-    following_ids = User.get_following_ids(user_id)
-    print(f"User follows these users: {following_ids}")
+    # Optional cursor: ISO timestamp of the last meme already shown
+    before = request.args.get('before')
+    if before:
+        try:
+            before = datetime.fromisoformat(before)
+        except ValueError:
+            return jsonify({'error': 'Invalid before timestamp'}), 400
     
-    memes = Meme.get_feed_for_user(user_id, limit, skip)
-    print(f"Found {len(memes)} memes for feed")
+    # Optional mode: 'latest' (chronological) or 'ranked'; ranking needs NumPy
+    mode = request.args.get('mode', current_app.config['FEED_DEFAULT_MODE'])
+    if mode not in ('latest', 'ranked'):
+        return jsonify({'error': 'Invalid feed mode'}), 400
+    ranked = mode == 'ranked' and ranking_available()
     
-    # Only use one method of converting ObjectIds to strings
-    converted_memes = convert_objectids_to_str(memes)
+    print(f"Getting feed for user {user_id}")
     
-    # Check for duplicate IDs (for debugging)
-    ids = [meme['_id'] for meme in converted_memes]
-    duplicate_ids = set([id for id in ids if ids.count(id) > 1])
-    if duplicate_ids:
-        print(f"WARNING: Found duplicate meme IDs: {duplicate_ids}")
+    memes = Meme.get_feed_for_user(user_id, limit, skip, before or None, ranked=ranked)
+    print(f"Found {len(memes)} memes for feed")
     
-    return jsonify(converted_memes), 200
+    # Not streamed: ranking, the archive merge, recent comments and authors all need the
+    # whole page before the first meme can be written, and a page is small enough to build in memory
+    return jsonify([convert_objectids_to_str(meme) for meme in memes]), 200
 
 @bp.route('/<meme_id>', methods=['GET'])
 @jwt_required()
 def get_meme(meme_id):
-    meme = Meme.find_by_id(meme_id)
+    user_id = get_jwt_identity()
+    meme = Meme.find_by_id(meme_id, profile='detail', viewer_id=user_id)
     
     if not meme:
         return jsonify({'error': 'Meme not found'}), 404
     
-    # Convert ObjectId to string
-    meme['_id'] = str(meme['_id'])
-    meme['user_id'] = str(meme['user_id'])
-    
-    # Get user info
-    user = User.find_by_id(meme['user_id'])
-    meme['user'] = user
+    # Author info for the meme and its embedded comments comes from their snapshots
+    Meme.attach_authors([meme] + meme.get('comments', []))
     
-    # Check if current user has liked this meme
-    user_id = get_jwt_identity()
-    like = current_app.mongo.db.likes.find_one({
-        'meme_id': meme['_id'],
-        'user_id': user_id
-    })
-    meme['liked_by_user'] = like is not None
+    # Whether the current user has liked this meme comes from the projection
+    meme['liked_by_user'] = meme.pop('is_liked', False)
     
-    return jsonify(meme), 200
+    return jsonify(convert_objectids_to_str(meme)), 200
 
 @bp.route('/<meme_id>', methods=['PUT'])
 @jwt_required()
@@ -147,9 +252,7 @@ def like_meme(meme_id):
     user_id = get_jwt_identity()
     
     # Check if meme exists
-    meme = Meme.find_by_id(meme_id)
-    
-    if not meme:
+    if not Meme.exists(meme_id):
         return jsonify({'error': 'Meme not found'}), 404
     
     success = Meme.like(meme_id, user_id)
@@ -181,21 +284,12 @@ def add_comment(meme_id):
         return jsonify({'error': 'Comment text is required'}), 400
     
     # Check if meme exists
-    meme = Meme.find_by_id(meme_id)
-    if not meme:
+    if not Meme.exists(meme_id):
         return jsonify({'error': 'Meme not found'}), 404
     
+    # The returned comment is serialized and carries its author info
     comment = Meme.add_comment(meme_id, user_id, data['text'])
     
-    # Convert ObjectId to string
-    comment['_id'] = str(comment['_id'])
-    comment['meme_id'] = str(comment['meme_id'])
-    comment['user_id'] = str(comment['user_id'])
-    
-    # Get user info
-    user = User.find_by_id(user_id)
-    comment['user'] = user
-    
     return jsonify(comment), 201
 
 @bp.route('/<meme_id>/comments', methods=['GET'])
@@ -205,22 +299,13 @@ def get_comments(meme_id):
     skip = int(request.args.get('skip', 0))
     
     # Check if meme exists
-    meme = Meme.find_by_id(meme_id)
-    if not meme:
+    if not Meme.exists(meme_id):
         return jsonify({'error': 'Meme not found'}), 404
     
     comments = Meme.get_comments(meme_id, limit, skip)
     
     # Convert ObjectId to string
-    for comment in comments:
-        comment['_id'] = str(comment['_id'])
-        comment['meme_id'] = str(comment['meme_id'])
-        comment['user_id'] = str(comment['user_id'])
-        
-        if 'user' in comment:
-            comment['user']['_id'] = str(comment['user']['_id'])
-    
-    return jsonify(comments), 200
+    return jsonify([convert_objectids_to_str(comment) for comment in comments]), 200
 
 @bp.route('/comments/<comment_id>', methods=['DELETE'])
 @jwt_required()
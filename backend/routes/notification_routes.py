@@ -0,0 +1,58 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.notification import Notification
+from models.user import User
+from routes.meme_routes import convert_objectids_to_str
+from bson import ObjectId
+
+bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+def get_notifications():
+    user_id = get_jwt_identity()
+    limit = min(int(request.args.get('limit', 20)), 100)
+    
+    # Optional cursor: the next_before value of the previous page
+    before = request.args.get('before')
+    if before and not ObjectId.is_valid(before):
+        return jsonify({'error': 'Invalid before cursor'}), 400
+    
+    notifications = Notification.get_inbox(user_id, limit, before or None)
+    
+    # Load every actor shown on the page with one users query
+    User.prime([actor for notification in notifications for actor in notification['actors']])
+    for notification in notifications:
+        notification['actors'] = [
+            user for user in User.find_many(notification['actors'], profile='card') if user
+        ]
+    
+    next_before = str(notifications[-1]['_id']) if len(notifications) == limit else None
+    
+    return jsonify({
+        'notifications': [convert_objectids_to_str(notification) for notification in notifications],
+        'unread_count': Notification.unread_count(user_id),
+        'next_before': next_before
+    }), 200
+
+@bp.route('/unread-count', methods=['GET'])
+@jwt_required()
+def get_unread_count():
+    return jsonify({'unread_count': Notification.unread_count(get_jwt_identity())}), 200
+
+@bp.route('/read', methods=['POST'])
+@jwt_required()
+def mark_notifications_read():
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    
+    # Without ids every unread notification is marked read
+    notification_ids = data.get('ids')
+    if notification_ids is not None and not isinstance(notification_ids, list):
+        return jsonify({'error': 'ids must be a list'}), 400
+    if notification_ids and not all(isinstance(_id, str) and ObjectId.is_valid(_id) for _id in notification_ids):
+        return jsonify({'error': 'Invalid notification ID'}), 400
+    
+    updated = Notification.mark_read(user_id, notification_ids)
+    
+    return jsonify({'updated': updated, 'unread_count': Notification.unread_count(user_id)}), 200
@@ -1,8 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.user import User
 from models.meme import Meme
 from bson import ObjectId
+from utils.response_utils import json_list_response
+from routes.meme_routes import convert_objectids_to_str
+from datetime import datetime
 
 bp = Blueprint('users', __name__, url_prefix='/api/users')
 
@@ -17,12 +20,26 @@ def search_users():
     
     # Add following status
     current_user_id = get_jwt_identity()
+    followed = User.get_following_status(current_user_id, [user['_id'] for user in users])
     for user in users:
-        user['is_following'] = User.is_following(current_user_id, str(user['_id']))
+        user['is_following'] = user['_id'] in followed
         user['_id'] = str(user['_id'])
     
     return jsonify(users), 200
 
+@bp.route('/suggestions', methods=['GET'])
+@jwt_required()
+def get_suggestions():
+    limit = int(request.args.get('limit', 10))
+    
+    suggestions = User.get_suggestions(get_jwt_identity(), limit)
+    
+    # Convert ObjectId to string
+    for suggestion in suggestions:
+        suggestion['user_id'] = str(suggestion['user_id'])
+    
+    return jsonify(suggestions), 200
+
 @bp.route('/<user_id>', methods=['GET'])
 @jwt_required()
 def get_user(user_id):
@@ -39,11 +56,8 @@ def get_user(user_id):
         user['is_following'] = User.is_following(current_user_id, user_id)
         
         # Get counts
-        followers = User.get_followers(user_id)
-        following = User.get_following(user_id)
-        
-        user['followers_count'] = len(followers)
-        user['following_count'] = len(following)
+        user['followers_count'] = User.count_followers(user_id)
+        user['following_count'] = User.count_following(user_id)
         
         return jsonify(user), 200
     except Exception as e:
@@ -82,6 +96,40 @@ def unfollow_user(user_id):
     else:
         return jsonify({'error': 'Not following this user'}), 400
 
+def _bulk_follow_ids():
+    """Read and bound the user_ids list of a bulk follow or unfollow request."""
+    data = request.get_json() or {}
+    user_ids = data.get('user_ids')
+    if not isinstance(user_ids, list) or not user_ids:
+        return None, (jsonify({'error': 'user_ids must be a non-empty list'}), 400)
+    
+    limit = current_app.config['FOLLOW_BULK_LIMIT']
+    if len(user_ids) > limit:
+        return None, (jsonify({'error': f'At most {limit} users per request'}), 400)
+    return user_ids, None
+
+@bp.route('/follow/bulk', methods=['POST'])
+@jwt_required()
+def follow_users():
+    user_ids, error = _bulk_follow_ids()
+    if error:
+        return error
+    
+    results = User.follow_many(get_jwt_identity(), user_ids)
+    
+    return jsonify({'results': results}), 200
+
+@bp.route('/unfollow/bulk', methods=['POST'])
+@jwt_required()
+def unfollow_users():
+    user_ids, error = _bulk_follow_ids()
+    if error:
+        return error
+    
+    results = User.unfollow_many(get_jwt_identity(), user_ids)
+    
+    return jsonify({'results': results}), 200
+
 @bp.route('/<user_id>/followers', methods=['GET'])
 @jwt_required()
 def get_followers(user_id):
@@ -91,10 +139,7 @@ def get_followers(user_id):
     followers = User.get_followers(user_id, limit, skip)
     
     # Convert ObjectId to string
-    for follower in followers:
-        follower['_id'] = str(follower['_id'])
-    
-    return jsonify(followers), 200
+    return json_list_response(dict(follower.to_dict(), _id=str(follower['_id'])) for follower in followers)
 
 @bp.route('/<user_id>/following', methods=['GET'])
 @jwt_required()
@@ -105,10 +150,23 @@ def get_following(user_id):
     following = User.get_following(user_id, limit, skip)
     
     # Convert ObjectId to string
-    for user in following:
-        user['_id'] = str(user['_id'])
+    return json_list_response(dict(user.to_dict(), _id=str(user['_id'])) for user in following)
+
+@bp.route('/<user_id>/profile', methods=['GET'])
+@jwt_required()
+def get_user_profile(user_id):
+    if not ObjectId.is_valid(user_id):
+        return jsonify({'error': 'User not found'}), 404
+    limit = min(int(request.args.get('limit', 12)), 50)
+    
+    summary = User.get_profile_summary(user_id, get_jwt_identity(), limit)
+    if summary is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    memes = summary['memes']
+    summary['next_before'] = memes[-1]['created_at'].isoformat() if len(memes) == limit else None
     
-    return jsonify(following), 200
+    return jsonify(convert_objectids_to_str(summary)), 200
 
 @bp.route('/<user_id>/memes', methods=['GET'])
 @jwt_required()
@@ -116,11 +174,15 @@ def get_user_memes(user_id):
     limit = int(request.args.get('limit', 10))
     skip = int(request.args.get('skip', 0))
     
-    memes = Meme.get_user_memes(user_id, limit, skip)
+    # Optional cursor: next_before from the profile summary or the last meme shown
+    before = request.args.get('before')
+    if before:
+        try:
+            before = datetime.fromisoformat(before)
+        except ValueError:
+            return jsonify({'error': 'Invalid before timestamp'}), 400
     
-    # Convert ObjectId to string
-    for meme in memes:
-        meme['_id'] = str(meme['_id'])
-        meme['user_id'] = str(meme['user_id'])
+    memes = Meme.get_user_memes(user_id, limit, skip, before or None, viewer_id=get_jwt_identity())
     
-    return jsonify(memes), 200
\ No newline at end of file
+    # Convert ObjectId to string (the tiered page is already built, so it is not streamed)
+    return jsonify([dict(meme, _id=str(meme['_id']), user_id=str(meme['user_id'])) for meme in memes]), 200
\ No newline at end of file
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from flask import current_app, g, jsonify, request
+
+# Classes that may only use part of the global capacity, leaving room for reads
+LOW_PRIORITY_CLASSES = {'search', 'upload'}
+
+# Endpoints that are not classified by HTTP method alone
+ENDPOINT_CLASSES = {
+    'memes.create_meme': 'upload',
+    'memes.start_upload': 'upload',
+    'memes.upload_chunk': 'upload',
+    'memes.finish_upload': 'upload',
+    'users.search_users': 'search',
+}
+
+# Endpoints that must never be shed (health checks, admin views)
+EXEMPT_PREFIXES = ('health.', 'admin.')
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, retry_after):
+        super().__init__('Service overloaded')
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Per-class concurrency limits with bounded, deadline-based queueing.
+
+    A request is admitted when its class has a free slot and the global
+    limit allows it (low priority classes only get a share of the global
+    limit). Otherwise it waits, unless the queue for its class is already
+    full or the wait would exceed the class deadline, in which case it is
+    shed immediately.
+    """
+
+    def __init__(self, limits, global_limit, low_priority_share=0.5):
+        """
+        Args:
+            limits (dict): class -> {'concurrency', 'queue', 'max_wait'}
+            global_limit (int): Maximum requests in flight across all classes
+            low_priority_share (float): Fraction of global_limit open to low priority classes
+        """
+        self.limits = limits
+        self.global_limit = global_limit
+        self.low_priority_limit = max(1, int(global_limit * low_priority_share))
+        self._cond = threading.Condition()
+        self._active_total = 0
+        self._active = {name: 0 for name in limits}
+        self._waiting = {name: 0 for name in limits}
+        self._admitted = {name: 0 for name in limits}
+        self._shed = {name: 0 for name in limits}
+        self._queued = {name: 0 for name in limits}
+
+    def _can_enter(self, request_class):
+        if self._active[request_class] >= self.limits[request_class]['concurrency']:
+            return False
+        if request_class in LOW_PRIORITY_CLASSES:
+            return self._active_total < self.low_priority_limit
+        return self._active_total < self.global_limit
+
+    def acquire(self, request_class):
+        """
+        Admit a request or raise Overloaded.
+
+        Args:
+            request_class (str): A class from the configured limits
+        """
+        limits = self.limits[request_class]
+        with self._cond:
+            if not self._can_enter(request_class):
+                if self._waiting[request_class] >= limits['queue']:
+                    self._shed[request_class] += 1
+                    raise Overloaded(self._retry_after(limits))
+
+                self._waiting[request_class] += 1
+                self._queued[request_class] += 1
+                deadline = time.monotonic() + limits['max_wait']
+                try:
+                    while not self._can_enter(request_class):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._shed[request_class] += 1
+                            raise Overloaded(self._retry_after(limits))
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting[request_class] -= 1
+
+            self._active[request_class] += 1
+            self._active_total += 1
+            self._admitted[request_class] += 1
+
+    def release(self, request_class):
+        """Free the slot held by an admitted request."""
+        with self._cond:
+            self._active[request_class] -= 1
+            self._active_total -= 1
+            self._cond.notify_all()
+
+    @staticmethod
+    def _retry_after(limits):
+        return max(1, math.ceil(limits['max_wait']))
+
+    def stats(self):
+        """
+        Get current admission counters.
+
+        Returns:
+            dict: Per-class active, waiting, admitted, queued and shed counts
+        """
+        with self._cond:
+            return {
+                'active_total': self._active_total,
+                'global_limit': self.global_limit,
+                'classes': {
+                    name: {
+                        'active': self._active[name],
+                        'waiting': self._waiting[name],
+                        'admitted': self._admitted[name],
+                        'queued': self._queued[name],
+                        'shed': self._shed[name],
+                        'concurrency': self.limits[name]['concurrency']
+                    }
+                    for name in self.limits
+                }
+            }
+
+def classify_request():
+    """Return the admission class of the current request, or None if exempt."""
+    endpoint = request.endpoint or ''
+    if request.method == 'OPTIONS' or endpoint.startswith(EXEMPT_PREFIXES):
+        return None
+    if endpoint in ENDPOINT_CLASSES:
+        return ENDPOINT_CLASSES[endpoint]
+    return 'read' if request.method in ('GET', 'HEAD') else 'write'
+
+def _before_request():
+    request_class = classify_request()
+    if request_class is None:
+        return None
+    controller = current_app.extensions['admission']
+    try:
+        controller.acquire(request_class)
+    except Overloaded as e:
+        response = jsonify({'error': 'Service temporarily overloaded, please retry'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    g.admission_class = request_class
+    return None
+
+def _teardown_request(exc=None):
+    request_class = g.pop('admission_class', None)
+    if request_class is not None:
+        current_app.extensions['admission'].release(request_class)
+
+def init_admission(app):
+    """Install admission control in the request pipeline if enabled in the config."""
+    if not app.config.get('ADMISSION_ENABLED'):
+        return None
+    controller = AdmissionController(
+        app.config['ADMISSION_LIMITS'],
+        app.config['ADMISSION_GLOBAL_LIMIT'],
+        app.config['ADMISSION_LOW_PRIORITY_SHARE']
+    )
+    app.extensions['admission'] = controller
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    return controller
+
+def get_admission_controller():
+    """Return the admission controller, or None when admission control is disabled."""
+    return current_app.extensions.get('admission')
@@ -0,0 +1,156 @@
+import atexit
+import datetime
+import threading
+from collections import defaultdict
+from bson import ObjectId
+from flask import current_app
+from pymongo import UpdateOne
+from services.mongodb_service import get_shared_db
+
+# Metrics kept in the rollups; likes and comments also per meme
+CREATOR_METRICS = ('likes', 'comments', 'new_followers', 'lost_followers')
+MEME_METRICS = ('likes', 'comments')
+
+class AnalyticsRecorder:
+    """
+    Accumulates creator analytics increments in memory and flushes them as rollups.
+
+    Write paths record events here; every flush_interval the pending deltas
+    are merged per rollup key and applied with one unordered bulk_write of
+    $inc upserts per collection (hourly, daily, per-meme daily), so a viral
+    meme costs a handful of updates per interval instead of one per event.
+    Deltas pending at a crash are lost, which is acceptable for analytics.
+    """
+
+    def __init__(self, app, flush_interval=5.0):
+        self.app = app
+        self.flush_interval = flush_interval
+        self._pending = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='analytics-flush', daemon=True)
+        self._thread.start()
+
+    def record(self, creator_id, metric, meme_id=None, delta=1, at=None):
+        """
+        Add an increment to the creator's rollups.
+
+        Args:
+            creator_id (ObjectId): The creator the event counts for
+            metric (str): One of CREATOR_METRICS
+            meme_id (ObjectId, optional): The meme, for per-meme rollups
+            delta (int): Amount to add (negative for unlikes)
+            at (datetime, optional): Event time, now by default
+        """
+        at = at or datetime.datetime.utcnow()
+        hour = at.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        with self._lock:
+            self._pending[('analytics_hourly', creator_id, None, hour)][metric] += delta
+            self._pending[('analytics_daily', creator_id, None, day)][metric] += delta
+            if meme_id is not None and metric in MEME_METRICS:
+                self._pending[('analytics_meme_daily', creator_id, meme_id, day)][metric] += delta
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f"Error flushing analytics: {str(e)}")
+
+    def flush(self):
+        """Apply every pending increment; returns the number of rollup documents updated."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        if not pending:
+            return 0
+
+        operations = defaultdict(list)
+        for (collection, creator_id, meme_id, period), deltas in pending.items():
+            deltas = {metric: delta for metric, delta in deltas.items() if delta}
+            if not deltas:
+                continue
+            key = {'creator_id': creator_id}
+            if meme_id is not None:
+                key['meme_id'] = meme_id
+            key['hour' if collection == 'analytics_hourly' else 'day'] = period
+            operations[collection].append(UpdateOne(key, {'$inc': deltas}, upsert=True))
+
+        db = get_shared_db(self.app)
+        for collection, requests in operations.items():
+            db[collection].bulk_write(requests, ordered=False)
+        return sum(len(requests) for requests in operations.values())
+
+    def close(self):
+        """Stop the flusher and write out anything still pending."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+def record_event(creator_id, metric, meme_id=None, delta=1):
+    """Record an analytics event for a creator; a no-op when analytics are disabled."""
+    recorder = current_app.extensions.get('analytics_recorder')
+    if recorder is None or creator_id is None:
+        return
+    recorder.record(ObjectId(creator_id), metric, ObjectId(meme_id) if meme_id is not None else None, delta)
+
+def _series(db, collection, creator_id, field, since, extra=None):
+    query = {'creator_id': creator_id, field: {'$gte': since}}
+    query.update(extra or {})
+    return list(db[collection].find(query, {'_id': 0, 'creator_id': 0, 'meme_id': 0}).sort(field, 1))
+
+def get_creator_summary(db, creator_id, days=30, top_limit=10):
+    """
+    Build a creator dashboard from the rollups only.
+
+    Reads at most days daily documents plus the per-meme daily documents for
+    memes that had activity in the range, however many interactions they got.
+
+    Args:
+        db (Database): The MongoDB database handle
+        creator_id (ObjectId): The creator
+        days (int): Length of the range, ending today
+        top_limit (int): Number of top memes to return
+
+    Returns:
+        dict: Totals, a per-day series and the top memes for the range
+    """
+    today = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    since = today - datetime.timedelta(days=days - 1)
+    series = _series(db, 'analytics_daily', creator_id, 'day', since)
+
+    totals = {metric: sum(day.get(metric, 0) for day in series) for metric in CREATOR_METRICS}
+    top_memes = list(db.analytics_meme_daily.aggregate([
+        {'$match': {'creator_id': creator_id, 'day': {'$gte': since}}},
+        {'$group': {
+            '_id': '$meme_id',
+            'likes': {'$sum': {'$ifNull': ['$likes', 0]}},
+            'comments': {'$sum': {'$ifNull': ['$comments', 0]}}
+        }},
+        {'$addFields': {'engagement': {'$add': ['$likes', '$comments']}}},
+        {'$sort': {'engagement': -1}},
+        {'$limit': top_limit}
+    ]))
+    for meme in top_memes:
+        meme['meme_id'] = meme.pop('_id')
+    return {'since': since, 'totals': totals, 'daily': series, 'top_memes': top_memes}
+
+def get_hourly_series(db, creator_id, hours=48):
+    """Get the creator's hourly rollups for the last hours."""
+    now = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    return _series(db, 'analytics_hourly', creator_id, 'hour', now - datetime.timedelta(hours=hours - 1))
+
+def get_meme_series(db, creator_id, meme_id, days=30):
+    """Get one meme's daily rollups for the last days."""
+    today = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return _series(db, 'analytics_meme_daily', creator_id, 'day', today - datetime.timedelta(days=days - 1),
+                   {'meme_id': meme_id})
+
+def init_analytics(app):
+    """Start the analytics rollup recorder if enabled in the config."""
+    if not app.config.get('ANALYTICS_ENABLED'):
+        return None
+    recorder = AnalyticsRecorder(app, flush_interval=app.config['ANALYTICS_FLUSH_INTERVAL'])
+    app.extensions['analytics_recorder'] = recorder
+    atexit.register(recorder.close)
+    return recorder
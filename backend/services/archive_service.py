@@ -0,0 +1,147 @@
+import datetime
+import threading
+import time
+from flask import current_app
+from pymongo import DeleteMany, DeleteOne, ReplaceOne, UpdateOne
+from services.mongodb_service import get_shared_db
+
+# Cold tier for memes older than ARCHIVE_AFTER_DAYS
+ARCHIVE_COLLECTION = 'memes_archive'
+
+def compact_meme(meme, now):
+    """
+    Turn a hot meme document into its cold form.
+
+    The per-user likes array is replaced by a likes_count; the likes
+    themselves go to the likes collection (see like_operations).
+
+    Args:
+        meme (dict): The full hot meme document
+        now (datetime): The archival timestamp
+
+    Returns:
+        tuple: (cold document, list of user IDs that liked the meme)
+    """
+    cold = dict(meme)
+    likes = cold.pop('likes', None) or []
+    cold['likes_count'] = len(likes)
+    cold['comments_count'] = len(cold.get('comments') or [])
+    cold['archived_at'] = now
+    return cold, likes
+
+def like_operations(meme_id, user_ids, now):
+    """
+    Idempotent writes that make the likes collection hold exactly user_ids for an archived meme.
+
+    Rows left by an earlier pass whose hot delete was skipped are removed
+    for users who have unliked since, so they do not read as liked.
+    """
+    return [DeleteMany({'meme_id': meme_id, 'user_id': {'$nin': list(user_ids)}})] + [
+        UpdateOne({'meme_id': meme_id, 'user_id': user_id},
+                  {'$setOnInsert': {'created_at': now}}, upsert=True)
+        for user_id in user_ids
+    ]
+
+class ArchiveMover:
+    """
+    Background worker that moves aging memes from the hot to the cold tier.
+
+    Each batch is copied first (cold document, then likes) and the hot
+    document is deleted last, only if it has not changed since it was read,
+    so an interrupted or raced batch is simply redone on the next pass.
+    """
+
+    def __init__(self, app, archive_after_days=30, batch_size=500, batch_pause=0.05, interval=3600):
+        self.app = app
+        self.archive_after = datetime.timedelta(days=archive_after_days)
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='archive-mover', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Start a pass now instead of waiting for the next interval."""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                self.app.logger.error(f"Error archiving memes: {str(e)}")
+
+    def run_once(self):
+        """
+        Archive every meme older than the cutoff, batch by batch.
+
+        Returns:
+            int: Number of memes moved to the cold tier
+        """
+        db = get_shared_db(self.app)
+        cutoff = datetime.datetime.utcnow() - self.archive_after
+        moved = 0
+        while True:
+            count = self.archive_batch(db, cutoff)
+            if count == 0:
+                return moved
+            moved += count
+            time.sleep(self.batch_pause)
+
+    def archive_batch(self, db, cutoff):
+        """
+        Move one batch of memes created before cutoff to the cold tier.
+
+        Args:
+            db (Database): The MongoDB database handle
+            cutoff (datetime): Memes created before this are archived
+
+        Returns:
+            int: Number of memes removed from the hot tier in this batch
+        """
+        memes = list(db.memes.find({'created_at': {'$lt': cutoff}, 'deleted_at': None})
+                     .sort('created_at', 1)
+                     .limit(self.batch_size))
+        if not memes:
+            return 0
+
+        now = datetime.datetime.utcnow()
+        archived = []
+        like_ops = []
+        removals = []
+        for meme in memes:
+            # Skip the delete if a like, comment or edit landed after the read; the
+            # arrays are compared whole, since an unlike plus a like keeps the size
+            unchanged = {'_id': meme['_id'], 'updated_at': meme.get('updated_at')}
+            for field in ('likes', 'comments'):
+                unchanged[field] = meme[field] if field in meme else {'$exists': False}
+            removals.append(DeleteOne(unchanged))
+
+            cold, liked_by = compact_meme(meme, now)
+            archived.append(ReplaceOne({'_id': meme['_id']}, cold, upsert=True))
+            like_ops.extend(like_operations(meme['_id'], liked_by, now))
+
+        db.likes.bulk_write(like_ops, ordered=False)
+        db[ARCHIVE_COLLECTION].bulk_write(archived, ordered=False)
+        return db.memes.bulk_write(removals, ordered=False).deleted_count
+
+def init_archive(app):
+    """Start the background hot/cold archive mover if enabled in the config."""
+    if not app.config.get('ARCHIVE_ENABLED'):
+        return None
+    mover = ArchiveMover(
+        app,
+        archive_after_days=app.config['ARCHIVE_AFTER_DAYS'],
+        batch_size=app.config['ARCHIVE_BATCH_SIZE'],
+        batch_pause=app.config['ARCHIVE_BATCH_PAUSE'],
+        interval=app.config['ARCHIVE_INTERVAL']
+    )
+    app.extensions['archive_mover'] = mover
+    return mover
+
+def get_archive_mover():
+    """Return the background archive mover, or None when it is disabled."""
+    return current_app.extensions.get('archive_mover')
@@ -0,0 +1,92 @@
+import datetime
+import time
+from flask import current_app
+from services.archive_service import ARCHIVE_COLLECTION
+from services.job_service import enqueue_job
+
+# User fields copied into the author snapshot of memes and comments
+SNAPSHOT_FIELDS = ('username', 'profile_pic')
+
+def author_snapshot(user):
+    """
+    Build the author snapshot embedded in memes and comments.
+
+    Args:
+        user (dict): A user document with at least the snapshot fields
+
+    Returns:
+        dict: {'username', 'profile_pic'}
+    """
+    return {field: user.get(field) for field in SNAPSHOT_FIELDS}
+
+def author_view(doc):
+    """
+    Get the author info to render with a meme or comment from its embedded snapshot.
+
+    Returns:
+        dict: {'_id', 'username', 'profile_pic'}, or None for documents written
+            before snapshots existed (callers fall back to a user lookup)
+    """
+    author = doc.get('author')
+    if author is None:
+        return None
+    return dict(author, _id=doc['user_id'])
+
+def schedule_propagation(user_id):
+    """
+    Queue a rewrite of the user's snapshots after a username or avatar change.
+
+    The job is delayed by AUTHOR_SNAPSHOT_DELAY and deduplicated per user, so
+    a burst of profile edits results in a single fan-out with the final values.
+    """
+    run_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=current_app.config['AUTHOR_SNAPSHOT_DELAY'])
+    enqueue_job('authors.propagate', {'user_id': str(user_id)}, run_at=run_at,
+                dedupe_key=f"author-snapshot:{user_id}")
+
+def _rewrite_in_batches(collection, query, update, batch_size, pause, array_filters=None):
+    # query only matches documents still holding another snapshot, so every batch
+    # makes progress and a retried job resumes where the last attempt stopped
+    updated = 0
+    while True:
+        ids = [doc['_id'] for doc in collection.find(query, {'_id': 1}).limit(batch_size)]
+        if not ids:
+            return updated
+        result = collection.update_many({'_id': {'$in': ids}}, update, array_filters=array_filters)
+        if result.modified_count == 0:
+            return updated
+        updated += result.modified_count
+        time.sleep(pause)
+
+def propagate_author_snapshot(db, user, batch_size=500, pause=0.1):
+    """
+    Rewrite a user's snapshot in every meme and comment they authored.
+
+    Documents are rewritten in batches of batch_size with a pause between
+    batches, so a prolific account's rename does not swamp the primary.
+    Both meme tiers and the comments collection are covered.
+
+    Args:
+        db (Database): The MongoDB database handle
+        user (dict): The user document with its current snapshot fields
+        batch_size (int): Documents updated per write
+        pause (float): Seconds to sleep between batches
+
+    Returns:
+        int: Number of documents modified
+    """
+    user_id = user['_id']
+    snapshot = author_snapshot(user)
+    updated = 0
+    for name in ('memes', ARCHIVE_COLLECTION):
+        collection = db[name]
+        updated += _rewrite_in_batches(collection, {'user_id': user_id, 'author': {'$ne': snapshot}},
+                                       {'$set': {'author': snapshot}}, batch_size, pause)
+        updated += _rewrite_in_batches(
+            collection,
+            {'comments': {'$elemMatch': {'user_id': user_id, 'author': {'$ne': snapshot}}}},
+            {'$set': {'comments.$[comment].author': snapshot}}, batch_size, pause,
+            array_filters=[{'comment.user_id': user_id}]
+        )
+    updated += _rewrite_in_batches(db.comments, {'user_id': user_id, 'author': {'$ne': snapshot}},
+                                   {'$set': {'author': snapshot}}, batch_size, pause)
+    return updated
@@ -0,0 +1,171 @@
+import threading
+import time
+from flask import current_app
+from pymongo import DeleteOne, UpdateOne
+from services.mongodb_service import get_shared_db
+from services.cloudinary_service import delete_images
+from services.upload_service import purge_stale_uploads
+from services.archive_service import ARCHIVE_COLLECTION
+from services.job_service import enqueue_job
+
+class CleanupWorker:
+    """
+    Background worker that finishes meme and account deletions.
+
+    Requests only set a deleted_at flag, which hides the record immediately.
+    The soft-delete flag is the worker's queue: it sweeps flagged memes and
+    users in small batches, pausing between batches so hot collections are
+    never held for long, and picks up where it left off after a restart.
+    """
+
+    def __init__(self, app, batch_size=500, batch_pause=0.05, interval=60):
+        self.app = app
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='cleanup', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Start a sweep now instead of waiting for the next interval."""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.sweep()
+            except Exception as e:
+                self.app.logger.error(f"Error during deletion cleanup: {str(e)}")
+
+    def sweep(self):
+        """Process soft-deleted accounts and memes, then abandoned chunked uploads."""
+        db = get_shared_db(self.app)
+        for user in db.users.find({'deleted_at': {'$ne': None}}, {'_id': 1}):
+            self.purge_user(db, user['_id'])
+        for collection in ('memes', ARCHIVE_COLLECTION):
+            while self.purge_memes(db, {'deleted_at': {'$ne': None}}, collection):
+                time.sleep(self.batch_pause)
+        purge_stale_uploads()
+
+    def purge_memes(self, db, query, collection='memes'):
+        """
+        Remove one batch of memes matching query along with their dependents.
+
+        Args:
+            db (Database): The MongoDB database handle
+            query (dict): Filter selecting the memes to purge
+            collection (str): The hot or cold meme collection
+
+        Returns:
+            int: Number of memes purged in this batch
+        """
+        memes = list(db[collection].find(query, {'_id': 1, 'cloudinary_public_id': 1}).limit(self.batch_size))
+        if not memes:
+            return 0
+        meme_ids = [meme['_id'] for meme in memes]
+
+        db.likes.delete_many({'meme_id': {'$in': meme_ids}})
+        db.comments.delete_many({'meme_id': {'$in': meme_ids}})
+
+        public_ids = [meme['cloudinary_public_id'] for meme in memes if meme.get('cloudinary_public_id')]
+        if public_ids:
+            removed = set(delete_images(public_ids))
+            leftover = [public_id for public_id in public_ids if public_id not in removed]
+            if leftover:
+                # The meme documents are about to go, so hand the retries to the job queue
+                enqueue_job('cloudinary.delete_images', {'public_ids': leftover})
+
+        # The meme documents go last so an interrupted batch is retried
+        db[collection].bulk_write([DeleteOne({'_id': meme_id}) for meme_id in meme_ids], ordered=False)
+        return len(meme_ids)
+
+    def purge_user(self, db, user_id):
+        """
+        Remove everything belonging to a soft-deleted account, in batches.
+
+        Args:
+            db (Database): The MongoDB database handle
+            user_id (ObjectId): The deleted user's ID
+        """
+        # Hide all of the user's memes first, then purge them; both in batches
+        for collection in ('memes', ARCHIVE_COLLECTION):
+            while self._update_batch(db[collection], {'user_id': user_id, 'deleted_at': None},
+                                     {'$currentDate': {'deleted_at': True}}):
+                time.sleep(self.batch_pause)
+        for collection in ('memes', ARCHIVE_COLLECTION):
+            while self.purge_memes(db, {'user_id': user_id}, collection):
+                time.sleep(self.batch_pause)
+
+        for field in ('follower_id', 'following_id'):
+            while self._delete_batch(db.follows, {field: user_id}):
+                time.sleep(self.batch_pause)
+        while self._delete_likes_batch(db, user_id):
+            time.sleep(self.batch_pause)
+        while self._delete_batch(db.comments, {'user_id': user_id}):
+            time.sleep(self.batch_pause)
+
+        # Likes and comments embedded in other users' memes
+        while self._update_batch(db.memes, {'likes': user_id}, {'$pull': {'likes': user_id}}):
+            time.sleep(self.batch_pause)
+        while self._update_batch(db.memes, {'comments.user_id': user_id},
+                                 {'$pull': {'comments': {'user_id': user_id}}}):
+            time.sleep(self.batch_pause)
+        # Archived memes store comments_count, so it drops by the pulled comments in the same write
+        while self._update_batch(db[ARCHIVE_COLLECTION], {'comments.user_id': user_id}, [
+            {'$set': {'comments_count': {'$subtract': ['$comments_count', {'$size': {'$filter': {
+                'input': '$comments', 'cond': {'$eq': ['$$this.user_id', user_id]}}}}]}}},
+            {'$set': {'comments': {'$filter': {
+                'input': '$comments', 'cond': {'$ne': ['$$this.user_id', user_id]}}}}}
+        ]):
+            time.sleep(self.batch_pause)
+
+        db.suggestions.delete_one({'_id': user_id})
+        while self._delete_batch(db.notifications, {'recipient_id': user_id}):
+            time.sleep(self.batch_pause)
+        db.notification_counts.delete_one({'_id': user_id})
+        for collection in ('analytics_hourly', 'analytics_daily', 'analytics_meme_daily'):
+            while self._delete_batch(db[collection], {'creator_id': user_id}):
+                time.sleep(self.batch_pause)
+        db.users.delete_one({'_id': user_id})
+
+    def _delete_batch(self, collection, query):
+        ids = [doc['_id'] for doc in collection.find(query, {'_id': 1}).limit(self.batch_size)]
+        if ids:
+            collection.bulk_write([DeleteOne({'_id': _id}) for _id in ids], ordered=False)
+        return len(ids)
+
+    def _delete_likes_batch(self, db, user_id):
+        likes = list(db.likes.find({'user_id': user_id}, {'_id': 1, 'meme_id': 1}).limit(self.batch_size))
+        # Archived memes keep a stored likes_count next to these likes. Delete first and only
+        # decrement for likes this call removed, so concurrent sweeps never decrement twice
+        removed = [like['meme_id'] for like in likes if db.likes.delete_one({'_id': like['_id']}).deleted_count]
+        if removed:
+            db[ARCHIVE_COLLECTION].update_many({'_id': {'$in': removed}}, {'$inc': {'likes_count': -1}})
+        return len(likes)
+
+    def _update_batch(self, collection, query, update):
+        ids = [doc['_id'] for doc in collection.find(query, {'_id': 1}).limit(self.batch_size)]
+        if ids:
+            collection.bulk_write([UpdateOne({'_id': _id}, update) for _id in ids], ordered=False)
+        return len(ids)
+
+def init_cleanup(app):
+    """Start the background deletion cleanup worker if enabled in the config."""
+    if not app.config.get('CLEANUP_ENABLED'):
+        return None
+    worker = CleanupWorker(
+        app,
+        batch_size=app.config['CLEANUP_BATCH_SIZE'],
+        batch_pause=app.config['CLEANUP_BATCH_PAUSE'],
+        interval=app.config['CLEANUP_INTERVAL']
+    )
+    app.extensions['cleanup_worker'] = worker
+    return worker
+
+def get_cleanup_worker():
+    """Return the background cleanup worker, or None when it is disabled."""
+    return current_app.extensions.get('cleanup_worker')
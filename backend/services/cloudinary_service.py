@@ -1,23 +1,41 @@
+import time
+import cloudinary.api
 import cloudinary.uploader
+from cloudinary.exceptions import AlreadyExists, BadRequest, NotFound
 from flask import current_app
+from services.profiling_service import record_external_call
+from services.resilience_service import get_breaker, remaining_budget
+
+# Errors caused by the request itself, which say nothing about Cloudinary's health
+CLIENT_ERRORS = (AlreadyExists, BadRequest, NotFound)
+
+def _call(fn, *args, **kwargs):
+    """Call Cloudinary through its circuit breaker, bounded by the request's remaining budget."""
+    timeout = remaining_budget(current_app.config['CLOUDINARY_TIMEOUT'])
+    return get_breaker('cloudinary').call(fn, *args, ignore=CLIENT_ERRORS, timeout=timeout, **kwargs)
 
 def upload_image(image_file, user_id):
     """
     Upload an image to Cloudinary.
     
     Args:
-        image_file (FileStorage): The image file to upload
+        image_file (FileStorage or str): The image file, or the path of an assembled chunked upload
         user_id (str): The ID of the user uploading the image
         
     Returns:
         dict: The upload result containing URL, public_id, etc.
     """
+    started = time.perf_counter()
     try:
-        upload_result = cloudinary.uploader.upload(
+        # Files on disk (chunked uploads) are forwarded to Cloudinary in chunks too
+        upload = cloudinary.uploader.upload_large if isinstance(image_file, str) else cloudinary.uploader.upload
+        upload_result = _call(
+            upload,
             image_file,
             folder=f"meme_platform/users/{user_id}",
             resource_type="image"
         )
+        record_external_call('cloudinary.upload', (time.perf_counter() - started) * 1000)
         return {
             'url': upload_result['secure_url'],
             'public_id': upload_result['public_id'],
@@ -40,8 +58,35 @@ def delete_image(public_id):
         bool: True if deletion was successful
     """
     try:
-        result = cloudinary.uploader.destroy(public_id)
+        result = _call(cloudinary.uploader.destroy, public_id)
         return result.get('result') == 'ok'
     except Exception as e:
         current_app.logger.error(f"Error deleting from Cloudinary: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+# Cloudinary's Admin API accepts at most 100 public IDs per delete call
+BULK_DELETE_LIMIT = 100
+
+def delete_images(public_ids):
+    """
+    Delete many images from Cloudinary using the bulk delete API.
+    
+    Args:
+        public_ids (list): The public IDs of the images
+        
+    Returns:
+        list: The public IDs that were deleted or no longer exist
+    """
+    removed = []
+    for i in range(0, len(public_ids), BULK_DELETE_LIMIT):
+        chunk = public_ids[i:i + BULK_DELETE_LIMIT]
+        started = time.perf_counter()
+        try:
+            result = _call(cloudinary.api.delete_resources, chunk)
+            record_external_call('cloudinary.delete_resources', (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            current_app.logger.error(f"Error bulk deleting from Cloudinary: {str(e)}")
+            continue
+        removed.extend(public_id for public_id, status in result.get('deleted', {}).items()
+                       if status in ('deleted', 'not_found'))
+    return removed
@@ -0,0 +1,68 @@
+import heapq
+from itertools import islice
+
+# Authors per bucket query; each bucket walks (user_id, created_at) index ranges
+DEFAULT_BUCKET_SIZE = 100
+
+def _bucket_cursor(memes, authors, query, projection, batch_size, max_items):
+    """
+    Open a lazy, newest-first cursor over one bucket of authors.
+
+    Args:
+        memes (Collection): The memes collection
+        authors (list): ObjectIds of the authors in this bucket
+        query (dict): Extra filter applied to every bucket (e.g. a created_at bound)
+        projection (dict): The projection for the returned memes
+        batch_size (int): Documents fetched per round trip
+        max_items (int): Upper bound on documents this bucket can contribute
+
+    Returns:
+        Cursor: Memes sorted by created_at, then _id, descending
+    """
+    bucket_query = dict(query, user_id={'$in': authors})
+    return (memes.find(bucket_query, projection)
+            .sort([('created_at', -1), ('_id', -1)])
+            .limit(max_items)
+            .batch_size(batch_size))
+
+def merge_feed(memes, author_ids, limit=10, skip=0, before=None, projection=None,
+               bucket_size=DEFAULT_BUCKET_SIZE):
+    """
+    Read the newest memes across many authors with a lazy k-way merge.
+
+    Authors are split into buckets, each bucket is read newest-first through
+    the (user_id, created_at) index, and the bucket cursors are merged with a
+    heap. A bucket is only read as far as the merge consumes it, so the work
+    done is proportional to skip + limit rather than to the number of authors.
+
+    Args:
+        memes (Collection): The memes collection (any codec)
+        author_ids (list): ObjectIds of the authors to include
+        limit (int): Number of memes to return
+        skip (int): Number of memes to skip
+        before (datetime, optional): Only return memes created before this time
+        projection (dict, optional): The projection for the returned memes
+        bucket_size (int): Authors per bucket query
+
+    Returns:
+        list: Memes sorted newest first
+    """
+    needed = skip + limit
+    if not author_ids or needed <= 0:
+        return []
+
+    # Soft-deleted memes stay hidden until the cleanup worker removes them
+    query = {'deleted_at': None}
+    if before is not None:
+        query['created_at'] = {'$lt': before}
+    # Small first batches: most buckets only contribute a few items to a page
+    batch_size = max(1, min(needed, 2 * limit))
+    buckets = [author_ids[i:i + bucket_size] for i in range(0, len(author_ids), bucket_size)]
+    cursors = [_bucket_cursor(memes, bucket, query, projection, batch_size, needed) for bucket in buckets]
+
+    merged = heapq.merge(*cursors, key=lambda meme: (meme['created_at'], meme['_id']), reverse=True)
+    try:
+        return list(islice(merged, skip, needed))
+    finally:
+        for cursor in cursors:
+            cursor.close()
@@ -0,0 +1,381 @@
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from bson import ObjectId
+from flask import current_app
+from services.mongodb_service import get_shared_db
+
+# Snapshot file layout: magic, node count, edge count, then the raw buffers
+SNAPSHOT_MAGIC = b'MEMEFG01'
+SNAPSHOT_HEADER = struct.Struct('<8sQQ')
+
+# Rebuild the CSR arrays once this many incremental changes have piled up
+DEFAULT_COMPACT_THRESHOLD = 10000
+
+def _build_csr(node_count, edges):
+    """
+    Build sorted CSR offsets/targets from (source, target) integer pairs.
+
+    Args:
+        node_count (int): Number of nodes
+        edges (list): (source, target) pairs
+
+    Returns:
+        tuple: (offsets, targets) arrays
+    """
+    offsets = array('q', [0]) * (node_count + 1)
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+
+    targets = array('i', [0]) * len(edges)
+    cursor = array('q', offsets[:-1]) if node_count else array('q')
+    for source, target in edges:
+        targets[cursor[source]] = target
+        cursor[source] += 1
+
+    # Sort each adjacency slice so membership checks can bisect
+    for i in range(node_count):
+        start, end = offsets[i], offsets[i + 1]
+        if end - start > 1:
+            targets[start:end] = array('i', sorted(targets[start:end]))
+    return offsets, targets
+
+class FollowGraph:
+    """
+    Compact in-memory copy of the follows collection.
+
+    Users are mapped to dense integer IDs and both edge directions are held
+    as CSR arrays (4 bytes per edge per direction). Follows and unfollows
+    since the last rebuild live in small per-node overlay sets that are folded into
+    the arrays once they grow past the compaction threshold.
+    """
+
+    def __init__(self, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._load([], [])
+
+    def _load(self, node_ids, edges):
+        self._node_ids = list(node_ids)
+        self._index = {node_id: i for i, node_id in enumerate(self._node_ids)}
+        self._out_offsets, self._out_targets = _build_csr(len(self._node_ids), edges)
+        self._in_offsets, self._in_targets = _build_csr(
+            len(self._node_ids), [(target, source) for source, target in edges])
+        # Overlay of changes since the last rebuild: node -> set of nodes
+        self._added_out, self._added_in = {}, {}
+        self._removed_out, self._removed_in = {}, {}
+        self._pending_changes = 0
+
+    def _node(self, user_id, create=False):
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        node = self._index.get(user_id)
+        if node is None and create:
+            node = len(self._node_ids)
+            self._node_ids.append(user_id)
+            self._index[user_id] = node
+        return node
+
+    @staticmethod
+    def _slice(offsets, targets, node):
+        if node + 1 >= len(offsets):
+            return targets[0:0]
+        return targets[offsets[node]:offsets[node + 1]]
+
+    @staticmethod
+    def _contains(offsets, targets, node, target):
+        if node + 1 >= len(offsets):
+            return False
+        start, end = offsets[node], offsets[node + 1]
+        i = bisect_left(targets, target, start, end)
+        return i < end and targets[i] == target
+
+    def _has_edge(self, source, target):
+        if target in self._added_out.get(source, ()):
+            return True
+        if target in self._removed_out.get(source, ()):
+            return False
+        return self._contains(self._out_offsets, self._out_targets, source, target)
+
+    def _neighbours(self, node, outgoing):
+        if outgoing:
+            offsets, targets = self._out_offsets, self._out_targets
+            added, removed = self._added_out, self._removed_out
+        else:
+            offsets, targets = self._in_offsets, self._in_targets
+            added, removed = self._added_in, self._removed_in
+        result = set(self._slice(offsets, targets, node))
+        result |= added.get(node, set())
+        result -= removed.get(node, set())
+        return result
+
+    @staticmethod
+    def _overlay_add(overlay, a, b):
+        overlay.setdefault(a, set()).add(b)
+
+    @staticmethod
+    def _overlay_discard(overlay, a, b):
+        nodes = overlay.get(a)
+        if nodes is not None:
+            nodes.discard(b)
+            if not nodes:
+                del overlay[a]
+
+    def add_edge(self, follower_id, following_id):
+        """Record that follower_id now follows following_id."""
+        self.add_edges(follower_id, [following_id])
+
+    def add_edges(self, follower_id, following_ids):
+        """Record that follower_id now follows every user in following_ids."""
+        with self._lock:
+            source = self._node(follower_id, True)
+            for following_id in following_ids:
+                self._add(source, self._node(following_id, True))
+            self._maybe_compact()
+
+    def _add(self, source, target):
+        self._overlay_discard(self._removed_out, source, target)
+        self._overlay_discard(self._removed_in, target, source)
+        if not self._contains(self._out_offsets, self._out_targets, source, target):
+            self._overlay_add(self._added_out, source, target)
+            self._overlay_add(self._added_in, target, source)
+        self._pending_changes += 1
+
+    def remove_edge(self, follower_id, following_id):
+        """Record that follower_id no longer follows following_id."""
+        self.remove_edges(follower_id, [following_id])
+
+    def remove_edges(self, follower_id, following_ids):
+        """Record that follower_id no longer follows any user in following_ids."""
+        with self._lock:
+            source = self._node(follower_id)
+            if source is None:
+                return
+            for following_id in following_ids:
+                target = self._node(following_id)
+                if target is not None:
+                    self._remove(source, target)
+            self._maybe_compact()
+
+    def _remove(self, source, target):
+        self._overlay_discard(self._added_out, source, target)
+        self._overlay_discard(self._added_in, target, source)
+        if self._contains(self._out_offsets, self._out_targets, source, target):
+            self._overlay_add(self._removed_out, source, target)
+            self._overlay_add(self._removed_in, target, source)
+        self._pending_changes += 1
+
+    def _maybe_compact(self):
+        if self._pending_changes >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Fold the incremental overlay back into the CSR arrays."""
+        with self._lock:
+            self._load(self._node_ids, list(self._edges()))
+
+    def _edges(self):
+        offsets, targets = self._out_offsets, self._out_targets
+        for source in range(len(offsets) - 1):
+            removed = self._removed_out.get(source, ())
+            for target in targets[offsets[source]:offsets[source + 1]]:
+                if target not in removed:
+                    yield source, target
+        for source, nodes in self._added_out.items():
+            for target in nodes:
+                yield source, target
+
+    def following(self, user_id):
+        """
+        Get the IDs of users that a user follows.
+
+        Args:
+            user_id (str or ObjectId): The user ID
+
+        Returns:
+            list: ObjectIds of followed users
+        """
+        with self._lock:
+            node = self._node(user_id)
+            if node is None:
+                return []
+            return [self._node_ids[i] for i in self._neighbours(node, True)]
+
+    def followers(self, user_id):
+        """
+        Get the IDs of users that follow a user.
+
+        Args:
+            user_id (str or ObjectId): The user ID
+
+        Returns:
+            list: ObjectIds of followers
+        """
+        with self._lock:
+            node = self._node(user_id)
+            if node is None:
+                return []
+            return [self._node_ids[i] for i in self._neighbours(node, False)]
+
+    def following_count(self, user_id):
+        """Return how many users a user follows."""
+        with self._lock:
+            node = self._node(user_id)
+            if node is None:
+                return 0
+            if node not in self._added_out and node not in self._removed_out:
+                return len(self._slice(self._out_offsets, self._out_targets, node))
+            return len(self._neighbours(node, True))
+
+    def follower_count(self, user_id):
+        """Return how many users follow a user."""
+        with self._lock:
+            node = self._node(user_id)
+            if node is None:
+                return 0
+            if node not in self._added_in and node not in self._removed_in:
+                return len(self._slice(self._in_offsets, self._in_targets, node))
+            return len(self._neighbours(node, False))
+
+    def is_following(self, follower_id, following_id):
+        """Check if follower_id follows following_id."""
+        with self._lock:
+            source, target = self._node(follower_id), self._node(following_id)
+            if source is None or target is None:
+                return False
+            return self._has_edge(source, target)
+
+    def is_mutual(self, user_a, user_b):
+        """Check if two users follow each other."""
+        return self.is_following(user_a, user_b) and self.is_following(user_b, user_a)
+
+    def load_from_db(self, db, batch_size=10000):
+        """
+        Rebuild the graph from the follows collection.
+
+        Args:
+            db (Database): The MongoDB database handle
+            batch_size (int): Cursor batch size
+        """
+        index = {}
+        node_ids = []
+        edges = []
+        cursor = db.follows.find({}, {'_id': 0, 'follower_id': 1, 'following_id': 1},
+                                 batch_size=batch_size)
+        for follow in cursor:
+            pair = []
+            for user_id in (follow['follower_id'], follow['following_id']):
+                node = index.get(user_id)
+                if node is None:
+                    node = index[user_id] = len(node_ids)
+                    node_ids.append(user_id)
+                pair.append(node)
+            edges.append(tuple(pair))
+        with self._lock:
+            self._load(node_ids, edges)
+
+    def save_snapshot(self, path):
+        """
+        Write the graph to a snapshot file, atomically replacing any old one.
+
+        Args:
+            path (str): The snapshot file path
+        """
+        with self._lock:
+            self.compact()
+            tmp_path = f"{path}.{os.getpid()}.tmp"  # workers may rewrite the snapshot concurrently
+            with open(tmp_path, 'wb') as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(self._node_ids), len(self._out_targets)))
+                f.write(b''.join(node_id.binary for node_id in self._node_ids))
+                self._out_offsets.tofile(f)
+                self._out_targets.tofile(f)
+            os.replace(tmp_path, path)
+
+    def load_snapshot(self, path):
+        """
+        Load the graph from a snapshot file written by save_snapshot.
+
+        Args:
+            path (str): The snapshot file path
+        """
+        with open(path, 'rb') as f:
+            magic, node_count, edge_count = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a follow graph snapshot: {path}")
+            raw_ids = f.read(12 * node_count)
+            node_ids = [ObjectId(raw_ids[i:i + 12]) for i in range(0, len(raw_ids), 12)]
+            offsets = array('q')
+            offsets.fromfile(f, node_count + 1)
+            targets = array('i')
+            targets.fromfile(f, edge_count)
+        edges = [(source, targets[i])
+                 for source in range(node_count)
+                 for i in range(offsets[source], offsets[source + 1])]
+        with self._lock:
+            self._load(node_ids, edges)
+
+def _refresh_periodically(app, graph, interval, snapshot_path=None, reconcile_now=False):
+    if not reconcile_now:
+        time.sleep(interval)
+    while True:
+        try:
+            graph.load_from_db(get_shared_db(app))
+            if snapshot_path:
+                graph.save_snapshot(snapshot_path)
+        except Exception as e:
+            app.logger.error(f"Error refreshing follow graph: {str(e)}")
+        time.sleep(interval)
+
+def init_follow_graph(app):
+    """
+    Load the follow graph if it is enabled in the config.
+
+    The graph is loaded from GRAPH_SNAPSHOT_PATH when the file exists, so
+    a worker starts serving quickly, and is then reconciled with the follows
+    collection in the background; otherwise it is built from the collection
+    and a snapshot is written for the next start.
+
+    Each worker holds its own copy and only sees its own follows right
+    away. Follows made through other workers show up at the next reload,
+    so the graph is at most GRAPH_RELOAD_INTERVAL seconds (plus the time a
+    reload takes) behind the follows collection. A snapshot is rewritten
+    after every reload.
+
+    Raises:
+        ValueError: If a snapshot is used with GRAPH_RELOAD_INTERVAL set to 0,
+            which would leave the graph stale for good
+    """
+    if not app.config.get('GRAPH_SERVICE_ENABLED'):
+        return None
+
+    interval = app.config.get('GRAPH_RELOAD_INTERVAL')
+    snapshot_path = app.config.get('GRAPH_SNAPSHOT_PATH')
+    if snapshot_path and not interval:
+        raise ValueError("GRAPH_SNAPSHOT_PATH requires a GRAPH_RELOAD_INTERVAL above 0")
+
+    graph = FollowGraph(compact_threshold=app.config['GRAPH_COMPACT_THRESHOLD'])
+    from_snapshot = bool(snapshot_path and os.path.exists(snapshot_path))
+    if from_snapshot:
+        graph.load_snapshot(snapshot_path)
+    else:
+        graph.load_from_db(get_shared_db(app))
+        if snapshot_path:
+            graph.save_snapshot(snapshot_path)
+
+    # Reload to pick up other workers' writes; a snapshot may be arbitrarily old, so reconcile it now
+    if interval:
+        threading.Thread(target=_refresh_periodically,
+                         args=(app, graph, interval, snapshot_path, from_snapshot),
+                         name='follow-graph-refresh', daemon=True).start()
+
+    app.extensions['follow_graph'] = graph
+    return graph
+
+def get_follow_graph():
+    """Return the in-memory follow graph, or None when it is disabled."""
+    return current_app.extensions.get('follow_graph')
@@ -0,0 +1,54 @@
+from bson import ObjectId
+from flask import current_app
+from services.job_service import job
+from services.mongodb_service import get_db
+from services.cloudinary_service import delete_images
+from services.graph_service import get_follow_graph
+from services.suggestion_service import compute_suggestions
+from services.upload_service import purge_stale_uploads
+from services.ranking_service import compute_affinity
+from services.author_service import SNAPSHOT_FIELDS, propagate_author_snapshot
+
+@job('cloudinary.delete_images', concurrency=2, max_attempts=10)
+def delete_cloudinary_images(payload):
+    """Delete images that a cleanup batch could not remove; retried until Cloudinary accepts them."""
+    public_ids = payload['public_ids']
+    remaining = set(public_ids) - set(delete_images(public_ids))
+    if remaining:
+        raise RuntimeError(f"{len(remaining)} of {len(public_ids)} images were not deleted")
+
+@job('suggestions.refresh', concurrency=4)
+def refresh_suggestions(payload):
+    """Recompute one user's "people you may know" list."""
+    compute_suggestions(get_db(), ObjectId(payload['user_id']),
+                        current_app.config['SUGGESTIONS_LIMIT'], get_follow_graph())
+
+@job('ranking.affinity', concurrency=2)
+def refresh_affinity(payload):
+    """Recompute a viewer's author affinity for the ranked feed."""
+    compute_affinity(get_db(), ObjectId(payload['user_id']), current_app.config['RANKING_AFFINITY_DAYS'])
+
+# One at a time across the cluster: profile-change fan-out is paced, never bursty
+@job('authors.propagate', concurrency=1)
+def propagate_author(payload):
+    """Rewrite a user's author snapshot in their memes and comments after a profile change."""
+    db = get_db()
+    projection = {field: 1 for field in SNAPSHOT_FIELDS}
+    user = db.users.find_one({'_id': ObjectId(payload['user_id']), 'deleted_at': None}, projection)
+    if user is None:
+        return  # Deleted accounts are cleaned up instead
+    config = current_app.config
+    propagate_author_snapshot(db, user, config['AUTHOR_SNAPSHOT_BATCH_SIZE'], config['AUTHOR_SNAPSHOT_BATCH_PAUSE'])
+
+@job('uploads.purge_stale', concurrency=1)
+def purge_uploads(payload):
+    """Remove abandoned chunked uploads."""
+    purge_stale_uploads()
+
+@job('data.reconcile', concurrency=1)
+def reconcile(payload):
+    """Rebuild indexes and derived state (the `flask data reconcile` steps)."""
+    from commands.data_commands import RECONCILERS  # Import here to avoid circular imports
+    db = get_db()
+    for step in RECONCILERS:
+        step(db)
@@ -0,0 +1,416 @@
+import datetime
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from flask import current_app
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from services.mongodb_service import get_shared_db
+
+# Registered job types: name -> JobType
+JOB_TYPES = {}
+
+class JobType:
+    """A registered job handler and its execution limits."""
+
+    def __init__(self, name, handler, concurrency=None, max_attempts=None):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+def job(name, concurrency=None, max_attempts=None):
+    """
+    Register a function as the handler of a job type.
+
+    The handler is called with the job's payload dict inside an app context;
+    raising marks the attempt as failed and schedules a retry.
+
+    Args:
+        name (str): The job type
+        concurrency (int, optional): Most jobs of this type running at once, across all workers
+        max_attempts (int, optional): Attempts before the job is marked failed
+    """
+    def decorator(handler):
+        JOB_TYPES[name] = JobType(name, handler, concurrency, max_attempts)
+        return handler
+    return decorator
+
+class JobQueue:
+    """
+    Durable job storage on top of the jobs collection.
+
+    Jobs are claimed atomically with find_one_and_update, which sets a lease
+    owned by the claiming worker. A worker that dies simply stops renewing
+    its leases and the jobs are claimed again once the leases expire. Every
+    state change after the claim is conditional on the worker still owning
+    the job, so a worker that lost its lease cannot overwrite the new owner.
+    Only needs a Database handle, so it works against any mongod.
+    """
+
+    def __init__(self, db, lease_seconds=60, max_attempts=5, backoff_base=5, backoff_max=3600):
+        self.jobs = db.jobs
+        self.schedules = db.job_schedules
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def enqueue(self, job_type, payload=None, run_at=None, dedupe_key=None):
+        """
+        Add a job to the queue.
+
+        Args:
+            job_type (str): A registered job type
+            payload (dict, optional): Arguments for the handler
+            run_at (datetime, optional): Earliest time to run, now by default
+            dedupe_key (str, optional): Skip the job if one with this key is still queued;
+                the key is dropped when a worker claims the job, so an enqueue made
+                while it runs is kept and sees whatever the running job missed
+
+        Returns:
+            ObjectId: The job ID, or None if a duplicate was queued
+        """
+        job_type_options = JOB_TYPES.get(job_type)
+        now = datetime.datetime.utcnow()
+        doc = {
+            'type': job_type,
+            'payload': payload or {},
+            'state': 'queued',
+            'run_at': run_at or now,
+            'attempts': 0,
+            'max_attempts': (job_type_options and job_type_options.max_attempts) or self.max_attempts,
+            'created_at': now
+        }
+        if dedupe_key is not None:
+            doc['dedupe_key'] = dedupe_key
+        try:
+            return self.jobs.insert_one(doc).inserted_id
+        except DuplicateKeyError:
+            return None
+
+    def claim(self, worker_id, job_types):
+        """
+        Atomically claim the next due job, including jobs whose lease expired.
+
+        Args:
+            worker_id (str): The claiming worker
+            job_types (list): Job types the worker may run
+
+        Returns:
+            dict: The claimed job, or None if nothing is due
+        """
+        now = datetime.datetime.utcnow()
+        return self.jobs.find_one_and_update(
+            {
+                'type': {'$in': job_types},
+                '$or': [
+                    {'state': 'queued', 'run_at': {'$lte': now}},
+                    {'state': 'running', 'lease_until': {'$lt': now}}
+                ]
+            },
+            {
+                '$set': {
+                    'state': 'running',
+                    'worker': worker_id,
+                    'lease_until': now + datetime.timedelta(seconds=self.lease_seconds),
+                    'started_at': now
+                },
+                '$inc': {'attempts': 1},
+                '$unset': {'dedupe_key': ''}
+            },
+            sort=[('run_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _owned(self, job, worker_id):
+        return {'_id': job['_id'], 'worker': worker_id, 'state': 'running', 'attempts': job['attempts']}
+
+    def over_limit(self, job):
+        """Check whether a just-claimed job exceeds its type's concurrency limit."""
+        job_type = JOB_TYPES.get(job['type'])
+        if job_type is None or not job_type.concurrency:
+            return False
+        running = self.jobs.count_documents({
+            'type': job['type'],
+            'state': 'running',
+            'lease_until': {'$gte': datetime.datetime.utcnow()}
+        })
+        return running > job_type.concurrency
+
+    def release(self, job, worker_id):
+        """Give a claimed job back without counting the attempt."""
+        self.jobs.update_one(self._owned(job, worker_id), {
+            '$set': {'state': 'queued'},
+            '$inc': {'attempts': -1},
+            '$unset': {'worker': '', 'lease_until': ''}
+        })
+
+    def heartbeat(self, worker_id, job_ids):
+        """Extend the leases of jobs a worker is still running."""
+        self.jobs.update_many(
+            {'_id': {'$in': job_ids}, 'worker': worker_id, 'state': 'running'},
+            {'$set': {'lease_until': datetime.datetime.utcnow() + datetime.timedelta(seconds=self.lease_seconds)}}
+        )
+
+    def complete(self, job, worker_id, duration_ms):
+        """Mark a claimed job as done."""
+        now = datetime.datetime.utcnow()
+        self.jobs.update_one(self._owned(job, worker_id), {
+            '$set': {'state': 'done', 'finished_at': now, 'duration_ms': duration_ms,
+                     'lag_ms': (job['started_at'] - job['run_at']).total_seconds() * 1000},
+            '$unset': {'lease_until': ''}
+        })
+
+    def fail(self, job, worker_id, error):
+        """
+        Record a failed attempt, retrying with exponential backoff until max_attempts.
+
+        Returns:
+            bool: True if the job will be retried
+        """
+        now = datetime.datetime.utcnow()
+        if job['attempts'] >= job['max_attempts']:
+            self.jobs.update_one(self._owned(job, worker_id), {
+                '$set': {'state': 'failed', 'finished_at': now, 'last_error': error},
+                '$unset': {'lease_until': ''}
+            })
+            return False
+
+        # Exponential backoff with jitter so failing jobs do not retry in lockstep
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (job['attempts'] - 1))
+        delay *= random.uniform(0.5, 1.0)
+        self.jobs.update_one(self._owned(job, worker_id), {
+            '$set': {'state': 'queued', 'run_at': now + datetime.timedelta(seconds=delay), 'last_error': error},
+            '$unset': {'worker': '', 'lease_until': ''}
+        })
+        return True
+
+    def schedule(self, name, job_type, interval, payload=None):
+        """
+        Create or update a recurring job; safe to call on every startup.
+
+        Args:
+            name (str): The schedule name
+            job_type (str): A registered job type
+            interval (int): Seconds between runs
+            payload (dict, optional): Arguments for the handler
+        """
+        self.schedules.update_one(
+            {'_id': name},
+            {'$set': {'type': job_type, 'interval': interval, 'payload': payload or {}},
+             '$setOnInsert': {'next_run_at': datetime.datetime.utcnow()}},
+            upsert=True
+        )
+
+    def enqueue_due(self):
+        """
+        Enqueue a job for every schedule that is due.
+
+        Safe to call from every worker: each due run is advanced with a
+        compare-and-set on next_run_at, so only one worker enqueues it.
+
+        Returns:
+            int: Number of jobs enqueued
+        """
+        now = datetime.datetime.utcnow()
+        enqueued = 0
+        for schedule in self.schedules.find({'next_run_at': {'$lte': now}}):
+            result = self.schedules.update_one(
+                {'_id': schedule['_id'], 'next_run_at': schedule['next_run_at']},
+                {'$set': {'next_run_at': now + datetime.timedelta(seconds=schedule['interval'])}}
+            )
+            if result.modified_count:
+                self.enqueue(schedule['type'], schedule.get('payload'), dedupe_key=f"schedule:{schedule['_id']}")
+                enqueued += 1
+        return enqueued
+
+    def stats(self):
+        """
+        Get per-type queue depth, lag and throughput.
+
+        Returns:
+            dict: job type -> counts by state, lag_seconds of the oldest due job,
+                completions in the last minute and hour, and average duration
+        """
+        now = datetime.datetime.utcnow()
+        stats = {}
+
+        def entry(job_type):
+            return stats.setdefault(job_type, {
+                'queued': 0, 'running': 0, 'done': 0, 'failed': 0, 'lag_seconds': 0,
+                'completed_last_minute': 0, 'completed_last_hour': 0, 'avg_duration_ms': None
+            })
+
+        for group in self.jobs.aggregate([
+            {'$group': {'_id': {'type': '$type', 'state': '$state'}, 'count': {'$sum': 1}}}
+        ]):
+            entry(group['_id']['type'])[group['_id']['state']] = group['count']
+
+        for group in self.jobs.aggregate([
+            {'$match': {'state': 'queued', 'run_at': {'$lte': now}}},
+            {'$group': {'_id': '$type', 'oldest': {'$min': '$run_at'}}}
+        ]):
+            entry(group['_id'])['lag_seconds'] = (now - group['oldest']).total_seconds()
+
+        minute_ago = now - datetime.timedelta(minutes=1)
+        for group in self.jobs.aggregate([
+            {'$match': {'state': 'done', 'finished_at': {'$gte': now - datetime.timedelta(hours=1)}}},
+            {'$group': {
+                '_id': '$type',
+                'last_hour': {'$sum': 1},
+                'last_minute': {'$sum': {'$cond': [{'$gte': ['$finished_at', minute_ago]}, 1, 0]}},
+                'avg_duration_ms': {'$avg': '$duration_ms'}
+            }}
+        ]):
+            job_stats = entry(group['_id'])
+            job_stats['completed_last_minute'] = group['last_minute']
+            job_stats['completed_last_hour'] = group['last_hour']
+            job_stats['avg_duration_ms'] = group['avg_duration_ms']
+        return stats
+
+class JobWorker:
+    """
+    Runs claimed jobs on a pool of threads.
+
+    A heartbeat thread renews the leases of running jobs and enqueues due
+    recurring jobs. Run several workers (threads, processes or hosts) to
+    scale out; they coordinate only through the jobs collection.
+    """
+
+    def __init__(self, app, threads=4, poll_interval=1.0, job_types=None):
+        self.app = app
+        self.queue = _queue_for(app)
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.job_types = job_types
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running = set()
+        self._cooldown = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start the worker and heartbeat threads."""
+        for i in range(self.threads):
+            self._threads.append(threading.Thread(target=self._loop, name=f'job-worker-{i}', daemon=True))
+        self._threads.append(threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=30):
+        """Stop claiming jobs and wait for running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _claimable_types(self):
+        now = time.monotonic()
+        names = self.job_types or list(JOB_TYPES)
+        with self._lock:
+            return [name for name in names if self._cooldown.get(name, 0) <= now]
+
+    def _claim(self):
+        job_types = self._claimable_types()
+        if not job_types:
+            return None
+        job = self.queue.claim(self.worker_id, job_types)
+        if job is None:
+            return None
+
+        if job['type'] not in JOB_TYPES:
+            self.queue.fail(job, self.worker_id, f"Unknown job type: {job['type']}")
+            return None
+        if job['attempts'] > job['max_attempts']:
+            # Its lease kept expiring, e.g. the worker running it crashed every time
+            self.queue.fail(job, self.worker_id, 'Lease expired on the final attempt')
+            return None
+        if self.queue.over_limit(job):
+            # Another worker filled the type's last slot first; back off this type briefly
+            self.queue.release(job, self.worker_id)
+            with self._lock:
+                self._cooldown[job['type']] = time.monotonic() + self.poll_interval
+            return None
+        return job
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                self.app.logger.error(f"Error claiming job: {str(e)}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._execute(job)
+
+    def _execute(self, job):
+        with self._lock:
+            self._running.add(job['_id'])
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                JOB_TYPES[job['type']].handler(job.get('payload') or {})
+        except Exception as e:
+            self.app.logger.error(f"Job {job['type']} {job['_id']} failed: {str(e)}")
+            self.queue.fail(job, self.worker_id, str(e))
+        else:
+            self.queue.complete(job, self.worker_id, (time.perf_counter() - started) * 1000)
+        finally:
+            with self._lock:
+                self._running.discard(job['_id'])
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            try:
+                with self._lock:
+                    running = list(self._running)
+                if running:
+                    self.queue.heartbeat(self.worker_id, running)
+                self.queue.enqueue_due()
+            except Exception as e:
+                self.app.logger.error(f"Error in job heartbeat: {str(e)}")
+
+def _queue_for(app):
+    config = app.config
+    return JobQueue(
+        get_shared_db(app),
+        lease_seconds=config['JOBS_LEASE_SECONDS'],
+        max_attempts=config['JOBS_MAX_ATTEMPTS'],
+        backoff_base=config['JOBS_BACKOFF_BASE'],
+        backoff_max=config['JOBS_BACKOFF_MAX']
+    )
+
+def get_job_queue():
+    """Return a job queue bound to the current app's database."""
+    return _queue_for(current_app)
+
+def enqueue_job(job_type, payload=None, run_at=None, dedupe_key=None):
+    """Enqueue a job from request or worker code; see JobQueue.enqueue."""
+    return get_job_queue().enqueue(job_type, payload, run_at, dedupe_key)
+
+def init_jobs(app):
+    """
+    Register job handlers and recurring schedules, and start an embedded worker if enabled.
+
+    Dedicated workers are started with `flask --app app jobs worker`.
+    """
+    import services.job_handlers  # noqa: F401 -- registers the handlers; imported here to avoid circular imports
+
+    with app.app_context():
+        queue = _queue_for(app)
+        for name, (job_type, interval) in app.config['JOB_SCHEDULES'].items():
+            queue.schedule(name, job_type, interval)
+
+    if not app.config.get('JOBS_EMBEDDED_WORKER'):
+        return None
+    worker = JobWorker(app, threads=app.config['JOBS_WORKER_THREADS'],
+                       poll_interval=app.config['JOBS_POLL_INTERVAL'])
+    worker.start()
+    app.extensions['job_worker'] = worker
+    return worker
@@ -0,0 +1,43 @@
+from flask import current_app
+from services.mongodb_service import get_shared_db, close_shared_clients
+
+def warm_up(app):
+    """
+    Prepare a freshly started worker before it accepts traffic.
+    
+    Opens the Mongo connection pool and touches the hot indexes so the
+    first requests do not pay for connection setup or cold caches.
+    
+    Args:
+        app (Flask): The application to warm up
+    """
+    db = get_shared_db(app)
+    db.command('ping')
+    
+    # Pull the indexes used by feed and profile reads into the server cache
+    db.memes.find_one({}, {'_id': 1})
+    db.users.find_one({}, {'_id': 1})
+    db.follows.find_one({}, {'_id': 1})
+    
+    app.extensions['ready'] = True
+    app.logger.info("Worker warm-up complete")
+
+def shutdown(app):
+    """
+    Drain a worker: fail readiness checks, flush buffered writes and close connections.
+    
+    Args:
+        app (Flask): The application being shut down
+    """
+    app.extensions['ready'] = False
+    
+    like_buffer = app.extensions.get('like_buffer')
+    if like_buffer is not None:
+        like_buffer.close()
+    
+    close_shared_clients()
+    app.logger.info("Worker shut down")
+
+def is_ready():
+    """Return True once the worker has warmed up and is not draining."""
+    return current_app.extensions.get('ready', False)
@@ -0,0 +1,193 @@
+import atexit
+import threading
+import time
+from concurrent.futures import Future
+from flask import current_app
+from pymongo import UpdateOne
+from pymongo.write_concern import WriteConcern
+from services.mongodb_service import get_shared_db
+
+# Write concerns for the LIKE_BUFFER_DURABILITY setting
+DURABILITY_LEVELS = {
+    'acknowledged': WriteConcern(w=1),
+    'journaled': WriteConcern(w=1, j=True),
+    'majority': WriteConcern(w='majority', j=True),
+}
+
+class LikeBuffer:
+    """
+    Coalesces like/unlike intents per meme and flushes them in one bulk_write.
+
+    Request threads enqueue an intent and block on a Future until the next
+    flush resolves it, so callers still get an exact per-user result. Only
+    the flusher writes while it runs, so intents are applied in arrival order;
+    when the buffer is full, callers wait for it to take the pending batch.
+    """
+
+    def __init__(self, app, flush_interval=0.05, max_pending=10000, durability='acknowledged'):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown like buffer durability: {durability}")
+        self.app = app
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.write_concern = DURABILITY_LEVELS[durability]
+        self._pending = []
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='like-buffer', daemon=True)
+        self._thread.start()
+
+    def like(self, meme_id, user_id):
+        """
+        Buffer a like and wait for its result.
+
+        Args:
+            meme_id (ObjectId): The meme being liked
+            user_id (ObjectId): The user liking the meme
+
+        Returns:
+            bool: True if the like was added, False if already liked
+        """
+        return self._submit(meme_id, user_id, True)
+
+    def unlike(self, meme_id, user_id):
+        """
+        Buffer an unlike and wait for its result.
+
+        Args:
+            meme_id (ObjectId): The meme being unliked
+            user_id (ObjectId): The user removing the like
+
+        Returns:
+            bool: True if the like was removed, False if not previously liked
+        """
+        return self._submit(meme_id, user_id, False)
+
+    def _submit(self, meme_id, user_id, liked):
+        future = Future()
+        with self._lock:
+            # Full: flush now and wait for room rather than writing around the flusher
+            while not self._closed and len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+                self._room.wait()
+            if self._closed:
+                future = None
+            else:
+                self._pending.append((meme_id, user_id, liked, future))
+                if len(self._pending) == 1:
+                    self._wakeup.set()
+        if future is None:
+            # Shutting down; write directly once the flusher has applied the last batch
+            self._thread.join()
+            return self._flush_batch([(meme_id, user_id, liked, None)])[0]
+        return future.result()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            if not self._closed and len(self._pending) < self.max_pending:
+                # Hold the window open so concurrent intents can join the batch
+                time.sleep(self.flush_interval)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._wakeup.clear()
+                closed = self._closed
+                self._room.notify_all()
+            if batch:
+                try:
+                    results = self._flush_batch(batch)
+                except Exception as e:
+                    for *_, future in batch:
+                        future.set_exception(e)
+                else:
+                    for (*_, future), result in zip(batch, results):
+                        future.set_result(result)
+            if closed:
+                return
+
+    def _flush_batch(self, batch):
+        """
+        Apply a batch of intents with one read and one bulk_write.
+
+        Args:
+            batch (list): (meme_id, user_id, liked, future) tuples in arrival order
+
+        Returns:
+            list: The per-intent results, aligned with the batch
+        """
+        db = get_shared_db(self.app)
+        meme_ids = list({meme_id for meme_id, *_ in batch})
+        user_ids = list({user_id for _, user_id, *_ in batch})
+
+        # Only read back the likes that belong to users in this batch
+        current = {
+            doc['_id']: set(doc['hits'])
+            for doc in db.memes.aggregate([
+                {'$match': {'_id': {'$in': meme_ids}}},
+                {'$project': {'hits': {'$setIntersection': [{'$ifNull': ['$likes', []]}, user_ids]}}}
+            ])
+        }
+
+        # Replay intents in order so each caller sees its own outcome
+        results = []
+        final = {}
+        for meme_id, user_id, liked, _ in batch:
+            likes = current.get(meme_id)
+            if likes is None:
+                results.append(False)
+                continue
+            results.append((user_id in likes) != liked)
+            if liked:
+                likes.add(user_id)
+            else:
+                likes.discard(user_id)
+            final[(meme_id, user_id)] = liked
+
+        additions = {}
+        removals = {}
+        for (meme_id, user_id), liked in final.items():
+            target = additions if liked else removals
+            target.setdefault(meme_id, []).append(user_id)
+
+        operations = [
+            UpdateOne({'_id': meme_id}, {'$addToSet': {'likes': {'$each': users}}})
+            for meme_id, users in additions.items()
+        ] + [
+            UpdateOne({'_id': meme_id}, {'$pull': {'likes': {'$in': users}}})
+            for meme_id, users in removals.items()
+        ]
+        if operations:
+            memes = db.memes.with_options(write_concern=self.write_concern)
+            memes.bulk_write(operations, ordered=False)
+
+        return results
+
+    def close(self):
+        """Flush any pending intents and stop the flusher thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.set()
+            self._room.notify_all()
+        self._thread.join()
+
+def init_like_buffer(app):
+    """Start the like write buffer if it is enabled in the config."""
+    if not app.config.get('LIKE_BUFFER_ENABLED'):
+        return None
+    buffer = LikeBuffer(
+        app,
+        flush_interval=app.config['LIKE_BUFFER_FLUSH_INTERVAL'],
+        max_pending=app.config['LIKE_BUFFER_MAX_PENDING'],
+        durability=app.config['LIKE_BUFFER_DURABILITY']
+    )
+    app.extensions['like_buffer'] = buffer
+    atexit.register(buffer.close)
+    return buffer
+
+def get_like_buffer():
+    """Return the running like buffer, or None when buffering is disabled."""
+    return current_app.extensions.get('like_buffer')
@@ -0,0 +1,100 @@
+import copy
+from flask import g
+from services.mongodb_service import get_db
+from services.resilience_service import hedged_read
+
+class EntityLoader:
+    """
+    Request-scoped batching loader for documents fetched by _id.
+
+    IDs passed to prime() are collected until the next load, then fetched
+    together with a single $in query. Results (including misses) are
+    memoized for the rest of the request, and callers receive copies so
+    they can freely mutate what they get back.
+    """
+
+    def __init__(self, collection_name, projection=None, base_query=None):
+        self.collection_name = collection_name
+        self.projection = projection
+        self.base_query = base_query or {}
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, ids):
+        """Queue IDs to be fetched with the next batch."""
+        self._pending.update(_id for _id in ids if _id not in self._cache)
+
+    def load(self, _id):
+        """
+        Load one document, batching it with every primed ID.
+
+        Args:
+            _id (ObjectId): The document ID
+
+        Returns:
+            dict: A copy of the document, or None if not found
+        """
+        if _id not in self._cache:
+            self._pending.add(_id)
+            self._flush()
+        return copy.deepcopy(self._cache[_id])
+
+    def load_many(self, ids):
+        """
+        Load several documents with at most one query.
+
+        Args:
+            ids (list): The document IDs
+
+        Returns:
+            list: Copies of the documents (None where not found), aligned with ids
+        """
+        self.prime(ids)
+        self._flush()
+        return [copy.deepcopy(self._cache[_id]) for _id in ids]
+
+    def clear(self, _id=None):
+        """Forget a cached document, or all of them, after a write."""
+        if _id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(_id, None)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        ids = list(self._pending)
+        self._pending.clear()
+        query = dict(self.base_query, _id={'$in': ids})
+        for _id in ids:
+            self._cache[_id] = None
+        collection = get_db()[self.collection_name]
+        # By-_id batches are idempotent hot reads, safe to hedge
+        for doc in hedged_read(lambda: list(collection.find(query, self.projection))):
+            self._cache[doc['_id']] = doc
+
+def get_loader(collection_name, profile, projection=None, base_query=None):
+    """
+    Return the loader for a collection and projection profile in this request.
+
+    Args:
+        collection_name (str): The collection to read from
+        profile (hashable): Key distinguishing loaders with different projections
+        projection (dict, optional): The projection used for every fetch
+        base_query (dict, optional): Extra filter applied to every fetch
+
+    Returns:
+        EntityLoader: The request-scoped loader
+    """
+    loaders = g.setdefault('loaders', {})
+    key = (collection_name, profile)
+    loader = loaders.get(key)
+    if loader is None:
+        loader = loaders[key] = EntityLoader(collection_name, projection, base_query)
+    return loader
+
+def clear_loaders(collection_name, _id=None):
+    """Invalidate cached documents of a collection across all profiles."""
+    for (name, _), loader in g.get('loaders', {}).items():
+        if name == collection_name:
+            loader.clear(_id)
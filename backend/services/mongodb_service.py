@@ -1,49 +1,218 @@
-from flask import current_app, g
+import threading
+import time
+from flask import current_app, g, has_request_context, request
 from pymongo import MongoClient
+from pymongo.read_preferences import SecondaryPreferred
+from services.resilience_service import inject_mongo_fault
+
+# Header carrying the time of the client's last write, echoed back on reads
+LAST_WRITE_HEADER = 'X-Last-Write'
+
+# Process-wide pooled clients, keyed by Mongo URI
+_shared_clients = {}
+_clients_lock = threading.Lock()
 
 def get_db():
-    """Return a MongoDB client instance."""
+    """Return the MongoDB database handle for the current request."""
     if 'db' not in g:
-        client = MongoClient(current_app.config['MONGO_URI'])
-        g.db = client[current_app.config['DB_NAME']]
+        inject_mongo_fault()
+        db = get_shared_db(current_app)
+        read_preference = _request_read_preference()
+        if read_preference is not None:
+            db = db.with_options(read_preference=read_preference)
+        g.db = db
     return g.db
 
+def _request_read_preference():
+    """
+    Pick the read preference for the current request from READ_ROUTING.
+    
+    Staleness-tolerant endpoints read from secondaries, unless the client
+    wrote something recently enough that a secondary might not have it yet;
+    those reads stay on the primary so users always see their own writes.
+    
+    Returns:
+        ReadPreference: The read preference, or None to use the primary
+    """
+    if not has_request_context():
+        return None
+    config = current_app.config
+    if config['READ_ROUTING'].get(request.endpoint) != 'secondaryPreferred':
+        return None
+    
+    max_staleness = config['READ_MAX_STALENESS_SECONDS']
+    try:
+        last_write = float(request.headers.get(LAST_WRITE_HEADER, 0))
+    except ValueError:
+        last_write = 0
+    if time.time() - last_write < max_staleness:
+        return None
+    
+    return SecondaryPreferred(max_staleness=max_staleness)
+
+def mark_write(response):
+    """Stamp successful writes so the client can route its next reads to the primary."""
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+    return response
+
+def get_shared_db(app):
+    """
+    Return a database handle backed by the process-wide connection pool.
+    
+    Requests and background threads share one pooled client per process
+    instead of opening a connection per call.
+    
+    Args:
+        app (Flask): The application whose config holds the Mongo settings
+        
+    Returns:
+        Database: The MongoDB database handle
+    """
+    uri = app.config['MONGO_URI']
+    client = _shared_clients.get(uri)
+    if client is None:
+        with _clients_lock:
+            client = _shared_clients.get(uri)
+            if client is None:
+                client = MongoClient(
+                    uri,
+                    maxPoolSize=app.config['MONGO_MAX_POOL_SIZE'],
+                    minPoolSize=app.config['MONGO_MIN_POOL_SIZE'],
+                    # Nothing may hang forever; requests additionally get a per-request deadline
+                    connectTimeoutMS=app.config['MONGO_CONNECT_TIMEOUT_MS'],
+                    serverSelectionTimeoutMS=app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+                    socketTimeoutMS=app.config['MONGO_SOCKET_TIMEOUT_MS']
+                )
+                _shared_clients[uri] = client
+    return client[app.config['DB_NAME']]
+
+def close_shared_clients():
+    """Close every pooled client, e.g. on shutdown or in a freshly forked worker."""
+    with _clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
+
 def close_db(e=None):
-    """Close the MongoDB client connection."""
-    db = g.pop('db', None)
-    if db is not None:
-        db.client.close()
+    """Release the request's database handle (the pooled client stays open)."""
+    g.pop('db', None)
+
+def ensure_ttl_index(collection, key, expire_after_seconds, **kwargs):
+    """
+    Create a TTL index whose lifetime comes from config, or update it in place.
+    
+    create_index refuses to change expireAfterSeconds on an existing index
+    (IndexOptionsConflict), which would stop every worker from booting after
+    a retention setting changes; collMod changes it instead.
+    
+    Args:
+        collection (Collection): The collection to index
+        key (str): The date field the TTL applies to
+        expire_after_seconds (int): Document lifetime in seconds
+        **kwargs: Further create_index options, e.g. partialFilterExpression
+    """
+    name = kwargs.get('name', f"{key}_1")
+    existing = collection.index_information().get(name)
+    if existing is not None and existing.get('expireAfterSeconds') != expire_after_seconds:
+        collection.database.command('collMod', collection.name,
+                                    index={'name': name, 'expireAfterSeconds': expire_after_seconds})
+        return
+    collection.create_index(key, expireAfterSeconds=expire_after_seconds, **kwargs)
+
+def ensure_indexes(db):
+    """
+    Create every index the application relies on.
+    
+    create_index is a no-op for indexes that already exist, so this is safe
+    to run on startup and again after bulk loads.
+    
+    Args:
+        db (Database): The MongoDB database handle
+    """
+    # Create unique index for user emails
+    db.users.create_index('email', unique=True)
+    db.users.create_index('username', unique=True)
+    
+    # Create indexes for memes
+    db.memes.create_index('user_id')
+    db.memes.create_index('likes')
+    db.memes.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
+    db.memes.create_index('created_at')  # archive mover's age scan
+    db.memes.create_index('comments.user_id')  # author snapshot rewrites, account cleanup
+    db.memes.create_index('comments._id')  # comment deletes by comment ID
+    
+    # Archived (cold) memes serve the same per-author reads
+    db.memes_archive.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
+    db.memes_archive.create_index('comments.user_id')
+    db.memes_archive.create_index('comments._id')
+    
+    # Create indexes for follows
+    db.follows.create_index([('follower_id', 1), ('following_id', 1)], unique=True)
+    db.follows.create_index('following_id')
+    
+    # Create indexes for likes
+    db.likes.create_index([('meme_id', 1), ('user_id', 1)], unique=True)
+    
+    # Create indexes for comments
+    db.comments.create_index('meme_id')
+    db.comments.create_index('user_id')
+    
+    # Notification inbox: newest-first pages, one open (unread) group per
+    # recipient/type/meme, and read groups expire after the retention period
+    db.notifications.create_index([('recipient_id', 1), ('_id', -1)])
+    db.notifications.create_index(
+        [('recipient_id', 1), ('type', 1), ('meme_id', 1)],
+        unique=True,
+        partialFilterExpression={'read': False},
+        name='open_group'
+    )
+    ensure_ttl_index(
+        db.notifications,
+        'read_at',
+        current_app.config['NOTIFICATION_RETENTION_DAYS'] * 86400,
+        partialFilterExpression={'read': True}
+    )
+    
+    # Background jobs: due-job claims, expired leases, per-type concurrency counts,
+    # queued-job dedupe, and completed jobs expire after the retention period
+    db.jobs.create_index([('state', 1), ('run_at', 1)])
+    db.jobs.create_index([('state', 1), ('lease_until', 1)])
+    db.jobs.create_index([('type', 1), ('state', 1), ('lease_until', 1)])
+    db.jobs.create_index('dedupe_key', unique=True, partialFilterExpression={'dedupe_key': {'$exists': True}})
+    ensure_ttl_index(
+        db.jobs,
+        'finished_at',
+        current_app.config['JOBS_RETENTION_DAYS'] * 86400,
+        partialFilterExpression={'state': 'done'}
+    )
+    
+    # Creator analytics rollups: one document per creator and period (and meme),
+    # range reads by creator, and hourly rollups expire after the retention period
+    db.analytics_hourly.create_index([('creator_id', 1), ('hour', 1)], unique=True)
+    ensure_ttl_index(db.analytics_hourly, 'hour', current_app.config['ANALYTICS_HOURLY_RETENTION_DAYS'] * 86400)
+    db.analytics_daily.create_index([('creator_id', 1), ('day', 1)], unique=True)
+    db.analytics_meme_daily.create_index([('creator_id', 1), ('meme_id', 1), ('day', 1)], unique=True)
+    db.analytics_meme_daily.create_index([('creator_id', 1), ('day', 1)])
+    
+    # Chunked uploads are garbage-collected by last activity
+    db.uploads.create_index('updated_at')
+    
+    # Diagnostics expire after a week
+    db.slow_requests.create_index('created_at', expireAfterSeconds=7 * 86400)
+    db.profiles.create_index('created_at', expireAfterSeconds=7 * 86400)
 
 def init_db(app):
     """Initialize the MongoDB connection."""
     app.teardown_appcontext(close_db)
+    app.after_request(mark_write)
     
     # Create initial MongoDB collections and indexes if needed
     with app.app_context():
         db = get_db()
-        
-        # Create unique index for user emails
-        if 'users' not in db.list_collection_names():
-            db.create_collection('users')
-            db.users.create_index('email', unique=True)
-            db.users.create_index('username', unique=True)
-        
-        # Create indexes for memes
-        if 'memes' not in db.list_collection_names():
-            db.create_collection('memes')
-            db.memes.create_index('user_id')
-        
-        # Create indexes for follows
-        if 'follows' not in db.list_collection_names():
-            db.create_collection('follows')
-            db.follows.create_index([('follower_id', 1), ('following_id', 1)], unique=True)
-        
-        # Create indexes for likes
-        if 'likes' not in db.list_collection_names():
-            db.create_collection('likes')
-            db.likes.create_index([('meme_id', 1), ('user_id', 1)], unique=True)
-        
-        # Create indexes for comments
-        if 'comments' not in db.list_collection_names():
-            db.create_collection('comments')
-            db.comments.create_index('meme_id')
\ No newline at end of file
+        existing = set(db.list_collection_names())
+        for name in ('users', 'memes', 'follows', 'likes', 'comments'):
+            if name not in existing:
+                db.create_collection(name)
+        ensure_indexes(db)
@@ -0,0 +1,244 @@
+import datetime
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from pymongo import monitoring
+from services.mongodb_service import get_shared_db
+
+# Header an admin sends to profile a single request
+PROFILE_HEADER = 'X-Profile'
+
+# Commands worth an explain() when they show up in a slow request
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'count', 'distinct'}
+
+# Driver-internal fields stripped from a command before it is stored or explained
+INTERNAL_COMMAND_FIELDS = {'lsid', '$clusterTime', '$db', '$readPreference', 'txnNumber', 'cursor_id'}
+
+# Most commands and records kept per request / waiting to be written
+MAX_COMMANDS_PER_TRACE = 200
+MAX_PENDING_RECORDS = 100
+
+_local = threading.local()
+_listener_registered = False
+
+class RequestTrace:
+    """Mongo commands and outbound calls made while serving one request."""
+
+    def __init__(self):
+        self.commands = []
+        self.external_calls = []
+        self._started = {}
+
+    def command_started(self, event):
+        if len(self.commands) >= MAX_COMMANDS_PER_TRACE:
+            return
+        command = {k: v for k, v in event.command.items() if k not in INTERNAL_COMMAND_FIELDS}
+        target = command.get(event.command_name)
+        entry = {
+            'command': event.command_name,
+            'collection': target if isinstance(target, str) else None,
+            'database': event.database_name,
+            'duration_ms': None,
+            'ok': None,
+            '_spec': command if event.command_name in EXPLAINABLE_COMMANDS else None
+        }
+        self._started[event.request_id] = entry
+        self.commands.append(entry)
+
+    def command_finished(self, event, ok):
+        entry = self._started.pop(event.request_id, None)
+        if entry is not None:
+            entry['duration_ms'] = event.duration_micros / 1000.0
+            entry['ok'] = ok
+
+class TraceCommandListener(monitoring.CommandListener):
+    """Routes driver command events to the trace of the request that issued them."""
+
+    def started(self, event):
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.command_started(event)
+
+    def succeeded(self, event):
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.command_finished(event, True)
+
+    def failed(self, event):
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.command_finished(event, False)
+
+def record_external_call(name, duration_ms):
+    """
+    Attach an outbound call (e.g. an image upload) to the current request's trace.
+
+    Args:
+        name (str): A short label for the call
+        duration_ms (float): How long the call took
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.external_calls.append({'name': name, 'duration_ms': duration_ms})
+
+class StackSampler:
+    """
+    Minimal sampling profiler for a single thread.
+
+    A helper thread snapshots the target thread's stack every interval and
+    counts identical stacks, producing collapsed-stack output that
+    flamegraph.pl and speedscope can render.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        """
+        Stop sampling.
+
+        Returns:
+            str: The samples in collapsed-stack format, one stack per line
+        """
+        self._stop.set()
+        self._thread.join()
+        return '\n'.join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+def _plan_stages(plan):
+    stages = []
+    while plan:
+        stage = plan.get('stage', '?')
+        if plan.get('indexName'):
+            stage += f"({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get('inputStage') or (plan.get('inputStages') or [None])[0]
+    return ' <- '.join(stages)
+
+def _explain_summary(db, spec):
+    """Summarise the winning plan of a recorded command, e.g. 'FETCH <- IXSCAN(user_id_1)'."""
+    try:
+        result = db.command({'explain': spec, 'verbosity': 'queryPlanner'})
+    except Exception as e:
+        return f"explain failed: {str(e)}"
+    planner = result.get('queryPlanner') or (result.get('stages') or [{}])[0].get('$cursor', {}).get('queryPlanner', {})
+    return _plan_stages(planner.get('winningPlan')) or 'unknown'
+
+class SlowRequestRecorder:
+    """Writes slow-request captures and profiles off the request thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-request-recorder')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, record, profile=None):
+        with self._lock:
+            if self._pending >= MAX_PENDING_RECORDS:
+                return
+            self._pending += 1
+        self._pool.submit(self._write, record, profile)
+
+    def _write(self, record, profile):
+        try:
+            db = get_shared_db(self.app)
+            if record is not None:
+                for command in record['commands']:
+                    spec = command.pop('_spec', None)
+                    if spec is not None and command['duration_ms'] is not None \
+                            and command['duration_ms'] >= self.app.config['SLOW_COMMAND_MS']:
+                        command['explain'] = _explain_summary(db[command['database']], spec)
+                db.slow_requests.insert_one(record)
+            if profile is not None:
+                db.profiles.insert_one(profile)
+        except Exception as e:
+            self.app.logger.error(f"Error recording slow request: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+def _wants_profile():
+    config = current_app.config
+    if request.headers.get(PROFILE_HEADER):
+        try:
+            verify_jwt_in_request(optional=True)
+        except Exception:
+            return False
+        return get_jwt_identity() in config['ADMIN_USER_IDS']
+    return random.random() < config['PROFILE_SAMPLE_RATE']
+
+def _before_request():
+    g.trace_started = time.perf_counter()
+    _local.trace = RequestTrace()
+    if _wants_profile():
+        g.sampler = StackSampler(threading.get_ident(), current_app.config['PROFILE_INTERVAL'])
+        g.sampler.start()
+
+def _teardown_request(exc=None):
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    started = g.pop('trace_started', None)
+    sampler = g.pop('sampler', None)
+    if trace is None or started is None:
+        return
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    now = datetime.datetime.utcnow()
+    summary = {
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'duration_ms': duration_ms,
+        'created_at': now
+    }
+
+    record = None
+    if duration_ms >= current_app.config['SLOW_REQUEST_MS']:
+        record = dict(summary, commands=trace.commands, external_calls=trace.external_calls,
+                      error=str(exc) if exc else None)
+    profile = dict(summary, collapsed=sampler.stop()) if sampler is not None else None
+    if record is not None or profile is not None:
+        current_app.extensions['slow_request_recorder'].submit(record, profile)
+
+def init_profiling(app):
+    """
+    Install slow-request capture and on-demand profiling if enabled in the config.
+
+    Must run before any MongoClient is created so the command listener is
+    attached to it.
+    """
+    global _listener_registered
+    if not app.config.get('PROFILING_ENABLED'):
+        return None
+    # Listeners are process-wide; register once even if several apps are created
+    if not _listener_registered:
+        monitoring.register(TraceCommandListener())
+        _listener_registered = True
+    recorder = SlowRequestRecorder(app)
+    app.extensions['slow_request_recorder'] = recorder
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    return recorder
@@ -0,0 +1,168 @@
+import threading
+import bson
+from pymongo import monitoring
+from services.profiling_service import INTERNAL_COMMAND_FIELDS
+
+# Commands whose cost is measured with explain(executionStats)
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify'}
+
+# Fields that explain rejects inside the explained command
+EXPLAIN_STRIPPED_FIELDS = INTERNAL_COMMAND_FIELDS | {'writeConcern', 'readConcern', 'maxTimeMS'}
+
+_local = threading.local()
+
+class CommandCapture:
+    """Mongo commands, round trips and wire bytes of one measured request."""
+
+    def __init__(self):
+        self.commands = []
+        self._started = {}
+
+    def command_started(self, event):
+        command = {k: v for k, v in event.command.items() if k not in EXPLAIN_STRIPPED_FIELDS}
+        target = command.get(event.command_name)
+        entry = {
+            'command': event.command_name,
+            'collection': target if isinstance(target, str) else None,
+            'database': event.database_name,
+            'bytes': len(bson.encode(event.command)),
+            'returned': 0,
+            'ok': None,
+            '_spec': command if event.command_name in EXPLAINABLE_COMMANDS else None
+        }
+        self._started[event.request_id] = entry
+        self.commands.append(entry)
+
+    def command_finished(self, event, ok):
+        entry = self._started.pop(event.request_id, None)
+        if entry is None:
+            return
+        entry['ok'] = ok
+        if ok:
+            entry['bytes'] += len(bson.encode(event.reply))
+            entry['returned'] = _returned_count(event.reply)
+
+def _returned_count(reply):
+    # Documents handed back to the application: cursor batches, findAndModify values, write counts
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return len(cursor.get('firstBatch', cursor.get('nextBatch', [])))
+    if 'value' in reply:
+        return 0 if reply['value'] is None else 1
+    if 'values' in reply:
+        return len(reply['values'])
+    return reply.get('n', 0) if isinstance(reply.get('n'), int) else 0
+
+class BudgetCommandListener(monitoring.CommandListener):
+    """Routes driver command events to the capture active on the issuing thread."""
+
+    def started(self, event):
+        capture = getattr(_local, 'capture', None)
+        if capture is not None:
+            capture.command_started(event)
+
+    def succeeded(self, event):
+        capture = getattr(_local, 'capture', None)
+        if capture is not None:
+            capture.command_finished(event, True)
+
+    def failed(self, event):
+        capture = getattr(_local, 'capture', None)
+        if capture is not None:
+            capture.command_finished(event, False)
+
+def start_capture():
+    """Start capturing the commands issued by the current thread."""
+    _local.capture = CommandCapture()
+    return _local.capture
+
+def stop_capture():
+    """Stop capturing and return what was captured."""
+    capture = getattr(_local, 'capture', None)
+    _local.capture = None
+    return capture
+
+def _explain_specs(spec):
+    # update/delete carry a list of statements; explain takes exactly one
+    for field in ('updates', 'deletes'):
+        if field in spec:
+            for statement in spec[field]:
+                yield dict({k: v for k, v in spec.items() if k != field}, **{field: [statement]})
+            return
+    yield spec
+
+def _walk_explain(node, totals):
+    if isinstance(node, list):
+        for item in node:
+            _walk_explain(item, totals)
+        return
+    if not isinstance(node, dict):
+        return
+    if node.get('stage') == 'COLLSCAN':
+        totals['collscans'] += 1
+    if node.get('collectionScans'):  # $lookup stage statistics
+        totals['collscans'] += node['collectionScans']
+    if 'totalDocsExamined' in node:
+        # executionStats, or a $lookup stage's totals; the stages below only repeat them
+        totals['examined'] += node['totalDocsExamined']
+        _walk_plan(node.get('executionStages'), totals)
+        return
+    for key, value in node.items():
+        if key in ('queryPlanner', 'rejectedPlans', 'allPlansExecution'):  # plans, not execution
+            continue
+        _walk_explain(value, totals)
+
+def _walk_plan(stage, totals):
+    # Collection scans inside an execution tree whose documents were already counted
+    if isinstance(stage, list):
+        for item in stage:
+            _walk_plan(item, totals)
+    elif isinstance(stage, dict):
+        if stage.get('stage') == 'COLLSCAN':
+            totals['collscans'] += 1
+        for key in ('inputStage', 'inputStages', 'shards', 'executionStages'):
+            _walk_plan(stage.get(key), totals)
+
+def explain_costs(db, spec):
+    """
+    Run a captured command through explain(executionStats) and total its cost.
+
+    Writes are explained without being applied, against the data as it is
+    after the measured request, which is close enough for a by-ID or
+    indexed filter.
+
+    Args:
+        db (Database): The database the command ran in
+        spec (dict): The command as captured, without driver-internal fields
+
+    Returns:
+        dict: {'examined', 'collscans'}
+    """
+    totals = {'examined': 0, 'collscans': 0}
+    for statement in _explain_specs(spec):
+        result = db.command({'explain': statement, 'verbosity': 'executionStats'})
+        _walk_explain(result, totals)
+    return totals
+
+def measure(client, capture):
+    """
+    Total a capture: round trips, documents examined and returned, bytes and collection scans.
+
+    Args:
+        client (MongoClient): The client used to run the explains
+        capture (CommandCapture): The finished capture
+
+    Returns:
+        dict: {'commands', 'examined', 'returned', 'bytes', 'collscans', 'breakdown'}
+    """
+    totals = {'commands': 0, 'examined': 0, 'returned': 0, 'bytes': 0, 'collscans': 0, 'breakdown': []}
+    for entry in capture.commands:
+        totals['commands'] += 1
+        totals['returned'] += entry['returned']
+        totals['bytes'] += entry['bytes']
+        totals['breakdown'].append(f"{entry['command']} {entry['collection'] or ''}".strip())
+        if entry['_spec'] is not None and entry['ok']:
+            costs = explain_costs(client[entry['database']], entry['_spec'])
+            totals['examined'] += costs['examined']
+            totals['collscans'] += costs['collscans']
+    return totals
@@ -0,0 +1,135 @@
+import datetime
+import math
+from flask import current_app
+from services.job_service import enqueue_job
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it the feed stays chronological
+    np = None
+
+# Comments say more about affinity and engagement than likes do
+COMMENT_WEIGHT = 2.0
+
+def ranking_available():
+    """Check whether ranked feeds can be served (NumPy is installed)."""
+    return np is not None
+
+def init_ranking(app):
+    """Warn at startup when ranked feeds are the default but NumPy is missing."""
+    if app.config.get('FEED_DEFAULT_MODE') == 'ranked' and not ranking_available():
+        app.logger.warning("FEED_DEFAULT_MODE is 'ranked' but numpy is not installed; "
+                           "feeds will be served chronologically (pip install numpy)")
+
+def compute_affinity(db, viewer_id, window_days=30):
+    """
+    Compute and store a viewer's affinity for the authors they engage with.
+
+    Affinity is the viewer's likes plus weighted comments on each author's
+    memes within the window, scaled to 0..1. It is stored as parallel
+    author/weight arrays so the ranker can load it without per-key work.
+
+    Args:
+        db (Database): The MongoDB database handle
+        viewer_id (ObjectId): The viewing user
+        window_days (int): How far back engagement counts
+
+    Returns:
+        dict: Author ObjectId -> affinity weight
+    """
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=window_days)
+    scores = {}
+    for group in db.memes.aggregate([
+        {'$match': {'likes': viewer_id, 'created_at': {'$gte': since}}},
+        {'$group': {'_id': '$user_id', 'count': {'$sum': 1}}}
+    ]):
+        scores[group['_id']] = scores.get(group['_id'], 0) + group['count']
+    for group in db.memes.aggregate([
+        {'$match': {'created_at': {'$gte': since}, 'comments.user_id': viewer_id}},
+        {'$project': {'user_id': 1, 'count': {'$size': {'$filter': {
+            'input': '$comments', 'cond': {'$eq': ['$$this.user_id', viewer_id]}
+        }}}}},
+        {'$group': {'_id': '$user_id', 'count': {'$sum': '$count'}}}
+    ]):
+        scores[group['_id']] = scores.get(group['_id'], 0) + COMMENT_WEIGHT * group['count']
+    scores.pop(viewer_id, None)
+
+    top = max(scores.values(), default=0) or 1
+    affinity = {author_id: score / top for author_id, score in scores.items()}
+    db.feed_affinity.replace_one({'_id': viewer_id}, {
+        'authors': list(affinity),
+        'weights': list(affinity.values()),
+        'updated_at': datetime.datetime.utcnow()
+    }, upsert=True)
+    return affinity
+
+def get_affinity(db, viewer_id):
+    """
+    Load a viewer's precomputed affinity, refreshing it in the background when stale.
+
+    It is computed inline only the first time, like suggestions.
+
+    Returns:
+        dict: Author ObjectId -> affinity weight
+    """
+    config = current_app.config
+    doc = db.feed_affinity.find_one({'_id': viewer_id})
+    if doc is None:
+        return compute_affinity(db, viewer_id, config['RANKING_AFFINITY_DAYS'])
+
+    age = (datetime.datetime.utcnow() - doc['updated_at']).total_seconds()
+    if age > config['RANKING_AFFINITY_MAX_AGE']:
+        enqueue_job('ranking.affinity', {'user_id': str(viewer_id)}, dedupe_key=f"affinity:{viewer_id}")
+    return dict(zip(doc['authors'], doc['weights']))
+
+def rank_candidates(candidates, affinity, now=None):
+    """
+    Score a candidate window in bulk and return it in ranked order.
+
+    The score is a weighted sum of author affinity, recency decay
+    (RANKING_HALF_LIFE_HOURS) and engagement velocity (log of likes plus
+    weighted comments per hour of age). After scoring, each further meme by
+    the same author is multiplied by RANKING_DIVERSITY_DECAY once more, so
+    heavy posters cannot fill a page.
+
+    Args:
+        candidates (list): Meme cards with user_id, created_at, likes_count and comments_count
+        affinity (dict): Author ObjectId -> affinity weight
+        now (datetime, optional): Reference time for recency
+
+    Returns:
+        list: Indexes into candidates, best first
+    """
+    if not candidates:
+        return []
+    config = current_app.config
+    weights = config['RANKING_WEIGHTS']
+    now = now or datetime.datetime.utcnow()
+
+    authors = [meme['user_id'] for meme in candidates]
+    age_hours = np.array([(now - meme['created_at']).total_seconds() for meme in candidates]) / 3600.0
+    engagement = np.array([meme.get('likes_count', 0) + COMMENT_WEIGHT * meme.get('comments_count', 0)
+                           for meme in candidates], dtype=float)
+    author_affinity = np.array([affinity.get(author, 0.0) for author in authors])
+
+    np.maximum(age_hours, 0, out=age_hours)
+    recency = np.exp(-math.log(2) * age_hours / config['RANKING_HALF_LIFE_HOURS'])
+    velocity = np.log1p(engagement / (age_hours + 2.0))
+    velocity /= velocity.max() or 1.0
+    scores = (weights['affinity'] * author_affinity
+              + weights['recency'] * recency
+              + weights['velocity'] * velocity)
+
+    # Diversity: count how many better-scored memes each author already has
+    order = np.argsort(-scores, kind='stable')
+    _, codes = np.unique(np.array([str(author) for author in authors]), return_inverse=True)
+    ranked_codes = codes[order]
+    by_author = np.argsort(ranked_codes, kind='stable')
+    sorted_codes = ranked_codes[by_author]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(sorted_codes)]))
+    occurrence = np.empty(len(order), dtype=int)
+    occurrence[by_author] = np.arange(len(order)) - group_start
+
+    penalized = scores[order] * config['RANKING_DIVERSITY_DECAY'] ** occurrence
+    return order[np.argsort(-penalized, kind='stable')].tolist()
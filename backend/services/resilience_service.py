@@ -0,0 +1,310 @@
+import contextvars
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import pymongo
+from flask import current_app, g, has_request_context, jsonify
+from pymongo import monitoring
+from pymongo.errors import AutoReconnect, ConnectionFailure, ExecutionTimeout
+from services.admission_service import classify_request
+
+# Server error codes that mean "too slow" rather than "bad request"
+MONGO_TIMEOUT_CODES = {50, 262}  # MaxTimeMSExpired, ExceededTimeLimit
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, dependency, retry_after):
+        super().__init__(f'{dependency} is unavailable')
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+class InjectedFault(AutoReconnect):
+    """A failure raised by fault injection; a network error as far as callers can tell."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one dependency.
+
+    After failure_threshold failures in a row the circuit opens and calls
+    fail fast for reset_timeout seconds. Then a single trial call is let
+    through (half-open); its success closes the circuit, its failure opens
+    it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started = None
+        self._opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """Check whether a call may go ahead; in half-open state only one trial at a time does."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'open':
+                return False
+            now = time.monotonic()
+            if self._trial_started is not None and now - self._trial_started < self.reset_timeout:
+                return False
+            self._trial_started = now
+            return True
+
+    def retry_after(self):
+        """Seconds until the next trial call, for Retry-After headers."""
+        with self._lock:
+            if self._opened_at is None:
+                return 1
+            return max(1, math.ceil(self.reset_timeout - (time.monotonic() - self._opened_at)))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self._opened += 1
+                self._opened_at = time.monotonic()
+                self._trial_started = None
+
+    def call(self, fn, *args, ignore=(), **kwargs):
+        """
+        Run fn through the breaker.
+
+        Args:
+            fn (callable): The dependency call
+            ignore (tuple): Exception types that are the caller's fault and do not count as failures
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        try:
+            inject_fault(self.name)
+            result = fn(*args, **kwargs)
+        except ignore:
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'state': self._state(), 'consecutive_failures': self._failures, 'times_opened': self._opened}
+
+# Process-wide state, like the pooled Mongo clients: breakers and fault settings
+# are shared by requests, background threads and the driver's command listener
+_breakers = {}
+_faults = {}
+_hedge_pool = None
+_listener_registered = False
+
+def get_breaker(dependency):
+    """Return the circuit breaker for a dependency ('mongo' or 'cloudinary')."""
+    breaker = _breakers.get(dependency)
+    if breaker is None:
+        breaker = _breakers.setdefault(dependency, CircuitBreaker(dependency))
+    return breaker
+
+def breaker_stats():
+    """Get the state of every circuit breaker."""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+def inject_fault(dependency, latency=True, errors=True):
+    """
+    Apply the configured FAULT_INJECTION settings for a dependency.
+
+    Args:
+        dependency (str): 'mongo' or 'cloudinary'
+        latency (bool): Whether to add the configured delay
+        errors (bool): Whether to raise InjectedFault at the configured rate
+    """
+    fault = _faults.get(dependency)
+    if not fault:
+        return
+    if latency and fault.get('delay_ms') and random.random() < fault.get('delay_rate', 1.0):
+        time.sleep(fault['delay_ms'] / 1000.0)
+    if errors and random.random() < fault.get('error_rate', 0):
+        raise InjectedFault(f'Injected {dependency} fault')
+
+def inject_mongo_fault():
+    """Fail the current Mongo access at the configured rate, counting it against the breaker."""
+    try:
+        inject_fault('mongo', latency=False)
+    except InjectedFault:
+        get_breaker('mongo').record_failure()
+        raise
+
+def remaining_budget(ceiling=None):
+    """
+    Seconds left before the current request's deadline.
+
+    Args:
+        ceiling (float, optional): Upper bound, also used outside requests
+
+    Returns:
+        float: The remaining time (never below zero), or ceiling when there is no deadline
+    """
+    deadline = g.get('deadline') if has_request_context() else None
+    if deadline is None:
+        return ceiling
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if ceiling is None else min(remaining, ceiling)
+
+def hedged_read(fn):
+    """
+    Run an idempotent read, issuing a second copy if the first is slow.
+
+    When HEDGED_READS_ENABLED is set and the first attempt has not returned
+    within HEDGE_DELAY_MS, the same read is started again (it may land on a
+    different replica set member) and whichever succeeds first wins. fn
+    runs on a pool thread, so it must not touch flask.g; the request's Mongo
+    deadline is carried over.
+
+    Args:
+        fn (callable): The read, taking no arguments
+
+    Returns:
+        The result of fn
+    """
+    config = current_app.config
+    if not config.get('HEDGED_READS_ENABLED') or _hedge_pool is None:
+        return fn()
+
+    first = _hedge_pool.submit(contextvars.copy_context().run, fn)
+    try:
+        return first.result(timeout=config['HEDGE_DELAY_MS'] / 1000.0)
+    except FutureTimeoutError:
+        pass
+    pending = {first, _hedge_pool.submit(contextvars.copy_context().run, fn)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+class BreakerCommandListener(monitoring.CommandListener):
+    """Feeds driver command outcomes to the Mongo breaker and injects command latency."""
+
+    def started(self, event):
+        inject_fault('mongo', errors=False)
+
+    def succeeded(self, event):
+        get_breaker('mongo').record_success()
+
+    def failed(self, event):
+        failure = event.failure or {}
+        # Network errors carry no server code; slow commands fail with a timeout code
+        if 'code' not in failure or failure['code'] in MONGO_TIMEOUT_CODES:
+            get_breaker('mongo').record_failure()
+        else:
+            get_breaker('mongo').record_success()
+
+def unavailable_response(retry_after, message='Service temporarily unavailable, please retry'):
+    """Build the 503 response sent when a dependency is unavailable or too slow."""
+    response = jsonify({'error': message})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def _before_request():
+    request_class = classify_request()
+    if request_class is None:
+        return None
+    breaker = get_breaker('mongo')
+    if not breaker.allow():
+        return unavailable_response(breaker.retry_after())
+
+    # Every Mongo operation in the view shares the request budget (maxTimeMS is derived from it)
+    budget = current_app.config['REQUEST_BUDGETS'][request_class]
+    g.deadline = time.monotonic() + budget
+    g.mongo_deadline = pymongo.timeout(budget)
+    g.mongo_deadline.__enter__()
+    return None
+
+def _after_request(response):
+    # Exited here rather than on teardown so it stays in the view's context even for streamed bodies
+    scope = g.pop('mongo_deadline', None)
+    if scope is not None:
+        scope.__exit__(None, None, None)
+    return response
+
+def _teardown_request(exc=None):
+    scope = g.pop('mongo_deadline', None)
+    if scope is not None:
+        try:
+            scope.__exit__(None, None, None)
+        except (ValueError, RuntimeError):
+            pass  # Already left the context the deadline was set in
+
+def _handle_circuit_open(e):
+    return unavailable_response(e.retry_after)
+
+def _handle_mongo_unavailable(e):
+    current_app.logger.warning(f"Mongo unavailable: {str(e)}")
+    return unavailable_response(get_breaker('mongo').retry_after())
+
+def init_resilience(app):
+    """
+    Install request deadlines, circuit breakers and fault injection.
+
+    Must run before any MongoClient is created so the command listener is
+    attached to it.
+    """
+    global _hedge_pool, _listener_registered
+    config = app.config
+    # Another app in the same process (e.g. the query-budget harness) keeps the breakers' state
+    for dependency in ('mongo', 'cloudinary'):
+        breaker = get_breaker(dependency)
+        breaker.failure_threshold = config['BREAKER_FAILURE_THRESHOLD']
+        breaker.reset_timeout = config['BREAKER_RESET_TIMEOUT']
+    _faults.clear()
+    _faults.update(config['FAULT_INJECTION'])
+    if _faults:
+        app.logger.warning(f"Fault injection enabled: {_faults}")
+    if config['HEDGED_READS_ENABLED'] and _hedge_pool is None:
+        _hedge_pool = ThreadPoolExecutor(max_workers=config['HEDGE_POOL_SIZE'], thread_name_prefix='hedge')
+
+    # Listeners are process-wide; a second registration would count every command twice
+    if not _listener_registered:
+        monitoring.register(BreakerCommandListener())
+        _listener_registered = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.register_error_handler(CircuitOpenError, _handle_circuit_open)
+    app.register_error_handler(ConnectionFailure, _handle_mongo_unavailable)
+    app.register_error_handler(ExecutionTimeout, _handle_mongo_unavailable)
@@ -0,0 +1,201 @@
+import datetime
+import queue
+import threading
+from collections import Counter
+from bson import ObjectId
+from flask import current_app
+from services.mongodb_service import get_shared_db
+from services.graph_service import get_follow_graph
+
+# Relative weight of shared follows versus liking a candidate's memes
+MUTUAL_WEIGHT = 1.0
+ENGAGEMENT_WEIGHT = 0.5
+
+def _mutual_counts(db, user_id, following, graph=None):
+    """
+    Count, for each friend-of-friend, how many of the user's follows also follow them.
+
+    Args:
+        db (Database): The MongoDB database handle
+        user_id (ObjectId): The user to compute suggestions for
+        following (set): ObjectIds the user already follows
+        graph (FollowGraph, optional): In-memory follow graph to use instead of Mongo
+
+    Returns:
+        Counter: Candidate ObjectId -> number of mutual connections
+    """
+    if graph is not None:
+        counts = Counter()
+        for followed_id in following:
+            counts.update(graph.following(followed_id))
+        return counts
+
+    pipeline = [
+        {'$match': {'follower_id': user_id}},
+        {'$graphLookup': {
+            'from': 'follows',
+            'startWith': '$following_id',
+            'connectFromField': 'following_id',
+            'connectToField': 'follower_id',
+            'as': 'second_degree',
+            'maxDepth': 0
+        }},
+        {'$unwind': '$second_degree'},
+        {'$group': {'_id': '$second_degree.following_id', 'mutual_count': {'$sum': 1}}}
+    ]
+    return Counter({doc['_id']: doc['mutual_count'] for doc in db.follows.aggregate(pipeline)})
+
+def _engagement_counts(db, user_id):
+    """
+    Count how many memes by each author the user has liked.
+
+    Args:
+        db (Database): The MongoDB database handle
+        user_id (ObjectId): The user
+
+    Returns:
+        Counter: Author ObjectId -> number of liked memes
+    """
+    pipeline = [
+        {'$match': {'likes': user_id}},
+        {'$group': {'_id': '$user_id', 'liked_count': {'$sum': 1}}}
+    ]
+    return Counter({doc['_id']: doc['liked_count'] for doc in db.memes.aggregate(pipeline)})
+
+def compute_suggestions(db, user_id, limit=20, graph=None):
+    """
+    Rank "people you may know" candidates for a user and store them.
+
+    Args:
+        db (Database): The MongoDB database handle
+        user_id (str or ObjectId): The user to compute suggestions for
+        limit (int): Maximum number of candidates to keep
+        graph (FollowGraph, optional): In-memory follow graph to use instead of Mongo
+
+    Returns:
+        list: The stored candidate entries, best first
+    """
+    if isinstance(user_id, str):
+        user_id = ObjectId(user_id)
+
+    if graph is not None:
+        following = set(graph.following(user_id))
+    else:
+        following = {follow['following_id'] for follow in
+                     db.follows.find({'follower_id': user_id}, {'_id': 0, 'following_id': 1})}
+
+    mutual = _mutual_counts(db, user_id, following, graph)
+    engagement = _engagement_counts(db, user_id)
+
+    excluded = following | {user_id}
+    scores = {}
+    for candidate in set(mutual) | set(engagement):
+        if candidate not in excluded:
+            scores[candidate] = MUTUAL_WEIGHT * mutual[candidate] + ENGAGEMENT_WEIGHT * engagement[candidate]
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+
+    # Embed the user cards so the endpoint needs no further lookups
+    users = {user['_id']: user for user in
+             db.users.find({'_id': {'$in': ranked}}, {'username': 1, 'profile_pic': 1})}
+    candidates = [
+        {
+            'user_id': candidate,
+            'username': users[candidate]['username'],
+            'profile_pic': users[candidate].get('profile_pic'),
+            'mutual_count': mutual[candidate],
+            'engagement_count': engagement[candidate],
+            'score': scores[candidate]
+        }
+        for candidate in ranked if candidate in users
+    ]
+
+    db.suggestions.replace_one(
+        {'_id': user_id},
+        {'_id': user_id, 'candidates': candidates, 'updated_at': datetime.datetime.utcnow()},
+        upsert=True
+    )
+    return candidates
+
+class SuggestionRefresher:
+    """
+    Background worker that recomputes suggestions for users marked dirty.
+
+    Follow events mark the follower and a bounded number of their followers
+    dirty; duplicates are collapsed while they wait in the queue.
+    """
+
+    def __init__(self, app, limit=20, fanout_limit=100):
+        self.app = app
+        self.limit = limit
+        self.fanout_limit = fanout_limit
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='suggestion-refresh', daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, user_id):
+        """Queue a user for recomputation unless already queued."""
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        with self._lock:
+            if user_id in self._queued:
+                return
+            self._queued.add(user_id)
+        self._queue.put(user_id)
+
+    def on_follow_changed(self, follower_id, graph=None):
+        """
+        Queue the users whose suggestions change when follower_id follows or unfollows someone.
+
+        Args:
+            follower_id (str or ObjectId): The user who followed or unfollowed
+            graph (FollowGraph, optional): In-memory follow graph used to find their followers
+        """
+        if isinstance(follower_id, str):
+            follower_id = ObjectId(follower_id)
+        self.mark_dirty(follower_id)
+
+        # The follower's own followers see a changed friends-of-friends set
+        if graph is not None:
+            followers = graph.followers(follower_id)[:self.fanout_limit]
+        else:
+            db = get_shared_db(self.app)
+            followers = [follow['follower_id'] for follow in
+                         db.follows.find({'following_id': follower_id}, {'_id': 0, 'follower_id': 1})
+                         .limit(self.fanout_limit)]
+        for user_id in followers:
+            self.mark_dirty(user_id)
+
+    def refresh_all(self, batch_size=1000):
+        """Queue every user for recomputation, e.g. for a nightly full rebuild."""
+        db = get_shared_db(self.app)
+        for user in db.users.find({}, {'_id': 1}, batch_size=batch_size):
+            self.mark_dirty(user['_id'])
+
+    def _run(self):
+        while True:
+            user_id = self._queue.get()
+            with self._lock:
+                self._queued.discard(user_id)
+            try:
+                with self.app.app_context():
+                    compute_suggestions(get_shared_db(self.app), user_id, self.limit, get_follow_graph())
+            except Exception as e:
+                self.app.logger.error(f"Error refreshing suggestions for {user_id}: {str(e)}")
+
+def init_suggestions(app):
+    """Start the background suggestion refresher if enabled in the config."""
+    if not app.config.get('SUGGESTIONS_BACKGROUND_REFRESH'):
+        return None
+    refresher = SuggestionRefresher(
+        app,
+        limit=app.config['SUGGESTIONS_LIMIT'],
+        fanout_limit=app.config['SUGGESTIONS_FANOUT_LIMIT']
+    )
+    app.extensions['suggestion_refresher'] = refresher
+    return refresher
+
+def get_suggestion_refresher():
+    """Return the background suggestion refresher, or None when it is disabled."""
+    return current_app.extensions.get('suggestion_refresher')
@@ -0,0 +1,198 @@
+import datetime
+import hashlib
+import os
+from bson import ObjectId
+from flask import current_app
+from pymongo import ReturnDocument
+from services.mongodb_service import get_db
+
+# Bytes read from the request stream / file per iteration
+STREAM_BLOCK_SIZE = 64 * 1024
+
+class UploadError(Exception):
+    """Raised when a chunked upload request cannot be applied."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def _upload_path(upload_id):
+    return os.path.join(current_app.config['UPLOAD_TMP_DIR'], f"{upload_id}.part")
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def initiate_upload(user_id, filename, size, checksum, caption=''):
+    """
+    Start a resumable upload.
+
+    Args:
+        user_id (str): The uploading user
+        filename (str): The original file name
+        size (int): Total size of the file in bytes
+        checksum (str): SHA-256 hex digest of the whole file
+        caption (str): Caption for the meme created on completion
+
+    Returns:
+        dict: The upload session (upload_id, chunk_size, received)
+    """
+    config = current_app.config
+    if size <= 0 or size > config['UPLOAD_MAX_SIZE']:
+        raise UploadError(f"File size must be between 1 and {config['UPLOAD_MAX_SIZE']} bytes")
+
+    upload_id = ObjectId()
+    os.makedirs(config['UPLOAD_TMP_DIR'], exist_ok=True)
+    # Reserve the file up front so chunks can be written at their offsets
+    with open(_upload_path(upload_id), 'wb') as f:
+        f.truncate(size)
+
+    now = datetime.datetime.utcnow()
+    get_db().uploads.insert_one({
+        '_id': upload_id,
+        'user_id': ObjectId(user_id),
+        'filename': filename,
+        'size': size,
+        'checksum': checksum.lower(),
+        'caption': caption,
+        'state': 'uploading',
+        'received': 0,
+        'created_at': now,
+        'updated_at': now
+    })
+    return {'upload_id': str(upload_id), 'chunk_size': config['UPLOAD_CHUNK_SIZE'], 'received': 0}
+
+def get_upload(upload_id, user_id):
+    """
+    Find an upload session owned by the given user.
+
+    Returns:
+        dict: The upload document, or None if not found (or the ID is malformed)
+    """
+    if not ObjectId.is_valid(upload_id):
+        return None
+    return get_db().uploads.find_one({'_id': ObjectId(upload_id), 'user_id': ObjectId(user_id)})
+
+def write_chunk(upload_id, user_id, start, length, stream, checksum):
+    """
+    Stream one chunk from the request body to disk at its offset.
+
+    Chunks must be sent in order: start has to equal the number of bytes
+    already received, which is what a client resumes from after a failure.
+
+    Args:
+        upload_id (str): The upload session ID
+        user_id (str): The uploading user
+        start (int): Byte offset of the chunk
+        length (int): Chunk length in bytes
+        stream (file): The request body stream
+        checksum (str): SHA-256 hex digest of the chunk
+
+    Returns:
+        int: Total bytes received so far
+    """
+    upload = get_upload(upload_id, user_id)
+    if upload is None:
+        raise UploadError('Upload not found', 404)
+    if start != upload['received']:
+        raise UploadError(f"Expected chunk at offset {upload['received']}", 409)
+    if length <= 0 or length > current_app.config['UPLOAD_CHUNK_SIZE'] or start + length > upload['size']:
+        raise UploadError('Invalid chunk length')
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(_upload_path(upload['_id']), 'r+b') as f:
+        f.seek(start)
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+            written += len(block)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if written != length:
+        raise UploadError('Chunk body shorter than declared')
+    if digest.hexdigest() != checksum.lower():
+        raise UploadError('Chunk checksum mismatch')
+
+    # Only advance if no other request advanced it first
+    result = get_db().uploads.update_one(
+        {'_id': upload['_id'], 'received': start},
+        {'$set': {'received': start + length, 'updated_at': datetime.datetime.utcnow()}}
+    )
+    if result.modified_count == 0:
+        raise UploadError('Chunk was applied concurrently', 409)
+    return start + length
+
+def complete_upload(upload_id, user_id):
+    """
+    Claim a fully received upload for completion and verify the assembled file.
+
+    The claim moves the upload from 'uploading' to 'completing' atomically,
+    so of two concurrent completions only one goes on to create a meme; the
+    other gets a 409. Call release_upload if the completion then fails.
+
+    Returns:
+        tuple: (path, upload document)
+    """
+    if not ObjectId.is_valid(upload_id):
+        raise UploadError('Upload not found', 404)
+    upload = get_db().uploads.find_one_and_update(
+        {
+            '_id': ObjectId(upload_id),
+            'user_id': ObjectId(user_id),
+            'state': {'$ne': 'completing'},
+            '$expr': {'$eq': ['$received', '$size']}
+        },
+        {'$set': {'state': 'completing', 'updated_at': datetime.datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if upload is None:
+        # Work out why the claim failed
+        upload = get_upload(upload_id, user_id)
+        if upload is None:
+            raise UploadError('Upload not found', 404)
+        if upload.get('state') == 'completing':
+            raise UploadError('Upload is already being completed', 409)
+        raise UploadError(f"Upload incomplete: {upload['received']} of {upload['size']} bytes", 409)
+
+    path = _upload_path(upload['_id'])
+    if _sha256_file(path) != upload['checksum']:
+        release_upload(upload['_id'])
+        raise UploadError('File checksum mismatch')
+    return path, upload
+
+def release_upload(upload_id):
+    """Hand a claimed upload back after a failed completion, so the client can retry."""
+    get_db().uploads.update_one(
+        {'_id': ObjectId(upload_id), 'state': 'completing'},
+        {'$set': {'state': 'uploading', 'updated_at': datetime.datetime.utcnow()}}
+    )
+
+def discard_upload(upload_id):
+    """Delete an upload session and its partial file."""
+    try:
+        os.remove(_upload_path(upload_id))
+    except FileNotFoundError:
+        pass
+    get_db().uploads.delete_one({'_id': ObjectId(upload_id)})
+
+def purge_stale_uploads():
+    """
+    Remove uploads that have not received a chunk within UPLOAD_STALE_AFTER seconds.
+
+    Returns:
+        int: Number of uploads removed
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=current_app.config['UPLOAD_STALE_AFTER'])
+    stale = list(get_db().uploads.find({'updated_at': {'$lt': cutoff}}, {'_id': 1}))
+    for upload in stale:
+        discard_upload(upload['_id'])
+    return len(stale)
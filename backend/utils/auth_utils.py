@@ -1,5 +1,7 @@
 import bcrypt
-from flask_jwt_extended import create_access_token
+from functools import wraps
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
 from datetime import timedelta
 
 def hash_password(password):
@@ -43,4 +45,22 @@ def generate_token(user_id, expires_delta=None):
     return create_access_token(
         identity=str(user_id),
         expires_delta=expires_delta
-    )
\ No newline at end of file
+    )
+
+def admin_required(fn):
+    """
+    Restrict a view to the users listed in ADMIN_USER_IDS.
+    
+    Args:
+        fn (callable): The view function
+        
+    Returns:
+        callable: The wrapped view, which also requires a valid JWT
+    """
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if get_jwt_identity() not in current_app.config['ADMIN_USER_IDS']:
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,117 @@
+import gzip
+import zlib
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+def json_list_response(items, status=200):
+    """
+    Build a JSON array response from a cursor, streaming it when enabled in the config.
+
+    Meant for Mongo cursors: the first item is read and encoded before the
+    response starts, so the query and its first batch (all of a page of up
+    to 101 documents) fail with a proper error status rather than a
+    truncated 200 body. Lists that are already built gain nothing from
+    streaming; return them with jsonify.
+
+    Args:
+        items (iterable): The items to encode, typically a cursor
+        status (int): The HTTP status code
+
+    Returns:
+        Response: The JSON response
+    """
+    if not current_app.config.get('STREAM_JSON_RESPONSES'):
+        return jsonify(list(items)), status
+
+    dumps = current_app.json.dumps
+    items = iter(items)
+    try:
+        first = dumps(next(items))
+    except StopIteration:
+        return jsonify([]), status
+
+    def generate():
+        yield '[' + first
+        for item in items:
+            yield ',' + dumps(item)
+        yield ']'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def _compress_stream(chunks, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            # Flush per chunk so streamed items reach the client promptly
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+def compress_response(response):
+    """
+    Compress a response with brotli or gzip if the client accepts it.
+
+    Buffered responses are only compressed above COMPRESSION_MIN_SIZE bytes;
+    streamed responses are compressed chunk by chunk.
+
+    Args:
+        response (Response): The outgoing response
+
+    Returns:
+        Response: The (possibly) compressed response
+    """
+    config = current_app.config
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    encoding = _choose_encoding()
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        level = config['BROTLI_QUALITY'] if encoding == 'br' else config['COMPRESSION_LEVEL']
+        response.response = _compress_stream(response.iter_encoded(), encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        if encoding == 'br':
+            data = brotli.compress(data, quality=config['BROTLI_QUALITY'])
+        else:
+            data = gzip.compress(data, compresslevel=config['COMPRESSION_LEVEL'])
+        response.set_data(data)
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_compression(app):
+    """Register response compression if enabled in the config."""
+    if app.config.get('COMPRESSION_ENABLED'):
+        app.after_request(compress_response)
@@ -17,11 +17,28 @@ api.interceptors.request.use(
     if (token) {
       config.headers['Authorization'] = `Bearer ${token}`;
     }
+    // Echo the last write time so the backend can serve our own writes from the primary
+    const lastWrite = localStorage.getItem('lastWrite');
+    if (lastWrite) {
+      config.headers['X-Last-Write'] = lastWrite;
+    }
     return config;
   },
   (error) => Promise.reject(error)
 );
 
+// Remember when the backend last acknowledged one of our writes
+api.interceptors.response.use(
+  (response) => {
+    const lastWrite = response.headers['x-last-write'];
+    if (lastWrite) {
+      localStorage.setItem('lastWrite', lastWrite);
+    }
+    return response;
+  },
+  (error) => Promise.reject(error)
+);
+
 // Authentication API
 export const authAPI = {
   register: (userData) => api.post('/api/auth/register', userData),
@@ -33,6 +50,7 @@ export const authAPI = {
 // User API
 export const userAPI = {
   getUser: (userId) => api.get(`/api/users/${userId}`),
+  getUserProfile: (userId, limit = 12) => api.get(`/api/users/${userId}/profile?limit=${limit}`),
   searchUsers: (query, limit = 10, skip = 0) => 
     api.get(`/api/users/search?q=${query}&limit=${limit}&skip=${skip}`),
   followUser: (userId) => api.post(`/api/users/${userId}/follow`),
@@ -47,8 +65,8 @@ export const userAPI = {
 
 // Meme API
 export const memeAPI = {
-  getFeed: (limit = 10, skip = 0) => 
-    api.get(`/api/memes/feed?limit=${limit}&skip=${skip}`),
+  getFeed: (limit = 10, skip = 0, mode = 'latest') => 
+    api.get(`/api/memes/feed?limit=${limit}&skip=${skip}&mode=${mode}`),
   getMeme: (memeId) => api.get(`/api/memes/${memeId}`),
   createMeme: (formData) => {
     return api.post('/api/memes', formData, {
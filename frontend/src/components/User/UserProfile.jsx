@@ -25,21 +25,15 @@ const UserProfile = () => {
       try {
         setLoading(true);
         
-        // Fetch user profile
-        const userResponse = await axios.get(`http://localhost:5000/api/users/${userId}`, {
+        // Fetch the profile card, counts and first page of memes in one request
+        const response = await axios.get(`http://localhost:5000/api/users/${userId}/profile`, {
           headers: { Authorization: `Bearer ${token}` }
         });
         
-        setUser(userResponse.data);
-        setFollowersCount(userResponse.data.followers_count);
-        setFollowingCount(userResponse.data.following_count);
-        
-        // Fetch user memes
-        const memesResponse = await axios.get(`http://localhost:5000/api/users/${userId}/memes`, {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        
-        setMemes(memesResponse.data);
+        setUser(response.data.user);
+        setFollowersCount(response.data.user.followers_count);
+        setFollowingCount(response.data.user.following_count);
+        setMemes(response.data.memes);
       } catch (error) {
         console.error('Error fetching user data:', error);
         toast.error('Failed to load user profile');